@@ -0,0 +1,241 @@
+from sqlalchemy import func, case, cast, extract, literal_column, Date
+from sqlalchemy.orm import Session
+from datetime import date, datetime, time
+from typing import Optional
+import logging
+
+import models
+
+logger = logging.getLogger("restaurant_api")
+
+SALES_GROUPS = ("restaurant", "day", "hour", "dish", "category", "payment_method", "employee")
+
+
+def _day(db: Session, column):
+    # В SQLite CAST(... AS DATE) не дает дату, используется date()
+    if db.get_bind().dialect.name == "sqlite":
+        return func.date(column)
+    return cast(column, Date)
+
+
+def _period_filters(query, date_from: Optional[date], date_to: Optional[date]):
+    order_time = models.CustomerOrder.order_time
+    if date_from is not None:
+        query = query.filter(order_time >= datetime.combine(date_from, time.min))
+    if date_to is not None:
+        query = query.filter(order_time <= datetime.combine(date_to, time.max))
+    return query
+
+
+def _sales_filters(query, date_from, date_to, restaurant_id, order_status):
+    query = _period_filters(query, date_from, date_to)
+    if restaurant_id is not None:
+        query = query.filter(models.CustomerOrder.restaurant_id == restaurant_id)
+    if order_status is not None:
+        query = query.filter(models.CustomerOrder.order_status == order_status)
+    return query
+
+
+def _aggregates():
+    return (
+        func.count(models.CustomerOrder.id).label("orders"),
+        func.coalesce(func.sum(models.CustomerOrder.quantity), 0).label("quantity"),
+        func.coalesce(func.sum(models.CustomerOrder.total_amount), 0).label("revenue"),
+    )
+
+
+def get_sales(db: Session, group_by: str, date_from: Optional[date] = None, date_to: Optional[date] = None,
+              restaurant_id: Optional[int] = None, order_status: Optional[str] = None):
+    """Выручка и количество заказов с группировкой на стороне БД (GROUP BY)"""
+    logger.debug("Аналитика продаж: группировка=%s, период=%s..%s, ресторан=%s",
+                 group_by, date_from, date_to, restaurant_id)
+    order = models.CustomerOrder
+
+    if group_by == "restaurant":
+        key, name = order.restaurant_id, models.Restaurant.name
+        query = db.query(key, name, *_aggregates()).join(models.Restaurant, models.Restaurant.id == order.restaurant_id)
+        group = (key, name)
+    elif group_by == "dish":
+        key, name = order.dish_id, models.Dish.name
+        query = db.query(key, name, *_aggregates()).join(models.Dish, models.Dish.id == order.dish_id)
+        group = (key, name)
+    elif group_by == "category":
+        key = models.Dish.category
+        query = db.query(key, *_aggregates()).join(models.Dish, models.Dish.id == order.dish_id)
+        group = (key,)
+    elif group_by == "day":
+        key = _day(db, order.order_time)
+        query = db.query(key, *_aggregates())
+        group = (key,)
+    elif group_by == "hour":
+        key = extract("hour", order.order_time)
+        query = db.query(key, *_aggregates())
+        group = (key,)
+    elif group_by == "payment_method":
+        key = order.payment_method
+        query = db.query(key, *_aggregates())
+        group = (key,)
+    elif group_by == "employee":
+        key = order.employee_id
+        query = db.query(key, *_aggregates())
+        group = (key,)
+    else:
+        raise ValueError(f"Неизвестная группировка: {group_by}")
+
+    query = _sales_filters(query, date_from, date_to, restaurant_id, order_status)
+    rows = query.group_by(*group).order_by(group[0]).all()
+
+    return [
+        {
+            "key": row[0],
+            "name": row[1] if len(group) > 1 else None,
+            "orders": row.orders,
+            "quantity": row.quantity,
+            "revenue": row.revenue,
+        }
+        for row in rows
+    ]
+
+
+def get_sales_summary(db: Session, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                      restaurant_id: Optional[int] = None, order_status: Optional[str] = None):
+    logger.debug("Итоги продаж: период=%s..%s, ресторан=%s", date_from, date_to, restaurant_id)
+    query = _sales_filters(db.query(*_aggregates()), date_from, date_to, restaurant_id, order_status)
+    row = query.one()
+    return {
+        "orders": row.orders,
+        "quantity": row.quantity,
+        "revenue": row.revenue,
+        "average_check": round(row.revenue / row.orders, 2) if row.orders else 0,
+    }
+
+
+ROLLUP_GROUPS = ("restaurant", "dish", "bucket")
+
+
+def get_rollup_sales(db: Session, granularity: str = "day", group_by: str = "bucket",
+                     date_from: Optional[date] = None, date_to: Optional[date] = None,
+                     restaurant_id: Optional[int] = None):
+    """
+    Продажи из предагрегированных таблиц: стоимость зависит от длины периода,
+    а не от общего числа заказов
+    """
+    logger.debug("Агрегаты продаж: гранулярность=%s, группировка=%s, период=%s..%s",
+                 granularity, group_by, date_from, date_to)
+    if granularity == "hour":
+        rollup = models.SalesRollupHourly
+        bucket = rollup.bucket_start
+        start = datetime.combine(date_from, time.min) if date_from is not None else None
+        end = datetime.combine(date_to, time.max) if date_to is not None else None
+    else:
+        rollup = models.SalesRollupDaily
+        bucket = rollup.bucket_date
+        start, end = date_from, date_to
+
+    key = {"restaurant": rollup.restaurant_id, "dish": rollup.dish_id, "bucket": bucket}[group_by]
+    query = db.query(
+        key,
+        func.sum(rollup.orders_count).label("orders"),
+        func.sum(rollup.quantity).label("quantity"),
+        func.sum(rollup.revenue).label("revenue"),
+    )
+    if start is not None:
+        query = query.filter(bucket >= start)
+    if end is not None:
+        query = query.filter(bucket <= end)
+    if restaurant_id is not None:
+        query = query.filter(rollup.restaurant_id == restaurant_id)
+
+    rows = query.group_by(key).order_by(key).all()
+    return [
+        {"key": row[0], "orders": row.orders, "quantity": row.quantity, "revenue": row.revenue}
+        for row in rows
+    ]
+
+
+PAYABLES_GROUPS = ("supplier", "restaurant", "day", "month")
+
+# Статусы поставки, от которых зависят сводки
+PAID_STATUS = "оплачено"
+PENDING_DELIVERY_STATUS = "ожидает"
+
+
+def _month(db: Session, column):
+    # Первый день месяца: DATEFROMPARTS в SQL Server, строка YYYY-MM-01 в SQLite.
+    # День передается литералом: параметр в SELECT и GROUP BY SQL Server считает
+    # разными выражениями (ошибка 8120)
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m-01", column)
+    if dialect == "postgresql":
+        return cast(func.date_trunc("month", column), Date)
+    return func.datefromparts(extract("year", column), extract("month", column), literal_column("1"))
+
+
+def _payables_aggregates():
+    supply = models.IngredientSupply
+    paid = supply.payment_status == PAID_STATUS
+    return (
+        func.count(supply.id).label("supplies"),
+        func.coalesce(func.sum(supply.total_amount), 0).label("total_amount"),
+        func.coalesce(func.sum(case((paid, supply.total_amount), else_=0)), 0).label("paid_amount"),
+        func.coalesce(func.sum(case((paid, 0), else_=supply.total_amount)), 0).label("outstanding_amount"),
+        func.coalesce(func.sum(case((paid, 0), else_=1)), 0).label("unpaid_supplies"),
+        func.coalesce(func.sum(case((supply.delivery_status == PENDING_DELIVERY_STATUS, 1), else_=0)), 0)
+        .label("pending_deliveries"),
+    )
+
+
+def get_supplier_payables(db: Session, group_by: str = "supplier", date_from: Optional[date] = None,
+                          date_to: Optional[date] = None, supplier_id: Optional[int] = None,
+                          restaurant_id: Optional[int] = None):
+    """
+    Оплаченные и неоплаченные суммы и ожидаемые доставки по поставщикам,
+    ресторанам, дням или месяцам (GROUP BY на стороне БД)
+    """
+    logger.debug("Расчеты с поставщиками: группировка=%s, период=%s..%s, поставщик=%s, ресторан=%s",
+                 group_by, date_from, date_to, supplier_id, restaurant_id)
+    supply = models.IngredientSupply
+
+    if group_by == "supplier":
+        key, name = supply.supplier_id, models.Supplier.company_name
+        query = db.query(key, name, *_payables_aggregates()).join(models.Supplier, models.Supplier.id == key)
+        group = (key, name)
+    elif group_by == "restaurant":
+        key, name = supply.restaurant_id, models.Restaurant.name
+        query = db.query(key, name, *_payables_aggregates()).join(models.Restaurant, models.Restaurant.id == key)
+        group = (key, name)
+    elif group_by == "day":
+        key = supply.supply_date
+        query = db.query(key, *_payables_aggregates())
+        group = (key,)
+    elif group_by == "month":
+        key = _month(db, supply.supply_date)
+        query = db.query(key, *_payables_aggregates())
+        group = (key,)
+    else:
+        raise ValueError(f"Неизвестная группировка: {group_by}")
+
+    if date_from is not None:
+        query = query.filter(supply.supply_date >= date_from)
+    if date_to is not None:
+        query = query.filter(supply.supply_date <= date_to)
+    if supplier_id is not None:
+        query = query.filter(supply.supplier_id == supplier_id)
+    if restaurant_id is not None:
+        query = query.filter(supply.restaurant_id == restaurant_id)
+
+    rows = query.group_by(*group).order_by(group[0]).all()
+    return [
+        {
+            "key": row[0],
+            "name": row[1] if len(group) > 1 else None,
+            "supplies": row.supplies,
+            "total_amount": row.total_amount,
+            "paid_amount": row.paid_amount,
+            "outstanding_amount": row.outstanding_amount,
+            "unpaid_supplies": row.unpaid_supplies,
+            "pending_deliveries": row.pending_deliveries,
+        }
+        for row in rows
+    ]
\ No newline at end of file
@@ -1,5 +1,7 @@
 from fastapi import APIRouter
 
+from database import AsyncSessionLocal
+
 from api.v1.endpoints import (
     Restaurant_Type,
     Employee_Position,
@@ -10,7 +12,12 @@ from api.v1.endpoints import (
     Supplier,
     Ingredient_Supply,
     Customer_Order,
-    etl
+    etl,
+    metrics,
+    cache_admin,
+    export,
+    analytics,
+    Ingredient
 )
 
 api_router = APIRouter()
@@ -24,4 +31,15 @@ api_router.include_router(Dish.router)
 api_router.include_router(Supplier.router)
 api_router.include_router(Ingredient_Supply.router)
 api_router.include_router(Customer_Order.router)
-api_router.include_router(etl.router)
\ No newline at end of file
+api_router.include_router(etl.router)
+api_router.include_router(metrics.router)
+api_router.include_router(cache_admin.router)
+api_router.include_router(export.router)
+api_router.include_router(analytics.router)
+api_router.include_router(Ingredient.router)
+
+# Асинхронные маршруты частых запросов (/api/v1/async/...), если настроен async-драйвер
+if AsyncSessionLocal is not None:
+    from api.v1.endpoints import async_routes
+
+    api_router.include_router(async_routes.router)
@@ -0,0 +1,56 @@
+from fastapi import HTTPException, Request
+
+from database import SessionLocal, ReplicaSessionLocal
+from schemas import MAX_BATCH_IDS
+
+# Заголовок для чтения с основной БД (read-your-writes сразу после записи)
+READ_PRIMARY_HEADER = "X-Read-Primary"
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def wants_primary(request: Request) -> bool:
+    return request.headers.get(READ_PRIMARY_HEADER, "").lower() in ("1", "true", "yes")
+
+
+def read_session_factory(request: Request):
+    """Безопасные запросы читают с реплики, остальные - с основной БД"""
+    if request.method in SAFE_METHODS and not wants_primary(request):
+        return ReplicaSessionLocal
+    return SessionLocal
+
+
+# Dependency: сессия для чтения по правилам read_session_factory
+def get_read_db(request: Request):
+    db = read_session_factory(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def parse_ids(ids: str) -> list:
+    """Разбор списка id вида "1,2,3" (дубликаты убираются, порядок сохраняется)"""
+    try:
+        parsed = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Параметр ids должен быть списком целых чисел через запятую")
+    parsed = list(dict.fromkeys(parsed))
+    if len(parsed) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"Слишком много id (максимум {MAX_BATCH_IDS})")
+    return parsed
+
+
+def parse_fields(fields, allowed: list) -> list:
+    """Разбор параметра fields=id,name,price; без параметра - все поля схемы"""
+    if not fields:
+        return allowed
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Неизвестные поля: {', '.join(unknown)}. Доступные: {', '.join(allowed)}"
+        )
+    # id возвращается всегда, остальные поля - в порядке схемы
+    return [field for field in allowed if field == "id" or field in requested]
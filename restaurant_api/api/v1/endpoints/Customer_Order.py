@@ -1,13 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+import asyncio
+import os
 
 import crud
+import models
 import schemas
+import order_writer
+from order_events import order_event_bus
 from database import SessionLocal
+from serialization import FAST_SERIALIZATION, schema_fields, rows_json_response, row_json_response, dumps
+from api.v1.dependencies import get_read_db, parse_ids, parse_fields
 
 router = APIRouter(prefix="/customer_order", tags=["Элементы заказа (customer_order)"])
 
+customer_order_fields = schema_fields(schemas.CustomerOrder)
+
+# Интервал пустых сообщений, чтобы прокси не закрывали простаивающее соединение
+STREAM_HEARTBEAT = float(os.getenv('ORDER_STREAM_HEARTBEAT', 15))
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -16,13 +30,113 @@ def get_db():
     finally:
         db.close()
 
-@router.post("/", response_model=schemas.CustomerOrder, status_code=status.HTTP_201_CREATED)
-def create_customer_order(customer_order: schemas.CustomerOrderCreate, db: Session = Depends(get_db)):
+def _pending_response(request: Request, ticket: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"ticket": ticket, "status": "pending"},
+        headers={"Location": str(request.url_for("read_write_behind_ticket", ticket=ticket))}
+    )
+
+@router.post("/", response_model=schemas.CustomerOrder, status_code=status.HTTP_201_CREATED,
+             responses={202: {"description": "Заказ в очереди, но еще не зафиксирован (ORDER_WRITE_BEHIND)"}})
+async def create_customer_order(request: Request, customer_order: schemas.CustomerOrderCreate, db: Session = Depends(get_db)):
+
+    if order_writer.ENABLED:
+        # Ответ отдается после фиксации пачки, в которую попал заказ; поток пула при этом не занят
+        future = order_writer.writer.submit(customer_order)
+        try:
+            # shield: по таймауту заказ не отменяется, его пачка еще может быть зафиксирована
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), order_writer.ACK_TIMEOUT)
+        except asyncio.TimeoutError:
+            return _pending_response(request, order_writer.writer.park(future))
+
+    return await run_in_threadpool(crud.create_customer_order, db=db, customer_order=customer_order)
+
+@router.get("/write-behind/{ticket}", response_model=schemas.CustomerOrder,
+            summary="Итог заказа, не дождавшегося фиксации пачки")
+def read_write_behind_ticket(request: Request, ticket: str):
+
+    future = order_writer.writer.pending(ticket)
+
+    if future is None:
+        raise HTTPException(status_code=404, detail="Номер не найден")
 
-    return crud.create_customer_order(db=db, customer_order=customer_order)
+    if not future.done():
+        return _pending_response(request, ticket)
+
+    if future.exception() is not None:
+        raise HTTPException(status_code=409, detail=f"Заказ не записан: {future.exception()}")
+
+    return future.result()
+
+@router.post("/ticket", response_model=List[schemas.CustomerOrder], status_code=status.HTTP_201_CREATED)
+def create_order_ticket(ticket: schemas.OrderTicketCreate, db: Session = Depends(get_db)):
+
+    try:
+        return crud.create_order_ticket(db=db, ticket=ticket)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _sse_message(event) -> bytes:
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (event.id, event.type.encode(), dumps(event.data))
+
+@router.get("/stream", summary="Поток событий по заказам (Server-Sent Events)")
+async def stream_customer_orders(
+        request: Request,
+        restaurant_id: Optional[int] = None,
+        last_event_id: Optional[int] = None,
+        last_event_id_header: Optional[int] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Новые и измененные заказы (события created, updated, status, deleted) по ресторану
+    или по всем ресторанам. При переподключении пропущенные события
+    отдаются повторно начиная с Last-Event-ID (заголовок или параметр).
+    """
+    if last_event_id is None:
+        last_event_id = last_event_id_header
+    subscription, backlog = order_event_bus.subscribe(restaurant_id, last_event_id)
+
+    async def events():
+        try:
+            for event in backlog:
+                yield _sse_message(event)
+            while not subscription.overflowed:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": ping\n\n"
+                    continue
+                yield _sse_message(event)
+        finally:
+            order_event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/batch", response_model=schemas.BatchResult[schemas.CustomerOrder])
+def read_customer_orders_batch(ids: str, db: Session = Depends(get_read_db)):
+
+    return crud.get_by_ids(db, models.CustomerOrder, parse_ids(ids))
+
+@router.post("/batch", response_model=schemas.BatchResult[schemas.CustomerOrder])
+def read_customer_orders_batch_by_body(batch: schemas.BatchIds, db: Session = Depends(get_read_db)):
+
+    return crud.get_by_ids(db, models.CustomerOrder, list(dict.fromkeys(batch.ids)))
 
 @router.get("/{order_id}", response_model=schemas.CustomerOrder)
-def read_customer_order(order_id: int, db: Session = Depends(get_db)):
+def read_customer_order(order_id: int, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+
+    if fields:
+        selected = parse_fields(fields, customer_order_fields)
+        row = crud.get_row(db, models.CustomerOrder, selected, order_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="CustomerOrder not found")
+        return row_json_response(selected, row)
 
     db_customer_order = crud.get_customer_order(db, order_id=order_id)
 
@@ -32,7 +146,12 @@ def read_customer_order(order_id: int, db: Session = Depends(get_db)):
     return db_customer_order
 
 @router.get("/", response_model=List[schemas.CustomerOrder])
-def read_customer_order(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_customer_order(skip: int = 0, limit: int = 100, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+
+    if fields or FAST_SERIALIZATION:
+        selected = parse_fields(fields, customer_order_fields)
+        rows = crud.get_rows(db, models.CustomerOrder, selected, skip=skip, limit=limit)
+        return rows_json_response(selected, rows)
 
     customer_order = crud.get_customer_orders(db, skip=skip, limit=limit)
 
@@ -48,6 +167,26 @@ def update_customer_order(order_id: int, customer_order: schemas.CustomerOrderCr
 
     return crud.update_customer_order(db=db, order_id=order_id, customer_order=customer_order)
 
+@router.patch("/{order_id}", response_model=schemas.CustomerOrder)
+def patch_customer_order(order_id: int, customer_order: schemas.CustomerOrderUpdate, db: Session = Depends(get_db)):
+
+    db_customer_order = crud.patch_customer_order(db, order_id=order_id, customer_order=customer_order)
+
+    if db_customer_order is None:
+        raise HTTPException(status_code=404, detail="CustomerOrder not found")
+
+    return db_customer_order
+
+@router.patch("/{order_id}/status", response_model=schemas.CustomerOrder)
+def set_customer_order_status(order_id: int, order_status: schemas.CustomerOrderStatusUpdate, db: Session = Depends(get_db)):
+
+    db_customer_order = crud.set_customer_order_status(db, order_id=order_id, order_status=order_status.order_status)
+
+    if db_customer_order is None:
+        raise HTTPException(status_code=404, detail="CustomerOrder not found")
+
+    return db_customer_order
+
 @router.delete("/{order_id}", response_model=schemas.CustomerOrder)
 def delete_customer_order(order_id: int, db: Session = Depends(get_db)):
 
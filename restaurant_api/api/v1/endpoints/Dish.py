@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 import crud
+import models
 import schemas
 from database import SessionLocal
+from serialization import FAST_SERIALIZATION, schema_fields, rows_json_response, row_json_response
+from api.v1.dependencies import get_read_db, parse_ids, parse_fields
+from cache import cached_entity_response
 
 router = APIRouter(prefix="/dishes", tags=["Блюда (dishes)"])
 
+dish_fields = schema_fields(schemas.Dish)
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -21,18 +27,58 @@ def create_dish(dish: schemas.DishCreate, db: Session = Depends(get_db)):
 
     return crud.create_dish(db=db, dish=dish)
 
+@router.get("/search", response_model=List[schemas.Dish])
+def search_dishes(
+        q: str = Query(..., min_length=1),
+        restaurant_id: Optional[int] = None,
+        is_available: Optional[bool] = None,
+        skip: int = 0,
+        limit: int = Query(20, le=100),
+        db: Session = Depends(get_read_db)
+):
+    """
+    Поиск блюд по словам из названия, категории, состава и описания
+    (с учетом словоформ и начала слова), по убыванию релевантности
+    """
+    return crud.search_dishes(db, q, restaurant_id=restaurant_id, is_available=is_available, skip=skip, limit=limit)
+
+@router.get("/batch", response_model=schemas.BatchResult[schemas.Dish])
+def read_dishes_batch(ids: str, db: Session = Depends(get_read_db)):
+
+    return crud.get_by_ids(db, models.Dish, parse_ids(ids))
+
+@router.post("/batch", response_model=schemas.BatchResult[schemas.Dish])
+def read_dishes_batch_by_body(batch: schemas.BatchIds, db: Session = Depends(get_read_db)):
+
+    return crud.get_by_ids(db, models.Dish, list(dict.fromkeys(batch.ids)))
+
 @router.get("/{dish_id}", response_model=schemas.Dish)
-def read_dish(dish_id: int, db: Session = Depends(get_db)):
+def read_dish(dish_id: int, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
 
-    db_dish = crud.get_dish(db, dish_id=dish_id)
+    if fields:
+        selected = parse_fields(fields, dish_fields)
+        row = crud.get_row(db, models.Dish, selected, dish_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Блюдо не найдено")
+        return row_json_response(selected, row)
 
-    if db_dish is None:
+    response = cached_entity_response(
+        "dish", dish_id, db,
+        lambda session: crud.get_dish(session, dish_id=dish_id), schemas.Dish
+    )
+
+    if response is None:
         raise HTTPException(status_code=404, detail="Блюдо не найдено")
 
-    return db_dish
+    return response
 
 @router.get("/", response_model=List[schemas.Dish])
-def read_dish(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_dish(skip: int = 0, limit: int = 100, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+
+    if fields or FAST_SERIALIZATION:
+        selected = parse_fields(fields, dish_fields)
+        rows = crud.get_rows(db, models.Dish, selected, skip=skip, limit=limit)
+        return rows_json_response(selected, rows)
 
     dish = crud.get_dishes(db, skip=skip, limit=limit)
 
@@ -48,6 +94,26 @@ def update_dish(dish_id: int, dish: schemas.DishCreate, db: Session = Depends(ge
 
     return crud.update_dish(db=db, dish_id=dish_id, dish=dish)
 
+@router.patch("/{dish_id}", response_model=schemas.Dish)
+def patch_dish(dish_id: int, dish: schemas.DishUpdate, db: Session = Depends(get_db)):
+
+    db_dish = crud.patch_dish(db, dish_id=dish_id, dish=dish)
+
+    if db_dish is None:
+        raise HTTPException(status_code=404, detail="Блюдо не найдено")
+
+    return db_dish
+
+@router.patch("/{dish_id}/availability", response_model=schemas.Dish)
+def set_dish_availability(dish_id: int, availability: schemas.DishAvailabilityUpdate, db: Session = Depends(get_db)):
+
+    db_dish = crud.set_dish_availability(db, dish_id=dish_id, is_available=availability.is_available)
+
+    if db_dish is None:
+        raise HTTPException(status_code=404, detail="Блюдо не найдено")
+
+    return db_dish
+
 @router.delete("/{dish_id}", response_model=schemas.Dish)
 def delete_dish(dish_id: int, db: Session = Depends(get_db)):
 
@@ -1,13 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 import crud
+import models
 import schemas
 from database import SessionLocal
+from serialization import FAST_SERIALIZATION, schema_fields, rows_json_response, row_json_response
+from api.v1.dependencies import get_read_db, parse_ids, parse_fields
 
 router = APIRouter(prefix="/employee", tags=["Сотрудники (employees)"])
 
+employee_fields = schema_fields(schemas.Employee)
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -21,8 +26,25 @@ def create_employee(employee: schemas.EmployeeCreate, db: Session = Depends(get_
 
     return crud.create_employee(db=db, employee=employee)
 
+@router.get("/batch", response_model=schemas.BatchResult[schemas.Employee])
+def read_employees_batch(ids: str, db: Session = Depends(get_read_db)):
+
+    return crud.get_by_ids(db, models.Employee, parse_ids(ids))
+
+@router.post("/batch", response_model=schemas.BatchResult[schemas.Employee])
+def read_employees_batch_by_body(batch: schemas.BatchIds, db: Session = Depends(get_read_db)):
+
+    return crud.get_by_ids(db, models.Employee, list(dict.fromkeys(batch.ids)))
+
 @router.get("/{employee_id}", response_model=schemas.Employee)
-def read_employee(employee_id: int, db: Session = Depends(get_db)):
+def read_employee(employee_id: int, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+
+    if fields:
+        selected = parse_fields(fields, employee_fields)
+        row = crud.get_row(db, models.Employee, selected, employee_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Employee not found")
+        return row_json_response(selected, row)
 
     db_employee = crud.get_employee(db, employee_id=employee_id)
 
@@ -32,7 +54,12 @@ def read_employee(employee_id: int, db: Session = Depends(get_db)):
     return db_employee
 
 @router.get("/", response_model=List[schemas.Employee])
-def read_employee(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_employee(skip: int = 0, limit: int = 100, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+
+    if fields or FAST_SERIALIZATION:
+        selected = parse_fields(fields, employee_fields)
+        rows = crud.get_rows(db, models.Employee, selected, skip=skip, limit=limit)
+        return rows_json_response(selected, rows)
 
     employee = crud.get_employees(db, skip=skip, limit=limit)
 
@@ -48,6 +75,16 @@ def update_employee(employee_id: int, employee: schemas.EmployeeCreate, db: Sess
 
     return crud.update_employee(db=db, employee_id=employee_id, employee=employee)
 
+@router.patch("/{employee_id}", response_model=schemas.Employee)
+def patch_employee(employee_id: int, employee: schemas.EmployeeUpdate, db: Session = Depends(get_db)):
+
+    db_employee = crud.patch_employee(db, employee_id=employee_id, employee=employee)
+
+    if db_employee is None:
+        raise HTTPException(status_code=404, detail="Employee not found")
+
+    return db_employee
+
 @router.delete("/{employee_id}", response_model=schemas.Employee)
 def delete_employee(employee_id: int, db: Session = Depends(get_db)):
     db_employee = crud.get_employee(db, employee_id=employee_id)
@@ -1,25 +1,22 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
 
 import crud
 import schemas
-from database import SessionLocal
+from api.v1.dependencies import get_read_db
+from cache import get_cache, cached_json_response
 
-router = APIRouter(prefix="/employee_position", tags=["Справочник должностей сотрудников (employee_position)"])
+employee_position_cache = get_cache("employee_position")
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(prefix="/employee_position", tags=["Справочник должностей сотрудников (employee_position)"])
 
 @router.get("/", response_model=List[schemas.EmployeePosition])
-def read_employee_position(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-
-    employee_position = crud.get_employee_position(db, skip=skip, limit=limit)
+def read_employee_position(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
 
-    return employee_position
+    return cached_json_response(
+        request, employee_position_cache, (skip, limit),
+        lambda: crud.get_employee_position(db, skip=skip, limit=limit),
+        List[schemas.EmployeePosition]
+    )
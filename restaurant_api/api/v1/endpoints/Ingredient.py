@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+import crud
+import schemas
+from ingredients import ALLERGENS
+from api.v1.dependencies import get_read_db
+
+router = APIRouter(prefix="/ingredients", tags=["Ингредиенты (ingredients)"])
+
+@router.get("/", response_model=List[schemas.Ingredient])
+def read_ingredients(
+        name: Optional[str] = None,
+        allergen: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        db: Session = Depends(get_read_db)
+):
+
+    return crud.get_ingredients(db, name=name, allergen=allergen, skip=skip, limit=limit)
+
+@router.get("/allergens", response_model=List[str])
+def read_allergens():
+
+    return list(ALLERGENS)
+
+@router.get("/dishes", response_model=List[schemas.Dish])
+def read_dishes_by_ingredients(
+        name: List[str] = Query(...),
+        match_all: bool = False,
+        restaurant_id: Optional[int] = None,
+        is_available: Optional[bool] = None,
+        skip: int = 0,
+        limit: int = 100,
+        db: Session = Depends(get_read_db)
+):
+    """
+    Блюда, содержащие ингредиенты (name можно передать несколько раз;
+    match_all=true - все сразу, иначе любой из них)
+    """
+    return crud.get_dishes_by_ingredients(db, name, match_all=match_all, restaurant_id=restaurant_id,
+                                          is_available=is_available, skip=skip, limit=limit)
+
+@router.get("/allergens/{allergen}/dishes", response_model=List[schemas.Dish])
+def read_dishes_by_allergen(
+        allergen: str,
+        exclude: bool = False,
+        restaurant_id: Optional[int] = None,
+        is_available: Optional[bool] = None,
+        skip: int = 0,
+        limit: int = 100,
+        db: Session = Depends(get_read_db)
+):
+    """Блюда с аллергеном или, при exclude=true, безопасные блюда без него"""
+    if allergen not in ALLERGENS:
+        raise HTTPException(status_code=404, detail="Аллерген не найден")
+
+    return crud.get_dishes_by_allergen(db, allergen, exclude=exclude, restaurant_id=restaurant_id,
+                                       is_available=is_available, skip=skip, limit=limit)
@@ -1,13 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 import crud
+import models
 import schemas
 from database import SessionLocal
+from serialization import FAST_SERIALIZATION, schema_fields, rows_json_response, row_json_response
+from api.v1.dependencies import get_read_db, parse_ids, parse_fields
 
 router = APIRouter(prefix="/ingredient_supply", tags=["Поставка ингредиентов (ingredient_supply)"])
 
+ingredient_supply_fields = schema_fields(schemas.IngredientSupply)
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -21,8 +26,25 @@ def create_ingredient_supply(ingredient_supply: schemas.IngredientSupplyCreate,
 
     return crud.create_ingredient_supply(db=db, ingredient_supply=ingredient_supply)
 
+@router.get("/batch", response_model=schemas.BatchResult[schemas.IngredientSupply])
+def read_ingredient_supplies_batch(ids: str, db: Session = Depends(get_read_db)):
+
+    return crud.get_by_ids(db, models.IngredientSupply, parse_ids(ids))
+
+@router.post("/batch", response_model=schemas.BatchResult[schemas.IngredientSupply])
+def read_ingredient_supplies_batch_by_body(batch: schemas.BatchIds, db: Session = Depends(get_read_db)):
+
+    return crud.get_by_ids(db, models.IngredientSupply, list(dict.fromkeys(batch.ids)))
+
 @router.get("/{ingredient_supply_id}", response_model=schemas.IngredientSupply)
-def read_ingredient_supply(supply_id: int, db: Session = Depends(get_db)):
+def read_ingredient_supply(supply_id: int, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+
+    if fields:
+        selected = parse_fields(fields, ingredient_supply_fields)
+        row = crud.get_row(db, models.IngredientSupply, selected, supply_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="IngredientSupply not found")
+        return row_json_response(selected, row)
 
     db_ingredient_supply = crud.get_ingredient_supply(db, supply_id=supply_id)
 
@@ -32,7 +54,12 @@ def read_ingredient_supply(supply_id: int, db: Session = Depends(get_db)):
     return db_ingredient_supply
 
 @router.get("/", response_model=List[schemas.IngredientSupply])
-def read_ingredient_supply(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_ingredient_supply(skip: int = 0, limit: int = 100, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+
+    if fields or FAST_SERIALIZATION:
+        selected = parse_fields(fields, ingredient_supply_fields)
+        rows = crud.get_rows(db, models.IngredientSupply, selected, skip=skip, limit=limit)
+        return rows_json_response(selected, rows)
 
     ingredient_supply = crud.get_ingredient_supplies(db, skip=skip, limit=limit)
 
@@ -48,6 +75,36 @@ def update_ingredient_supply(supply_id: int, ingredient_supply: schemas.Ingredie
 
     return crud.update_ingredient_supply(db=db, supply_id=supply_id, ingredient_supply=ingredient_supply)
 
+@router.patch("/{supply_id}", response_model=schemas.IngredientSupply)
+def patch_ingredient_supply(supply_id: int, ingredient_supply: schemas.IngredientSupplyUpdate, db: Session = Depends(get_db)):
+
+    db_ingredient_supply = crud.patch_ingredient_supply(db, supply_id=supply_id, ingredient_supply=ingredient_supply)
+
+    if db_ingredient_supply is None:
+        raise HTTPException(status_code=404, detail="IngredientSupply not found")
+
+    return db_ingredient_supply
+
+@router.patch("/{supply_id}/delivery-status", response_model=schemas.IngredientSupply)
+def set_supply_delivery_status(supply_id: int, delivery_status: schemas.IngredientSupplyDeliveryStatusUpdate, db: Session = Depends(get_db)):
+
+    db_ingredient_supply = crud.set_supply_delivery_status(db, supply_id=supply_id, delivery_status=delivery_status.delivery_status)
+
+    if db_ingredient_supply is None:
+        raise HTTPException(status_code=404, detail="IngredientSupply not found")
+
+    return db_ingredient_supply
+
+@router.patch("/{supply_id}/payment-status", response_model=schemas.IngredientSupply)
+def set_supply_payment_status(supply_id: int, payment_status: schemas.IngredientSupplyPaymentStatusUpdate, db: Session = Depends(get_db)):
+
+    db_ingredient_supply = crud.set_supply_payment_status(db, supply_id=supply_id, payment_status=payment_status.payment_status)
+
+    if db_ingredient_supply is None:
+        raise HTTPException(status_code=404, detail="IngredientSupply not found")
+
+    return db_ingredient_supply
+
 @router.delete("/{ingredient_supply_id}", response_model=schemas.IngredientSupply)
 def delete_ingredient_supply(supply_id: int, db: Session = Depends(get_db)):
 
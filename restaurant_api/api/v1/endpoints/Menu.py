@@ -1,13 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 import crud
+import models
 import schemas
 from database import SessionLocal
+from serialization import FAST_SERIALIZATION, schema_fields, rows_json_response, row_json_response
+from api.v1.dependencies import get_read_db, parse_ids, parse_fields
+from cache import cached_entity_response
 
 router = APIRouter(prefix="/menu", tags=["Меню (menu)"])
 
+menu_fields = schema_fields(schemas.Menu)
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -21,23 +27,58 @@ def create_menu(menu: schemas.MenuCreate, db: Session = Depends(get_db)):
 
     return crud.create_menu(db=db, menu=menu)
 
+@router.get("/batch", response_model=schemas.BatchResult[schemas.Menu])
+def read_menus_batch(ids: str, db: Session = Depends(get_read_db)):
+
+    return crud.get_by_ids(db, models.Menu, parse_ids(ids))
+
+@router.post("/batch", response_model=schemas.BatchResult[schemas.Menu])
+def read_menus_batch_by_body(batch: schemas.BatchIds, db: Session = Depends(get_read_db)):
+
+    return crud.get_by_ids(db, models.Menu, list(dict.fromkeys(batch.ids)))
+
 @router.get("/{menu_id}", response_model=schemas.Menu)
-def read_menu(menu_id: int, db: Session = Depends(get_db)):
+def read_menu(menu_id: int, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
 
-    db_menu = crud.get_menu(db, menu_id=menu_id)
+    if fields:
+        selected = parse_fields(fields, menu_fields)
+        row = crud.get_row(db, models.Menu, selected, menu_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Menu not found")
+        return row_json_response(selected, row)
 
-    if db_menu is None:
+    response = cached_entity_response(
+        "menu", menu_id, db,
+        lambda session: crud.get_menu(session, menu_id=menu_id), schemas.Menu
+    )
+
+    if response is None:
         raise HTTPException(status_code=404, detail="Menu not found")
 
-    return db_menu
+    return response
 
 @router.get("/", response_model=List[schemas.Menu])
-def read_menu(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_menu(skip: int = 0, limit: int = 100, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+
+    if fields or FAST_SERIALIZATION:
+        selected = parse_fields(fields, menu_fields)
+        rows = crud.get_rows(db, models.Menu, selected, skip=skip, limit=limit)
+        return rows_json_response(selected, rows)
 
     menu = crud.get_menus(db, skip=skip, limit=limit)
 
     return menu
 
+@router.get("/{menu_id}/dishes", response_model=schemas.MenuWithDishes)
+def read_menu_dishes(menu_id: int, db: Session = Depends(get_read_db)):
+
+    db_menu = crud.get_menu_with_dishes(db, menu_id=menu_id)
+
+    if db_menu is None:
+        raise HTTPException(status_code=404, detail="Menu not found")
+
+    return db_menu
+
 @router.put("/{menu_id}", response_model=schemas.Menu)
 def update_menu(menu_id: int, menu: schemas.MenuCreate, db: Session = Depends(get_db)):
 
@@ -48,6 +89,16 @@ def update_menu(menu_id: int, menu: schemas.MenuCreate, db: Session = Depends(ge
 
     return crud.update_menu(db=db, menu_id=menu_id, menu=menu)
 
+@router.patch("/{menu_id}", response_model=schemas.Menu)
+def patch_menu(menu_id: int, menu: schemas.MenuUpdate, db: Session = Depends(get_db)):
+
+    db_menu = crud.patch_menu(db, menu_id=menu_id, menu=menu)
+
+    if db_menu is None:
+        raise HTTPException(status_code=404, detail="Menu not found")
+
+    return db_menu
+
 @router.delete("/{menu_id}", response_model=schemas.Menu)
 def delete_menu(menu_id: int, db: Session = Depends(get_db)):
 
@@ -1,24 +1,21 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from typing import List
 
 import crud
 import schemas
-from database import SessionLocal
+from api.v1.dependencies import get_read_db
+from cache import get_cache, cached_json_response
 
-router = APIRouter(prefix="/restaurant_type", tags=["Справочник типов ресторанов (restaurant_type)"])
+restaurant_type_cache = get_cache("restaurant_type")
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(prefix="/restaurant_type", tags=["Справочник типов ресторанов (restaurant_type)"])
 
 @router.get("/", response_model=List[schemas.RestaurantType])
-def read_restaurant_type(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-
-    restaurant_type = crud.get_restaurant_type(db, skip=skip, limit=limit)
+def read_restaurant_type(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
 
-    return restaurant_type
+    return cached_json_response(
+        request, restaurant_type_cache, (skip, limit),
+        lambda: crud.get_restaurant_type(db, skip=skip, limit=limit),
+        List[schemas.RestaurantType]
+    )
@@ -1,13 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 import crud
+import models
 import schemas
 from database import SessionLocal
+from serialization import FAST_SERIALIZATION, schema_fields, rows_json_response, row_json_response
+from api.v1.dependencies import get_read_db, parse_ids, parse_fields
 
 router = APIRouter(prefix="/supplier", tags=["Поставщик (supplier)"])
 
+supplier_fields = schema_fields(schemas.Supplier)
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -21,8 +26,25 @@ def create_supplier(supplier: schemas.SupplierCreate, db: Session = Depends(get_
 
     return crud.create_supplier(db=db, supplier=supplier)
 
+@router.get("/batch", response_model=schemas.BatchResult[schemas.Supplier])
+def read_suppliers_batch(ids: str, db: Session = Depends(get_read_db)):
+
+    return crud.get_by_ids(db, models.Supplier, parse_ids(ids))
+
+@router.post("/batch", response_model=schemas.BatchResult[schemas.Supplier])
+def read_suppliers_batch_by_body(batch: schemas.BatchIds, db: Session = Depends(get_read_db)):
+
+    return crud.get_by_ids(db, models.Supplier, list(dict.fromkeys(batch.ids)))
+
 @router.get("/{supplier_id}", response_model=schemas.Supplier)
-def read_supplier(supplier_id: int, db: Session = Depends(get_db)):
+def read_supplier(supplier_id: int, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+
+    if fields:
+        selected = parse_fields(fields, supplier_fields)
+        row = crud.get_row(db, models.Supplier, selected, supplier_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Поставщик не найден")
+        return row_json_response(selected, row)
 
     db_supplier = crud.get_supplier(db, supplier_id=supplier_id)
 
@@ -32,7 +54,12 @@ def read_supplier(supplier_id: int, db: Session = Depends(get_db)):
     return db_supplier
 
 @router.get("/", response_model=List[schemas.Supplier])
-def read_supplier(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_supplier(skip: int = 0, limit: int = 100, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+
+    if fields or FAST_SERIALIZATION:
+        selected = parse_fields(fields, supplier_fields)
+        rows = crud.get_rows(db, models.Supplier, selected, skip=skip, limit=limit)
+        return rows_json_response(selected, rows)
 
     supplier = crud.get_suppliers(db, skip=skip, limit=limit)
 
@@ -49,6 +76,16 @@ def update_supplier(supplier_id: int, supplier: schemas.SupplierCreate, db: Sess
     return crud.update_supplier(db=db, supplier_id=supplier_id, supplier=supplier)
 
 
+@router.patch("/{supplier_id}", response_model=schemas.Supplier)
+def patch_supplier(supplier_id: int, supplier: schemas.SupplierUpdate, db: Session = Depends(get_db)):
+
+    db_supplier = crud.patch_supplier(db, supplier_id=supplier_id, supplier=supplier)
+
+    if db_supplier is None:
+        raise HTTPException(status_code=404, detail="Поставщик не найден")
+
+    return db_supplier
+
 @router.delete("/{supplier_id}", response_model=schemas.Supplier)
 def delete_supplier(supplier_id: int, db: Session = Depends(get_db)):
 
@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import List, Optional
+
+import analytics
+import schemas
+from cache import cached_json_response, payables_cache, primary_session
+from api.v1.dependencies import get_read_db
+
+router = APIRouter(prefix="/analytics", tags=["Аналитика (analytics)"])
+
+
+@router.get("/sales", response_model=List[schemas.SalesAggregate], summary="Продажи с группировкой")
+def read_sales(
+        group_by: str = Query("restaurant", pattern="^(" + "|".join(analytics.SALES_GROUPS) + ")$"),
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        restaurant_id: Optional[int] = None,
+        order_status: Optional[str] = None,
+        db: Session = Depends(get_read_db)
+):
+    """
+    Выручка, число заказов и порций по ресторанам, дням, часам, блюдам,
+    категориям, способам оплаты или сотрудникам за период
+    """
+    return analytics.get_sales(db, group_by, date_from=date_from, date_to=date_to,
+                               restaurant_id=restaurant_id, order_status=order_status)
+
+
+@router.get("/sales/summary", response_model=schemas.SalesSummary, summary="Итоги продаж за период")
+def read_sales_summary(
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        restaurant_id: Optional[int] = None,
+        order_status: Optional[str] = None,
+        db: Session = Depends(get_read_db)
+):
+
+    return analytics.get_sales_summary(db, date_from=date_from, date_to=date_to,
+                                       restaurant_id=restaurant_id, order_status=order_status)
+
+
+@router.get("/rollup/sales", response_model=List[schemas.SalesAggregate], summary="Продажи из агрегатов (дашборды)")
+def read_rollup_sales(
+        granularity: str = Query("day", pattern="^(hour|day)$"),
+        group_by: str = Query("bucket", pattern="^(" + "|".join(analytics.ROLLUP_GROUPS) + ")$"),
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        restaurant_id: Optional[int] = None,
+        db: Session = Depends(get_read_db)
+):
+
+    return analytics.get_rollup_sales(db, granularity=granularity, group_by=group_by, date_from=date_from,
+                                      date_to=date_to, restaurant_id=restaurant_id)
+
+
+@router.get("/payables", response_model=List[schemas.SupplierPayables], summary="Расчеты с поставщиками")
+def read_supplier_payables(
+        request: Request,
+        group_by: str = Query("supplier", pattern="^(" + "|".join(analytics.PAYABLES_GROUPS) + ")$"),
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        supplier_id: Optional[int] = None,
+        restaurant_id: Optional[int] = None,
+        db: Session = Depends(get_read_db)
+):
+    """
+    Сумма поставок, оплачено, к оплате и число ожидаемых доставок по поставщикам,
+    ресторанам, дням или месяцам. Ответ кэшируется до изменения поставок;
+    при промахе кэш заполняется из основной БД
+    """
+    key = (group_by, date_from, date_to, supplier_id, restaurant_id)
+
+    def load():
+        with primary_session(db) as primary_db:
+            return analytics.get_supplier_payables(primary_db, group_by=group_by, date_from=date_from,
+                                                   date_to=date_to, supplier_id=supplier_id,
+                                                   restaurant_id=restaurant_id)
+
+    return cached_json_response(request, payables_cache, key, load, List[schemas.SupplierPayables])
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Асинхронные маршруты (/api/v1/async/...) для самых частых запросов:
+блюдо и список блюд, меню с блюдами, дерево меню и текущее меню ресторана,
+список заказов, создание заказа и смена его статуса.
+
+Обработчики - async def на AsyncSession. Функции crud выполняются через
+AsyncSession.run_sync: синхронный код ORM работает в greenlet, а запросы
+к БД ожидаются асинхронным драйвером (aioodbc, aiosqlite), поэтому цикл
+событий не блокируется и поток пула не занимается.
+
+Подключаются только операции, которые обращаются к БД лишь через сессию.
+Кэши ответов (в том числе redis), поисковый индекс (синхронный SessionLocal),
+очередь групповой фиксации, выгрузки и ETL остаются в синхронных маршрутах
+/api/v1/..., которые выполняются в пуле потоков.
+"""
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+import crud
+import schemas
+from database import AsyncSessionLocal, AsyncReplicaSessionLocal
+from api.v1.dependencies import SAFE_METHODS, wants_primary
+
+router = APIRouter(prefix="/async", tags=["Асинхронные маршруты (async)"])
+
+
+# Dependency
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Dependency: асинхронный аналог get_read_db (реплика для безопасных запросов)
+async def get_async_read_db(request: Request):
+    if request.method in SAFE_METHODS and not wants_primary(request):
+        session_factory = AsyncReplicaSessionLocal
+    else:
+        session_factory = AsyncSessionLocal
+    async with session_factory() as db:
+        yield db
+
+
+@router.get("/dishes/{dish_id}", response_model=schemas.Dish)
+async def read_dish(dish_id: int, db: AsyncSession = Depends(get_async_read_db)):
+
+    db_dish = await db.run_sync(crud.get_dish, dish_id=dish_id)
+
+    if db_dish is None:
+        raise HTTPException(status_code=404, detail="Блюдо не найдено")
+
+    return db_dish
+
+@router.get("/dishes/", response_model=List[schemas.Dish])
+async def read_dishes(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_read_db)):
+
+    return await db.run_sync(crud.get_dishes, skip=skip, limit=limit)
+
+@router.get("/menu/{menu_id}/dishes", response_model=schemas.MenuWithDishes)
+async def read_menu_dishes(menu_id: int, db: AsyncSession = Depends(get_async_read_db)):
+
+    db_menu = await db.run_sync(crud.get_menu_with_dishes, menu_id=menu_id)
+
+    if db_menu is None:
+        raise HTTPException(status_code=404, detail="Menu not found")
+
+    return db_menu
+
+@router.get("/restaurants/{restaurant_id}/menu-tree", response_model=schemas.RestaurantMenuTree)
+async def read_restaurant_menu_tree(restaurant_id: int, db: AsyncSession = Depends(get_async_read_db)):
+
+    db_restaurant = await db.run_sync(crud.get_restaurant_menu_tree, restaurant_id=restaurant_id)
+
+    if db_restaurant is None:
+        raise HTTPException(status_code=404, detail="Ресторан не найден")
+
+    return db_restaurant
+
+@router.get("/restaurants/{restaurant_id}/current-menu", response_model=schemas.CurrentMenu)
+async def read_restaurant_current_menu(
+        restaurant_id: int,
+        at: Optional[date] = None,
+        db: AsyncSession = Depends(get_async_read_db)
+):
+    """Действующие на дату at меню ресторана (без кэша ответов, в отличие от синхронного маршрута)"""
+    at = at or date.today()
+
+    if await db.run_sync(crud.get_restaurant, restaurant_id=restaurant_id) is None:
+        raise HTTPException(status_code=404, detail="Ресторан не найден")
+
+    menus = await db.run_sync(crud.get_current_menus, restaurant_id=restaurant_id, at=at)
+    return {"restaurant_id": restaurant_id, "at": at, "menus": menus}
+
+@router.get("/customer_order/", response_model=List[schemas.CustomerOrder])
+async def read_customer_orders(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_read_db)):
+
+    return await db.run_sync(crud.get_customer_orders, skip=skip, limit=limit)
+
+@router.post("/customer_order/", response_model=schemas.CustomerOrder, status_code=status.HTTP_201_CREATED)
+async def create_customer_order(customer_order: schemas.CustomerOrderCreate, db: AsyncSession = Depends(get_async_db)):
+    """Заказ фиксируется сразу, вместе с агрегатами продаж (без очереди ORDER_WRITE_BEHIND)"""
+
+    return await db.run_sync(crud.create_customer_order, customer_order=customer_order)
+
+@router.patch("/customer_order/{order_id}/status", response_model=schemas.CustomerOrder)
+async def set_customer_order_status(
+        order_id: int,
+        order_status: schemas.CustomerOrderStatusUpdate,
+        db: AsyncSession = Depends(get_async_db)
+):
+
+    db_customer_order = await db.run_sync(
+        crud.set_customer_order_status, order_id=order_id, order_status=order_status.order_status
+    )
+
+    if db_customer_order is None:
+        raise HTTPException(status_code=404, detail="CustomerOrder not found")
+
+    return db_customer_order
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, status
+
+import cache
+
+router = APIRouter(prefix="/cache", tags=["Кэш (cache)"])
+
+
+@router.get("/", summary="Статистика кэшей")
+def read_cache_stats():
+
+    return cache.caches_stats()
+
+
+@router.delete("/{name}", status_code=status.HTTP_204_NO_CONTENT, summary="Сброс кэша")
+def invalidate_cache(name: str):
+
+    cache.invalidate(name)
@@ -1,13 +1,36 @@
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+import importlib
 import os
 import logging
 import tempfile
+import threading
 
 from database import SessionLocal
-from etl_pipeline import ETLPipeline
 
-router = APIRouter(prefix="/etl", tags=["ETL процессы"])
+# Загрузить etl_pipeline (pandas) в фоне при старте, а не при первой загрузке файла
+ETL_PRELOAD = os.getenv('ETL_PRELOAD', 'false').lower() in ('true', '1', 'yes')
+
+
+def load_etl_pipeline():
+    """
+    Класс ETLPipeline. Модуль (и pandas) импортируется при первом обращении,
+    чтобы не замедлять запуск приложения; повторный импорт берется из sys.modules
+    """
+    return importlib.import_module("etl_pipeline").ETLPipeline
+
+
+def preload_etl_pipeline():
+    if ETL_PRELOAD:
+        threading.Thread(target=load_etl_pipeline, name="etl-preload", daemon=True).start()
+
+
+def run_etl_pipeline(file_path: str) -> tuple:
+    return load_etl_pipeline()(file_path).run()
+
+
+router = APIRouter(prefix="/etl", tags=["ETL процессы"], on_startup=[preload_etl_pipeline])
 
 
 # Dependency
@@ -45,9 +68,8 @@ async def upload_file(
             temp_file_path = temp_file.name
 
         try:
-            # Запуск ETL процесса
-            pipeline = ETLPipeline(temp_file_path)
-            validation_errors, load_stats = pipeline.run()
+            # Запуск ETL процесса (в пуле потоков: импорт pandas и обработка файла не блокируют цикл событий)
+            validation_errors, load_stats = await run_in_threadpool(run_etl_pipeline, temp_file_path)
 
             return {
                 "Имя файла": file.filename,
@@ -0,0 +1,158 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Optional
+import csv
+import io
+import os
+import tempfile
+import zlib
+
+import crud
+import models
+import schemas
+from api.v1.dependencies import read_session_factory
+from serialization import schema_fields, dumps
+
+router = APIRouter(prefix="/export", tags=["Выгрузка данных (export)"])
+
+# Сущность -> (модель, схема ответа, столбец с датой для фильтра периода)
+EXPORT_ENTITIES = {
+    "restaurants": (models.Restaurant, schemas.Restaurant, "opening_date"),
+    "employees": (models.Employee, schemas.Employee, "hire_date"),
+    "menus": (models.Menu, schemas.Menu, "start_date"),
+    "dishes": (models.Dish, schemas.Dish, "created_at"),
+    "suppliers": (models.Supplier, schemas.Supplier, "contract_date"),
+    "ingredient_supplies": (models.IngredientSupply, schemas.IngredientSupply, "supply_date"),
+    "customer_orders": (models.CustomerOrder, schemas.CustomerOrder, "order_time"),
+}
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+CHUNK_SIZE = 1000
+
+
+def _stream_partitions(session_factory, model, fields, filters, date_column, date_from, date_to):
+    # Сессия открывается внутри генератора и живет, пока отдается ответ
+    db = session_factory()
+    try:
+        yield from crud.stream_rows(db, model, fields, filters=filters, date_column=date_column,
+                                    date_from=date_from, date_to=date_to, chunk_size=CHUNK_SIZE)
+    finally:
+        db.close()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _ndjson_chunks(fields, partitions):
+    for rows in partitions:
+        yield b"".join(dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+
+
+def _csv_chunks(fields, partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM, чтобы Excel правильно открывал кириллицу
+    buffer.write("\ufeff")
+    writer.writerow(fields)
+    for rows in partitions:
+        for row in rows:
+            writer.writerow([_csv_value(value) for value in row])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _xlsx_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _xlsx_chunks(fields, partitions):
+    # write_only-книга пишет строки на диск, поэтому память не растет с числом строк
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("export")
+    sheet.append(fields)
+    for rows in partitions:
+        for row in rows:
+            sheet.append([_xlsx_value(value) for value in row])
+
+    with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as temp_file:
+        temp_file_path = temp_file.name
+    try:
+        workbook.save(temp_file_path)
+        with open(temp_file_path, "rb") as file:
+            while chunk := file.read(64 * 1024):
+                yield chunk
+    finally:
+        os.unlink(temp_file_path)
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+@router.get("/{entity}", summary="Потоковая выгрузка таблицы (NDJSON, CSV, XLSX)")
+def export_entity(
+        request: Request,
+        entity: str,
+        format: str = Query("ndjson", pattern="^(ndjson|csv|xlsx)$"),
+        restaurant_id: Optional[int] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        gzip: bool = False
+):
+    """
+    Выгрузка всей таблицы или ее части (по ресторану и периоду) потоком,
+    без загрузки всех строк в память
+    """
+    if entity not in EXPORT_ENTITIES:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Неизвестная сущность. Доступные: {', '.join(EXPORT_ENTITIES)}"
+        )
+
+    model, schema, date_column = EXPORT_ENTITIES[entity]
+    fields = schema_fields(schema)
+
+    filters = {}
+    if restaurant_id is not None:
+        if not hasattr(model, "restaurant_id"):
+            raise HTTPException(status_code=400, detail="Фильтр restaurant_id не поддерживается для этой сущности")
+        filters["restaurant_id"] = restaurant_id
+
+    # Для столбцов DateTime граница периода включает весь день date_to
+    if date_to is not None and model.__table__.c[date_column].type.python_type is datetime:
+        date_to = datetime.combine(date_to, time.max)
+
+    partitions = _stream_partitions(read_session_factory(request), model, fields, filters,
+                                    date_column, date_from, date_to)
+    chunks = {"ndjson": _ndjson_chunks, "csv": _csv_chunks, "xlsx": _xlsx_chunks}[format](fields, partitions)
+
+    headers = {"Content-Disposition": f'attachment; filename="{entity}.{format}"'}
+    if gzip:
+        chunks = _gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format], headers=headers)
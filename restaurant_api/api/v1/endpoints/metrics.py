@@ -0,0 +1,42 @@
+from fastapi import APIRouter
+
+import order_writer
+from order_events import order_event_bus
+from database import engine, replica_engine, async_engine, async_replica_engine
+from pool_metrics import pool_status
+
+router = APIRouter(prefix="/metrics", tags=["Метрики (metrics)"])
+
+
+@router.get("/pool", summary="Состояние пулов соединений с БД")
+def read_pool_metrics():
+
+    pools = {"primary": pool_status(engine)}
+
+    if replica_engine is not None:
+        pools["replica"] = pool_status(replica_engine)
+
+    if async_engine is not None:
+        pools["async"] = pool_status(async_engine.sync_engine)
+
+    if async_replica_engine is not None:
+        pools["async_replica"] = pool_status(async_replica_engine.sync_engine)
+
+    return pools
+
+
+@router.get("/order-writer", summary="Групповая фиксация заказов: задержка и пропускная способность")
+def read_order_writer_metrics():
+
+    return {
+        "enabled": order_writer.ENABLED,
+        "batch_size": order_writer.writer.batch_size,
+        "batch_delay_ms": order_writer.writer.batch_delay * 1000,
+        **order_writer.writer.stats.snapshot(),
+    }
+
+
+@router.get("/order-events", summary="Шина событий по заказам: история и подписчики")
+def read_order_event_metrics():
+
+    return order_event_bus.stats()
\ No newline at end of file
@@ -1,13 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import date
+from typing import List, Optional
 
 import crud
+import models
 import schemas
 from database import SessionLocal
+from serialization import FAST_SERIALIZATION, schema_fields, rows_json_response, row_json_response
+from api.v1.dependencies import get_read_db, parse_ids, parse_fields
+from cache import cached_entity_response, cached_json_response, current_menu_cache, primary_session
 
 router = APIRouter(prefix="/restaurants", tags=["Рестораны (restaurants)"])
 
+restaurant_fields = schema_fields(schemas.Restaurant)
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -21,23 +28,86 @@ def create_restaurant(restaurant: schemas.RestaurantCreate, db: Session = Depend
 
     return crud.create_restaurant(db=db, restaurant=restaurant)
 
+@router.get("/batch", response_model=schemas.BatchResult[schemas.Restaurant])
+def read_restaurants_batch(ids: str, db: Session = Depends(get_read_db)):
+
+    return crud.get_by_ids(db, models.Restaurant, parse_ids(ids))
+
+@router.post("/batch", response_model=schemas.BatchResult[schemas.Restaurant])
+def read_restaurants_batch_by_body(batch: schemas.BatchIds, db: Session = Depends(get_read_db)):
+
+    return crud.get_by_ids(db, models.Restaurant, list(dict.fromkeys(batch.ids)))
+
 @router.get("/{restaurant_id}", response_model=schemas.Restaurant)
-def read_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
+def read_restaurant(restaurant_id: int, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
 
-    db_restaurant = crud.get_restaurant(db, restaurant_id=restaurant_id)
+    if fields:
+        selected = parse_fields(fields, restaurant_fields)
+        row = crud.get_row(db, models.Restaurant, selected, restaurant_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Ресторан не найден")
+        return row_json_response(selected, row)
 
-    if db_restaurant is None:
+    response = cached_entity_response(
+        "restaurant", restaurant_id, db,
+        lambda session: crud.get_restaurant(session, restaurant_id=restaurant_id), schemas.Restaurant
+    )
+
+    if response is None:
         raise HTTPException(status_code=404, detail="Ресторан не найден")
 
-    return db_restaurant
+    return response
 
 @router.get("/", response_model=List[schemas.Restaurant])
-def read_restaurant(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_restaurant(skip: int = 0, limit: int = 100, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+
+    if fields or FAST_SERIALIZATION:
+        selected = parse_fields(fields, restaurant_fields)
+        rows = crud.get_rows(db, models.Restaurant, selected, skip=skip, limit=limit)
+        return rows_json_response(selected, rows)
 
     restaurant = crud.get_restaurants(db, skip=skip, limit=limit)
 
     return restaurant
 
+@router.get("/{restaurant_id}/menu-tree", response_model=schemas.RestaurantMenuTree)
+def read_restaurant_menu_tree(restaurant_id: int, db: Session = Depends(get_read_db)):
+
+    db_restaurant = crud.get_restaurant_menu_tree(db, restaurant_id=restaurant_id)
+
+    if db_restaurant is None:
+        raise HTTPException(status_code=404, detail="Ресторан не найден")
+
+    return db_restaurant
+
+@router.get("/{restaurant_id}/current-menu", response_model=schemas.CurrentMenu)
+def read_restaurant_current_menu(
+        restaurant_id: int,
+        request: Request,
+        at: Optional[date] = None,
+        db: Session = Depends(get_read_db)
+):
+    """
+    Действующие на дату at (по умолчанию сегодня) меню ресторана с доступными блюдами.
+    Ответ кэшируется по ресторану и дню до изменения меню или блюд;
+    при промахе кэш заполняется из основной БД
+    """
+    at = at or date.today()
+
+    def load():
+        with primary_session(db) as primary_db:
+            if crud.get_restaurant(primary_db, restaurant_id=restaurant_id) is None:
+                raise HTTPException(status_code=404, detail="Ресторан не найден")
+            menus = crud.get_current_menus(primary_db, restaurant_id=restaurant_id, at=at)
+        return {"restaurant_id": restaurant_id, "at": at, "menus": menus}
+
+    return cached_json_response(request, current_menu_cache, (restaurant_id, at), load, schemas.CurrentMenu)
+
+@router.get("/{restaurant_id}/employees", response_model=List[schemas.Employee])
+def read_restaurant_employees(restaurant_id: int, db: Session = Depends(get_read_db)):
+
+    return crud.get_restaurant_employees(db, restaurant_id=restaurant_id)
+
 @router.put("/{restaurant_id}", response_model=schemas.Restaurant)
 def update_restaurant(restaurant_id: int, restaurant: schemas.RestaurantCreate, db: Session = Depends(get_db)):
 
@@ -48,6 +118,16 @@ def update_restaurant(restaurant_id: int, restaurant: schemas.RestaurantCreate,
 
     return crud.update_restaurant(db=db, restaurant_id=restaurant_id, restaurant=restaurant)
 
+@router.patch("/{restaurant_id}", response_model=schemas.Restaurant)
+def patch_restaurant(restaurant_id: int, restaurant: schemas.RestaurantUpdate, db: Session = Depends(get_db)):
+
+    db_restaurant = crud.patch_restaurant(db, restaurant_id=restaurant_id, restaurant=restaurant)
+
+    if db_restaurant is None:
+        raise HTTPException(status_code=404, detail="Ресторан не найден")
+
+    return db_restaurant
+
 @router.delete("/{restaurant_id}", response_model=schemas.Restaurant)
 def delete_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
 
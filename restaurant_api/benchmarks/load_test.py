@@ -0,0 +1,325 @@
+"""
+Нагрузочный тест HTTP API: запускает main.app (uvicorn) на заполненной
+тестовыми данными SQLite и выполняет смешанную нагрузку:
+чтение меню, создание заказов, смена статусов, постраничные списки, ETL-загрузки.
+Результат - JSON с пропускной способностью и p50/p95/p99 по маршрутам.
+
+Нагрузка воспроизводима (--seed); переменные окружения передаются серверу,
+поэтому режимы можно сравнивать, например ORDER_WRITE_BEHIND=true.
+
+Запуск из каталога restaurant_api:
+    python benchmarks/load_test.py --duration 30 --concurrency 16 --output baseline.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+API = "/api/v1"
+ORDER_STATUSES = ("принят", "готовится", "готов", "подан")
+DEFAULT_MIX = "menu_read=45,list_page=20,order_create=20,status_update=14,etl_upload=1"
+
+
+def seed_database(url: str, args) -> dict:
+    """Создание схемы и тестовых данных; возвращает id, нужные сценариям нагрузки"""
+    os.environ['DATABASE_URL'] = url
+    from sqlalchemy import text
+
+    import models
+    import rollups
+    from database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(engine)
+    with engine.connect() as connection:
+        # WAL: чтения не ждут записи; режим сохраняется в файле БД
+        connection.execute(text("PRAGMA journal_mode=WAL"))
+
+    rng = random.Random(args.seed)
+    today = date.today()
+    db = SessionLocal()
+    try:
+        db.add(models.DictionaryRestaurantType(code="cafe", name="Кафе"))
+        db.add(models.DictionaryEmployeePosition(code="waiter", name="Официант",
+                                                 salary_min=Decimal(40000), salary_max=Decimal(60000)))
+        db.flush()
+
+        restaurants, dishes, employees = [], {}, {}
+        for index in range(args.restaurants):
+            restaurant = models.Restaurant(name=f"Ресторан {index + 1}", address=f"ул. Тестовая, {index + 1}",
+                                           opening_date=today - timedelta(days=365), seats_count=60,
+                                           restaurant_type_id=1)
+            db.add(restaurant)
+            db.flush()
+            restaurants.append(restaurant.id)
+
+            staff = [models.Employee(first_name=f"Имя{n}", last_name=f"Фамилия{n}", hire_date=today, position_id=1,
+                                     restaurant_id=restaurant.id, salary=Decimal(50000)) for n in range(3)]
+            current = models.Menu(restaurant_id=restaurant.id, name="Основное меню", season="весна",
+                                  start_date=today - timedelta(days=30), end_date=today + timedelta(days=60))
+            expired = models.Menu(restaurant_id=restaurant.id, name="Прошлое меню", season="зима",
+                                  start_date=today - timedelta(days=200), end_date=today - timedelta(days=31))
+            db.add_all(staff + [current, expired])
+            db.flush()
+            employees[restaurant.id] = [employee.id for employee in staff]
+
+            menu_dishes = [
+                models.Dish(menu_id=menu.id, name=f"Блюдо {menu.id}-{n}", category=rng.choice(("Супы", "Салаты", "Горячее")),
+                            price=Decimal(rng.randint(150, 1500)), weight_grams=300, is_available=rng.random() > 0.1,
+                            description="Тестовое блюдо", ingredients="картофель, сливки, курица, мука")
+                for menu in (current, expired) for n in range(args.dishes_per_menu)
+            ]
+            db.add_all(menu_dishes)
+            db.flush()
+            dishes[restaurant.id] = [(dish.id, dish.price) for dish in menu_dishes]
+
+        now = datetime.utcnow()
+        orders = []
+        for _ in range(args.orders):
+            restaurant_id = rng.choice(restaurants)
+            dish_id, price = rng.choice(dishes[restaurant_id])
+            quantity = rng.randint(1, 3)
+            orders.append(models.CustomerOrder(
+                restaurant_id=restaurant_id, table_number=str(rng.randint(1, 30)), dish_id=dish_id,
+                quantity=quantity, total_amount=price * quantity, order_status=rng.choice(ORDER_STATUSES),
+                order_time=now - timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+                employee_id=rng.choice(employees[restaurant_id]),
+            ))
+        db.add_all(orders)
+        db.commit()
+        order_ids = [order_id for (order_id,) in db.query(models.CustomerOrder.id).all()]
+        menus = {restaurant_id: [menu_id for (menu_id,) in db.query(models.Menu.id).filter(
+            models.Menu.restaurant_id == restaurant_id).all()] for restaurant_id in restaurants}
+
+        rollups.rebuild(db)
+    finally:
+        db.close()
+
+    return {'restaurants': restaurants, 'menus': menus, 'dishes': dishes, 'employees': employees,
+            'order_ids': order_ids}
+
+
+class Workload:
+    """Сценарии нагрузки; каждый возвращает (маршрут, метод, путь, тело, заголовки)"""
+
+    def __init__(self, data: dict, etl_rows: int):
+        self.data = data
+        self.etl_rows = etl_rows
+        self.order_ids = list(data['order_ids'])
+
+    def menu_read(self, rng):
+        restaurant_id = rng.choice(self.data['restaurants'])
+        choice = rng.random()
+        if choice < 0.5:
+            return ("GET /restaurants/{id}/current-menu", "GET", f"{API}/restaurants/{restaurant_id}/current-menu",
+                    None, {})
+        if choice < 0.8:
+            menu_id = rng.choice(self.data['menus'][restaurant_id])
+            return "GET /menu/{id}/dishes", "GET", f"{API}/menu/{menu_id}/dishes", None, {}
+        dish_id, _ = rng.choice(self.data['dishes'][restaurant_id])
+        return "GET /dishes/{id}", "GET", f"{API}/dishes/{dish_id}", None, {}
+
+    def list_page(self, rng):
+        if rng.random() < 0.6:
+            skip = rng.randrange(0, max(len(self.order_ids) - 50, 1))
+            return "GET /customer_order/", "GET", f"{API}/customer_order/?skip={skip}&limit=50", None, {}
+        skip = rng.randrange(0, 100)
+        return "GET /dishes/", "GET", f"{API}/dishes/?skip={skip}&limit=50", None, {}
+
+    def order_create(self, rng):
+        restaurant_id = rng.choice(self.data['restaurants'])
+        dish_id, price = rng.choice(self.data['dishes'][restaurant_id])
+        quantity = rng.randint(1, 3)
+        body = {
+            'restaurant_id': restaurant_id, 'table_number': str(rng.randint(1, 30)), 'dish_id': dish_id,
+            'quantity': quantity, 'total_amount': str(price * quantity),
+            'employee_id': rng.choice(self.data['employees'][restaurant_id]),
+        }
+        return ("POST /customer_order/", "POST", f"{API}/customer_order/", json.dumps(body).encode(),
+                {'Content-Type': 'application/json'})
+
+    def status_update(self, rng):
+        order_id = rng.choice(self.order_ids)
+        body = json.dumps({'order_status': rng.choice(ORDER_STATUSES)}, ensure_ascii=False).encode()
+        return ("PATCH /customer_order/{id}/status", "PATCH", f"{API}/customer_order/{order_id}/status", body,
+                {'Content-Type': 'application/json'})
+
+    def etl_upload(self, rng):
+        lines = ["name,address,phone,email,opening_date,seats_count,restaurant_type_id,is_active"]
+        for _ in range(self.etl_rows):
+            number = rng.randint(1, 10 ** 6)
+            lines.append(f"Загруженный ресторан {number},ул. Загрузочная {number},+79160000000,"
+                         f"r{number}@example.com,2024-01-15,{rng.randint(20, 200)},1,true")
+        boundary = uuid.uuid4().hex
+        body = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="restaurants.csv"\r\n'
+            f'Content-Type: text/csv\r\n\r\n'.encode() + "\n".join(lines).encode() + f'\r\n--{boundary}--\r\n'.encode()
+        )
+        return ("POST /etl/upload-file", "POST", f"{API}/etl/upload-file", body,
+                {'Content-Type': f'multipart/form-data; boundary={boundary}'})
+
+    def remember_order(self, response_body: bytes):
+        try:
+            self.order_ids.append(json.loads(response_body)['id'])
+        except (ValueError, KeyError, TypeError):
+            pass
+
+
+def parse_mix(mix: str) -> list:
+    scenarios = []
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        if not hasattr(Workload, name.strip()):
+            raise SystemExit(f"Неизвестный сценарий: {name}")
+        scenarios.append((name.strip(), float(weight)))
+    return scenarios
+
+
+def worker(index: int, args, workload: Workload, scenarios: list, deadline: float, results: list):
+    rng = random.Random(args.seed * 1000 + index)
+    names = [name for name, _ in scenarios]
+    weights = [weight for _, weight in scenarios]
+    connection = http.client.HTTPConnection("127.0.0.1", args.port, timeout=60)
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(names, weights)[0]
+        route, method, path, body, headers = getattr(workload, scenario)(rng)
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response_body = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", args.port, timeout=60)
+            status, response_body = 0, b""
+        results.append((route, status, time.perf_counter() - start))
+        if scenario == "order_create" and status == 201:
+            workload.remember_order(response_body)
+    connection.close()
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    index = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarize(results: list, duration: float) -> dict:
+    by_route = {}
+    for route, status, latency in results:
+        by_route.setdefault(route, []).append((status, latency))
+
+    def stats(samples):
+        latencies = sorted(latency for _, latency in samples)
+        errors = sum(1 for status, _ in samples if status == 0 or status >= 400)
+        return {
+            'requests': len(samples),
+            'errors': errors,
+            'throughput_rps': round(len(samples) / duration, 2),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'max_ms': round(latencies[-1] * 1000, 2),
+        }
+
+    return {
+        'total': stats([(status, latency) for _, status, latency in results]) if results else {},
+        'routes': {route: stats(samples) for route, samples in sorted(by_route.items())},
+    }
+
+
+def wait_for_server(port: int, server: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Сервер завершился с кодом {server.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/")
+            connection.getresponse().read()
+            connection.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit("Сервер не запустился")
+
+
+def run_phase(args, workload, scenarios, seconds: float) -> tuple:
+    results = []
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=worker, args=(index, args, workload, scenarios, deadline, results))
+               for index in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=30, help='длительность замера, секунд')
+    parser.add_argument('--warmup', type=float, default=3, help='прогрев без учета в результатах, секунд')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='веса сценариев: имя=вес,...')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--restaurants', type=int, default=10)
+    parser.add_argument('--dishes-per-menu', type=int, default=40)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--etl-rows', type=int, default=50)
+    parser.add_argument('--output', help='файл для JSON-результата')
+    args = parser.parse_args()
+    scenarios = parse_mix(args.mix)
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'load_test.db')}?timeout=30"
+        data = seed_database(url, args)
+        workload = Workload(data, args.etl_rows)
+
+        env = dict(os.environ, DATABASE_URL=url)
+        # main пишет logs/restaurants.log в текущий каталог: сервер запускается во временном,
+        # чтобы нагрузка не дописывала лог в рабочую копию
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'main:app', '--app-dir', APP_DIR,
+             '--host', '127.0.0.1', '--port', str(args.port), '--log-level', 'warning'],
+            cwd=directory, env=env
+        )
+        try:
+            wait_for_server(args.port, server)
+            if args.warmup > 0:
+                run_phase(args, workload, scenarios, args.warmup)
+            results, duration = run_phase(args, workload, scenarios, args.duration)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report = {
+        'config': {
+            'duration_s': args.duration, 'concurrency': args.concurrency, 'mix': args.mix, 'seed': args.seed,
+            'restaurants': args.restaurants, 'dishes_per_menu': args.dishes_per_menu, 'orders': args.orders,
+        },
+        'elapsed_s': round(duration, 2),
+        **summarize(results, duration),
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output)
+
+
+if __name__ == '__main__':
+    main()
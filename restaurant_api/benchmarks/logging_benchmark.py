@@ -0,0 +1,96 @@
+"""
+Накладные расходы логирования на один запрос (время в потоке запроса).
+
+before: синхронный RotatingFileHandler, f-строки, два сообщения INFO на вызов crud
+after:  QueueHandler + фоновая запись (QueueListener), JSON, %-форматирование,
+        сообщение о начале операции на уровне DEBUG (отключен), результат - INFO
+after_read: то же для чтения - только сообщение DEBUG, которое не форматируется
+
+Запуск из каталога restaurant_api:
+    python benchmarks/logging_benchmark.py --requests 20000
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import tempfile
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_formatting import JsonFormatter
+
+
+def file_handler(directory: str, name: str, formatter) -> RotatingFileHandler:
+    handler = RotatingFileHandler(os.path.join(directory, name), maxBytes=1024 * 1024 * 5, backupCount=5)
+    handler.setFormatter(formatter)
+    return handler
+
+
+def make_logger(name: str, handler, level=logging.INFO) -> logging.Logger:
+    logger = logging.getLogger(f"benchmark.{name}")
+    logger.handlers.clear()
+    logger.setLevel(level)
+    logger.addHandler(handler)
+    logger.propagate = False
+    return logger
+
+
+def before_request(logger, dish_id):
+    logger.info(f"Обновление блюда с ID: {dish_id}")
+    logger.info(f"Обновлено блюдо с ID: {dish_id}")
+
+
+def after_request(logger, dish_id):
+    logger.debug("Обновление блюда с ID: %s", dish_id)
+    logger.info("Обновлено блюдо с ID: %s", dish_id)
+
+
+def after_read_request(logger, dish_id):
+    logger.debug("Получение блюда по ID: %s", dish_id)
+
+
+def measure(request, logger, requests: int) -> float:
+    start = time.perf_counter()
+    for dish_id in range(requests):
+        request(logger, dish_id)
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        text_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        sync_handler = file_handler(directory, 'before.log', text_formatter)
+        before = measure(before_request, make_logger('before', sync_handler), args.requests)
+        sync_handler.close()
+
+        results = {}
+        for name, request in (('after', after_request), ('after_read', after_read_request)):
+            log_queue = queue.SimpleQueue()
+            listener = QueueListener(log_queue, file_handler(directory, f'{name}.log', JsonFormatter()),
+                                     respect_handler_level=True)
+            listener.start()
+            results[name] = measure(request, make_logger(name, QueueHandler(log_queue)), args.requests)
+            # Дожидаемся записи очереди, чтобы фоновый поток не мешал следующему замеру
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+
+    print(json.dumps({
+        'requests': args.requests,
+        'before_us': round(before * 1e6, 2),
+        'after_us': round(results['after'] * 1e6, 2),
+        'after_read_us': round(results['after_read'] * 1e6, 2),
+        'speedup': round(before / results['after'], 2) if results['after'] else None,
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Накладные расходы RequestMetricsMiddleware на один запрос.
+
+Минимальное ASGI-приложение (сразу отвечает 200) вызывается напрямую,
+без сети и маршрутизации, с middleware и без него; разница времени
+на запрос - стоимость подсчета метрик. Серии чередуются, берется медиана.
+
+Запуск из каталога restaurant_api:
+    python benchmarks/request_metrics_benchmark.py --requests 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from request_metrics import RequestMetrics, RequestMetricsMiddleware
+
+
+class _Route:
+    path = "/api/v1/dishes/{dish_id}"
+
+
+async def app(scope, receive, send):
+    # Маршрутизатор FastAPI кладет найденный маршрут в scope
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def measure(application, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "method": "GET", "path": "/api/v1/dishes/1"}
+        await application(scope, receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+async def run(requests: int, rounds: int) -> dict:
+    metrics = RequestMetrics()
+    wrapped = RequestMetricsMiddleware(app, metrics)
+    # Прогрев
+    await measure(app, 1000)
+    await measure(wrapped, 1000)
+
+    bare, with_metrics = [], []
+    for _ in range(rounds):
+        bare.append(await measure(app, requests))
+        with_metrics.append(await measure(wrapped, requests))
+
+    bare_us = statistics.median(bare) * 1e6
+    with_metrics_us = statistics.median(with_metrics) * 1e6
+    return {
+        'requests': requests,
+        'rounds': rounds,
+        'bare_us': round(bare_us, 2),
+        'with_metrics_us': round(with_metrics_us, 2),
+        'overhead_us': round(with_metrics_us - bare_us, 2),
+        'recorded': sum(metrics.requests.values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=100000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args.requests, args.rounds)), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
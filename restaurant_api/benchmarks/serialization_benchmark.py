@@ -0,0 +1,94 @@
+"""
+Сравнение сериализации списка заказов:
+стандартный путь FastAPI (ORM-объекты -> Pydantic -> jsonable_encoder -> json)
+и быстрый путь (кортежи строк -> orjson).
+
+Запуск из каталога restaurant_api:
+    python benchmarks/serialization_benchmark.py --rows 1000 --repeat 50
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+import schemas
+from serialization import schema_fields, dumps
+
+
+def make_rows(count: int):
+    fields = schema_fields(schemas.CustomerOrder)
+    start = datetime(2025, 1, 1, 12, 0, 0)
+    rows = []
+    for i in range(count):
+        values = {
+            'id': i + 1,
+            'table_number': str(i % 40 + 1),
+            'customer_name': f'Клиент {i}',
+            'customer_phone': '+79160000000',
+            'dish_id': i % 300 + 1,
+            'quantity': i % 4 + 1,
+            'total_amount': Decimal('450.50') * (i % 4 + 1),
+            'order_status': 'принят',
+            'payment_method': 'наличные',
+            'restaurant_id': i % 10 + 1,
+            'employee_id': i % 25 + 1,
+            'order_time': start + timedelta(minutes=i),
+        }
+        rows.append(tuple(values[field] for field in fields))
+    return fields, rows
+
+
+def standard_path(fields, rows):
+    # Эмуляция response_model=List[schemas.CustomerOrder] для ORM-объектов
+    objects = [SimpleNamespace(**dict(zip(fields, row))) for row in rows]
+    adapter = TypeAdapter(List[schemas.CustomerOrder])
+    validated = adapter.validate_python(objects, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def fast_path(fields, rows):
+    return dumps([dict(zip(fields, row)) for row in rows])
+
+
+def measure(func, fields, rows, repeat: int) -> float:
+    func(fields, rows)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(fields, rows)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    fields, rows = make_rows(args.rows)
+
+    if json.loads(standard_path(fields, rows)) != json.loads(fast_path(fields, rows)):
+        print('ВНИМАНИЕ: результаты сериализации различаются')
+
+    standard = measure(standard_path, fields, rows, args.repeat)
+    fast = measure(fast_path, fields, rows, args.repeat)
+
+    print(json.dumps({
+        'rows': args.rows,
+        'standard_ms': round(standard * 1000, 3),
+        'fast_ms': round(fast * 1000, 3),
+        'speedup': round(standard / fast, 2) if fast else None,
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Время запуска приложения в трех режимах, каждый замер - отдельный процесс
+python, чтобы модули не брались из кэша sys.modules:
+
+eager:   etl_pipeline (pandas) импортируется при импорте main, как до
+         отложенной загрузки
+lazy:    ETL_PRELOAD=false - pandas загружается при первой загрузке файла
+preload: ETL_PRELOAD=true - pandas загружается в фоновом потоке после старта
+
+Для каждого режима: import_ms - импорт модулей, ready_ms - импорт и обработчики
+startup (приложение готово принимать запросы), pandas_at_ready - загружен ли
+pandas к этому моменту, first_upload_ms - сколько первая загрузка файла ждет
+импорта etl_pipeline (в режиме preload - после завершения фоновой загрузки).
+
+Запуск из каталога restaurant_api:
+    python benchmarks/startup_benchmark.py --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    'eager': {'ETL_PRELOAD': 'false', 'EAGER': True},
+    'lazy': {'ETL_PRELOAD': 'false', 'EAGER': False},
+    'preload': {'ETL_PRELOAD': 'true', 'EAGER': False},
+}
+
+MEASURE = """
+import asyncio, sys, threading, time
+start = time.perf_counter()
+if {eager}:
+    import etl_pipeline
+import main
+imported = time.perf_counter()
+asyncio.run(main.app.router.startup())
+ready = time.perf_counter()
+pandas_at_ready = 'pandas' in sys.modules
+for thread in threading.enumerate():
+    if thread.name == 'etl-preload':
+        thread.join()
+from api.v1.endpoints import etl
+upload_start = time.perf_counter()
+etl.load_etl_pipeline()
+first_upload = time.perf_counter() - upload_start
+print(imported - start, ready - start, first_upload, pandas_at_ready)
+"""
+
+
+def measure(mode: str, repeat: int) -> dict:
+    env = dict(os.environ)
+    # Движки создаются при импорте database; соединение при этом не открывается
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    env['ETL_PRELOAD'] = MODES[mode]['ETL_PRELOAD']
+    timings = {'import': [], 'ready': [], 'first_upload': []}
+    pandas_at_ready = False
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', MEASURE.format(eager=MODES[mode]['EAGER'])],
+            cwd=APP_DIR, env=env, capture_output=True, text=True, check=True
+        ).stdout.split()
+        for name, value in zip(timings, output):
+            timings[name].append(float(value))
+        pandas_at_ready = output[3] == 'True'
+    result = {f'{name}_ms': round(statistics.median(values) * 1000, 1) for name, values in timings.items()}
+    result['pandas_at_ready'] = pandas_at_ready
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = {'repeat': args.repeat}
+    results.update((mode, measure(mode, args.repeat)) for mode in MODES)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,343 @@
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+from contextlib import contextmanager
+from functools import lru_cache
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from database import primary_bind
+
+logger = logging.getLogger("restaurant_api")
+
+# Время жизни кэша справочников, секунд
+REFERENCE_CACHE_TTL = float(os.getenv('REFERENCE_CACHE_TTL', 300))
+
+# Кэш отдельных сущностей (блюда, меню, рестораны)
+ENTITY_CACHE_SIZE = int(os.getenv('ENTITY_CACHE_SIZE', 1024))
+ENTITY_CACHE_TTL = float(os.getenv('ENTITY_CACHE_TTL', 60))
+ENTITY_CACHE_BACKEND = os.getenv('ENTITY_CACHE_BACKEND', 'memory')
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+# Размер пачки SCAN/UNLINK при сбросе кэша в Redis
+REDIS_CLEAR_BATCH = int(os.getenv('REDIS_CLEAR_BATCH', 1000))
+
+# Хранилище именованных кэшей ответов: memory - свое у каждого процесса,
+# redis - общее, сброс после записи виден всем воркерам
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', ENTITY_CACHE_BACKEND)
+
+# Кэши ниже сбрасываются при записи только в своем процессе, если хранилище не общее,
+# поэтому без Redis их TTL по умолчанию короткий: другие воркеры отстают не дольше TTL
+_SHARED = CACHE_BACKEND == 'redis'
+
+# Кэш текущего меню ресторана (ресторан × день); сбрасывается при изменении меню и блюд
+CURRENT_MENU_CACHE_TTL = float(os.getenv('CURRENT_MENU_CACHE_TTL', 3600 if _SHARED else 30))
+
+# Кэш сводок по расчетам с поставщиками; сбрасывается при изменении поставок (0 - без кэша)
+PAYABLES_CACHE_TTL = float(os.getenv('PAYABLES_CACHE_TTL', 300 if _SHARED else 30))
+
+
+def _etag(body: bytes) -> str:
+    return '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class CacheEntry:
+    __slots__ = ('body', 'etag', 'expires_at')
+
+    def __init__(self, body: bytes, etag: str, expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+
+
+# Кэш готовых JSON-ответов с TTL
+class TTLCache:
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self.hits += 1
+                return entry
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, body: bytes) -> CacheEntry:
+        entry = CacheEntry(body, _etag(body), time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+        logger.debug("Сброс кэша '%s', ключ %s", self.name, key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'ttl': self.ttl, 'hits': self.hits, 'misses': self.misses}
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str, ttl: float = REFERENCE_CACHE_TTL):
+    """Именованный кэш (создается при первом обращении) в хранилище CACHE_BACKEND"""
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = RedisTTLCache(name, ttl) if _SHARED else TTLCache(name, ttl)
+        return _caches[name]
+
+
+def invalidate(name: str, key=None):
+    if name == 'entities':
+        entity_cache.invalidate()
+        return
+    cache = _caches.get(name)
+    if cache is not None:
+        cache.invalidate(key)
+
+
+def caches_stats() -> dict:
+    stats = {name: cache.stats() for name, cache in list(_caches.items())}
+    stats['entities'] = entity_cache.stats()
+    return stats
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_model) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+
+def cached_json_response(request: Request, cache: TTLCache, key, loader, response_model) -> Response:
+    """
+    Ответ из кэша с поддержкой ETag/If-None-Match.
+    loader вызывается только при промахе, поэтому при попадании БД не затрагивается.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        adapter = _adapter(response_model)
+        data = adapter.validate_python(loader(), from_attributes=True)
+        entry = cache.set(key, adapter.dump_json(data))
+
+    headers = {'ETag': entry.etag, 'Cache-Control': 'no-cache'}
+    if _etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type='application/json', headers=headers)
+
+
+# Хранилище в памяти процесса: LRU с ограничением размера и TTL
+class LRUCacheBackend:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self, prefix: str = ''):
+        with self._lock:
+            if not prefix:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+# Общее хранилище в Redis: все воркеры видят одни и те же записи и сбросы
+class RedisCacheBackend:
+    def __init__(self, url: str, ttl: float, prefix: str = 'restaurant_api:entity:'):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.evictions = 0
+
+    def get(self, key: str):
+        return self._client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes):
+        self._client.set(self.prefix + key, value, ex=max(int(self.ttl), 1))
+
+    def delete(self, key: str):
+        self._client.delete(self.prefix + key)
+
+    def clear(self, prefix: str = ''):
+        # Ключи удаляются пачками: одна команда UNLINK (освобождение памяти в фоне) на пачку SCAN
+        batch = []
+        for key in self._client.scan_iter(match=self.prefix + prefix + '*', count=REDIS_CLEAR_BATCH):
+            batch.append(key)
+            if len(batch) >= REDIS_CLEAR_BATCH:
+                self._client.unlink(*batch)
+                batch.clear()
+        if batch:
+            self._client.unlink(*batch)
+
+    def size(self) -> int:
+        return sum(1 for _ in self._client.scan_iter(match=self.prefix + '*'))
+
+
+# Read-through кэш сущностей по ключу "сущность:id"
+class EntityCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_or_load(self, entity: str, entity_id: int, loader, schema):
+        key = f"{entity}:{entity_id}"
+        body = self.backend.get(key)
+        if body is not None:
+            self.hits += 1
+            return body
+        self.misses += 1
+        db_entity = loader()
+        if db_entity is None:
+            return None
+        body = schema.model_validate(db_entity, from_attributes=True).model_dump_json().encode()
+        self.backend.set(key, body)
+        return body
+
+    def invalidate(self, entity: str = None, entity_id: int = None):
+        """Сброс одной записи, всех записей сущности (entity_id=None) или всего кэша (entity=None)"""
+        self.invalidations += 1
+        if entity is None:
+            self.backend.clear()
+        elif entity_id is None:
+            self.backend.clear(f"{entity}:")
+        else:
+            self.backend.delete(f"{entity}:{entity_id}")
+
+    def stats(self) -> dict:
+        return {
+            'backend': type(self.backend).__name__,
+            'entries': self.backend.size(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.backend.evictions,
+            'invalidations': self.invalidations,
+        }
+
+
+def _create_entity_backend():
+    if ENTITY_CACHE_BACKEND == 'redis':
+        return RedisCacheBackend(REDIS_URL, ENTITY_CACHE_TTL)
+    return LRUCacheBackend(ENTITY_CACHE_SIZE, ENTITY_CACHE_TTL)
+
+
+entity_cache = EntityCache(_create_entity_backend())
+
+
+# Именованный кэш ответов в Redis (тот же интерфейс, что у TTLCache)
+class RedisTTLCache:
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self.backend = RedisCacheBackend(REDIS_URL, ttl, prefix=f'restaurant_api:{name}:')
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        body = self.backend.get(repr(key))
+        if body is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CacheEntry(body, _etag(body), 0)
+
+    def set(self, key, body: bytes) -> CacheEntry:
+        self.backend.set(repr(key), body)
+        return CacheEntry(body, _etag(body), 0)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self.backend.clear()
+        else:
+            self.backend.delete(repr(key))
+        logger.debug("Сброс кэша '%s', ключ %s", self.name, key)
+
+    def stats(self) -> dict:
+        return {'entries': self.backend.size(), 'ttl': self.ttl, 'hits': self.hits, 'misses': self.misses}
+
+
+current_menu_cache = get_cache('current_menu', CURRENT_MENU_CACHE_TTL)
+payables_cache = get_cache('payables', PAYABLES_CACHE_TTL)
+
+
+@contextmanager
+def primary_session(db):
+    """
+    Сессия основной БД для заполнения кэша при промахе (db, если она уже на основной):
+    строка с отстающей реплики могла бы вернуть в кэш значение, которое запись только что сбросила.
+    """
+    bind = primary_bind(db)
+    if bind is None:
+        yield db
+        return
+    with Session(bind=bind) as primary_db:
+        yield primary_db
+
+
+def cached_entity_response(entity: str, entity_id: int, db, loader, schema):
+    """
+    Ответ с сущностью из кэша; None, если сущность не найдена.
+    При промахе loader(session) читает основную БД (primary_session).
+    """
+    with primary_session(db) as primary_db:
+        body = entity_cache.get_or_load(entity, entity_id, lambda: loader(primary_db), schema)
+    if body is None:
+        return None
+    return Response(content=body, media_type='application/json')
@@ -1,346 +1,774 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session, selectinload
 import models
 import schemas
 import logging
+from datetime import date
+from cache import entity_cache, current_menu_cache, payables_cache
+import rollups
+import ingredients
+import order_events
+from dish_search import dish_search_index
 
 
 logger = logging.getLogger("restaurant_api")
 
 
+def _patch_entity(db: Session, model, entity_id: int, values: dict, before_commit=None):
+    """Частичное обновление: UPDATE только по переданным столбцам"""
+    if values:
+        updated = db.query(model).filter(model.id == entity_id).update(values, synchronize_session=False)
+        if updated and before_commit is not None:
+            before_commit()
+        db.commit()
+        if not updated:
+            return None
+    # populate_existing: объект мог остаться в сессии без истечения (AsyncSession, expire_on_commit=False)
+    return db.query(model).filter(model.id == entity_id).populate_existing().first()
+
+
+def get_rows(db: Session, model, fields: list, skip: int = 0, limit: int = 100):
+    """Список строк (кортежей) только с нужными столбцами, без создания ORM-объектов"""
+    logger.debug("Получение строк %s, пропуск=%s, лимит=%s", model.__tablename__, skip, limit)
+    columns = [getattr(model, field) for field in fields]
+    return db.execute(select(*columns).order_by(model.id).offset(skip).limit(limit)).all()
+
+
+def get_row(db: Session, model, fields: list, entity_id: int):
+    """Одна строка только с нужными столбцами"""
+    logger.debug("Получение строки %s по ID: %s, поля: %s", model.__tablename__, entity_id, fields)
+    columns = [getattr(model, field) for field in fields]
+    return db.execute(select(*columns).where(model.id == entity_id)).first()
+
+
+# Размер порции id для WHERE id IN (...): SQL Server допускает не более 2100 параметров
+BATCH_CHUNK_SIZE = 500
+
+
+def get_by_ids(db: Session, model, ids: list):
+    """Сущности по списку id: один IN-запрос на порцию, отсутствующие id возвращаются отдельно"""
+    logger.debug("Пакетное получение %s, количество id: %s", model.__tablename__, len(ids))
+    found = {}
+    for start in range(0, len(ids), BATCH_CHUNK_SIZE):
+        chunk = ids[start:start + BATCH_CHUNK_SIZE]
+        for db_entity in db.query(model).filter(model.id.in_(chunk)).all():
+            found[db_entity.id] = db_entity
+    return {
+        "items": [found[entity_id] for entity_id in ids if entity_id in found],
+        "missing": [entity_id for entity_id in ids if entity_id not in found],
+    }
+
+
+def stream_rows(db: Session, model, fields: list, filters: dict = None, date_column: str = None,
+                date_from=None, date_to=None, chunk_size: int = 1000):
+    """Потоковое чтение таблицы серверным курсором: порции строк по chunk_size"""
+    logger.debug("Потоковая выгрузка %s, фильтры=%s, период=%s..%s", model.__tablename__, filters, date_from, date_to)
+    columns = [getattr(model, field) for field in fields]
+    query = select(*columns).order_by(model.id)
+    for name, value in (filters or {}).items():
+        query = query.where(getattr(model, name) == value)
+    if date_column and date_from is not None:
+        query = query.where(getattr(model, date_column) >= date_from)
+    if date_column and date_to is not None:
+        query = query.where(getattr(model, date_column) <= date_to)
+    result = db.execute(query.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield partition
+
+
 # RestaurantType CRUD
 def get_restaurant_type(db: Session, skip: int = 0, limit: int = 100):
-    logger.info(f"Получение списка ресторанов, пропуск={skip}, лимит={limit}")
+    logger.debug("Получение списка ресторанов, пропуск=%s, лимит=%s", skip, limit)
     return db.query(models.DictionaryRestaurantType).order_by(models.DictionaryRestaurantType.id).offset(skip).limit(limit).all()
 
 # EmployeePosition CRUD
 def get_employee_position(db: Session, skip: int = 0, limit: int = 100):
-    logger.info(f"Получение должности сотрудника, пропуск={skip}, лимит={limit}")
+    logger.debug("Получение должности сотрудника, пропуск=%s, лимит=%s", skip, limit)
     return db.query(models.DictionaryEmployeePosition).order_by(models.DictionaryEmployeePosition.id).offset(skip).limit(limit).all()
 
 # Restaurant CRUD
 def get_restaurant(db: Session, restaurant_id: int):
-    logger.info(f"Получение ресторана по ID: {restaurant_id}")
+    logger.debug("Получение ресторана по ID: %s", restaurant_id)
     return db.query(models.Restaurant).filter(models.Restaurant.id == restaurant_id).first()
 
 
 def get_restaurants(db: Session, skip: int = 0, limit: int = 100):
-    logger.info(f"Получение списка ресторанов, пропуск={skip}, лимит={limit}")
+    logger.debug("Получение списка ресторанов, пропуск=%s, лимит=%s", skip, limit)
     return db.query(models.Restaurant).order_by(models.Restaurant.id).offset(skip).limit(limit).all()
 
 
 def create_restaurant(db: Session, restaurant: schemas.RestaurantCreate):
-    logger.info(f"Создание ресторана: {restaurant.name}")
+    logger.debug("Создание ресторана: %s", restaurant.name)
     db_restaurant = models.Restaurant(**restaurant.dict())
     db.add(db_restaurant)
     db.commit()
     db.refresh(db_restaurant)
-    logger.info(f"Создан ресторан с ID: {db_restaurant.id}")
+    logger.info("Создан ресторан с ID: %s", db_restaurant.id)
     return db_restaurant
 
 
 def update_restaurant(db: Session, restaurant_id: int, restaurant: schemas.RestaurantCreate):
-    logger.info(f"Обновление ресторана с ID: {restaurant_id}")
+    logger.debug("Обновление ресторана с ID: %s", restaurant_id)
     db_restaurant = db.query(models.Restaurant).filter(models.Restaurant.id == restaurant_id).first()
     if db_restaurant:
         for key, value in restaurant.dict().items():
             setattr(db_restaurant, key, value)
         db.commit()
+        entity_cache.invalidate("restaurant", restaurant_id)
         db.refresh(db_restaurant)
-        logger.info(f"Обновлен ресторан с ID: {restaurant_id}")
+        logger.info("Обновлен ресторан с ID: %s", restaurant_id)
+    else:
+        logger.warning("Ресторан с ID: %s не найден", restaurant_id)
+    return db_restaurant
+
+
+def patch_restaurant(db: Session, restaurant_id: int, restaurant: schemas.RestaurantUpdate):
+    logger.debug("Частичное обновление ресторана с ID: %s", restaurant_id)
+    db_restaurant = _patch_entity(db, models.Restaurant, restaurant_id, restaurant.dict(exclude_unset=True))
+    entity_cache.invalidate("restaurant", restaurant_id)
+    if db_restaurant:
+        logger.info("Частично обновлен ресторан с ID: %s", restaurant_id)
     else:
-        logger.warning(f"Ресторан с ID: {restaurant_id} не найден")
+        logger.warning("Ресторан с ID: %s не найден", restaurant_id)
     return db_restaurant
 
 
 def delete_restaurant(db: Session, restaurant_id: int):
-    logger.info(f"Удаление ресторана с ID: {restaurant_id}")
+    logger.debug("Удаление ресторана с ID: %s", restaurant_id)
     db_restaurant = db.query(models.Restaurant).filter(models.Restaurant.id == restaurant_id).first()
     if db_restaurant:
         db.delete(db_restaurant)
         db.commit()
-        logger.info(f"Удален ресторан с ID: {restaurant_id}")
+        entity_cache.invalidate("restaurant", restaurant_id)
+        logger.info("Удален ресторан с ID: %s", restaurant_id)
     else:
-        logger.warning(f"Ресторан с ID: {restaurant_id} не найден")
+        logger.warning("Ресторан с ID: %s не найден", restaurant_id)
     return db_restaurant
 
 
+def get_restaurant_menu_tree(db: Session, restaurant_id: int):
+    """Ресторан с меню и блюдами: 3 запроса независимо от числа меню и блюд"""
+    logger.debug("Получение дерева меню ресторана с ID: %s", restaurant_id)
+    return db.query(models.Restaurant).options(
+        selectinload(models.Restaurant.menus).selectinload(models.Menu.dishes)
+    ).filter(models.Restaurant.id == restaurant_id).first()
+
+
+def get_current_menus(db: Session, restaurant_id: int, at: date):
+    """
+    Меню, действующие у ресторана на дату at, с доступными блюдами:
+    2 запроса (меню по индексу ресторан + период, затем блюда меню)
+    """
+    logger.debug("Получение текущего меню ресторана с ID: %s на %s", restaurant_id, at)
+    menu = models.Menu
+    return db.query(menu).options(
+        selectinload(menu.dishes.and_(models.Dish.is_available == True))  # noqa: E712
+    ).filter(
+        menu.restaurant_id == restaurant_id,
+        # == True, а не IS: в SQL Server выражение IS 1 недопустимо
+        menu.is_active == True,  # noqa: E712
+        menu.start_date <= at,
+        or_(menu.end_date.is_(None), menu.end_date >= at)
+    ).order_by(menu.start_date, menu.id).all()
+
+
+def get_restaurant_employees(db: Session, restaurant_id: int):
+    logger.debug("Получение сотрудников ресторана с ID: %s", restaurant_id)
+    return db.query(models.Employee).filter(models.Employee.restaurant_id == restaurant_id).order_by(models.Employee.id).all()
+
+
 # Employee CRUD
 def get_employee(db: Session, employee_id: int):
-    logger.info(f"Получение сотрудника по ID: {employee_id}")
+    logger.debug("Получение сотрудника по ID: %s", employee_id)
     return db.query(models.Employee).filter(models.Employee.id == employee_id).first()
 
 
 def get_employees(db: Session, skip: int = 0, limit: int = 100):
-    logger.info(f"Получение списка сотрудников, пропуск={skip}, лимит={limit}")
+    logger.debug("Получение списка сотрудников, пропуск=%s, лимит=%s", skip, limit)
     return db.query(models.Employee).order_by(models.Employee.id).offset(skip).limit(limit).all()
 
 
 def create_employee(db: Session, employee: schemas.EmployeeCreate):
-    logger.info(f"Создание сотрудника: {employee.first_name} {employee.last_name}")
+    logger.debug("Создание сотрудника: %s %s", employee.first_name, employee.last_name)
     db_employee = models.Employee(**employee.dict())
     db.add(db_employee)
     db.commit()
     db.refresh(db_employee)
-    logger.info(f"Создан сотрудник с ID: {db_employee.id}")
+    logger.info("Создан сотрудник с ID: %s", db_employee.id)
     return db_employee
 
 
 def update_employee(db: Session, employee_id: int, employee: schemas.EmployeeCreate):
-    logger.info(f"Обновление сотрудника с ID: {employee_id}")
+    logger.debug("Обновление сотрудника с ID: %s", employee_id)
     db_employee = db.query(models.Employee).filter(models.Employee.id == employee_id).first()
     if db_employee:
         for key, value in employee.dict().items():
             setattr(db_employee, key, value)
         db.commit()
         db.refresh(db_employee)
-        logger.info(f"Обновлен сотрудник с ID: {employee_id}")
+        logger.info("Обновлен сотрудник с ID: %s", employee_id)
+    else:
+        logger.warning("Сотрудник с ID: %s не найден", employee_id)
+    return db_employee
+
+
+def patch_employee(db: Session, employee_id: int, employee: schemas.EmployeeUpdate):
+    logger.debug("Частичное обновление сотрудника с ID: %s", employee_id)
+    db_employee = _patch_entity(db, models.Employee, employee_id, employee.dict(exclude_unset=True))
+    if db_employee:
+        logger.info("Частично обновлен сотрудник с ID: %s", employee_id)
     else:
-        logger.warning(f"Сотрудник с ID: {employee_id} не найден")
+        logger.warning("Сотрудник с ID: %s не найден", employee_id)
     return db_employee
 
 
 def delete_employee(db: Session, employee_id: int):
-    logger.info(f"Удаление сотрудника с ID: {employee_id}")
+    logger.debug("Удаление сотрудника с ID: %s", employee_id)
     db_employee = db.query(models.Employee).filter(models.Employee.id == employee_id).first()
     if db_employee:
         db.delete(db_employee)
         db.commit()
-        logger.info(f"Удален сотрудник с ID: {employee_id}")
+        logger.info("Удален сотрудник с ID: %s", employee_id)
     else:
-        logger.warning(f"Сотрудник с ID: {employee_id} не найден")
+        logger.warning("Сотрудник с ID: %s не найден", employee_id)
     return db_employee
 
 
 # Menu CRUD
 def get_menu(db: Session, menu_id: int):
-    logger.info(f"Получение меню по ID: {menu_id}")
+    logger.debug("Получение меню по ID: %s", menu_id)
     return db.query(models.Menu).filter(models.Menu.id == menu_id).first()
 
 
 def get_menus(db: Session, skip: int = 0, limit: int = 100):
-    logger.info(f"Получение списка меню, пропуск={skip}, лимит={limit}")
+    logger.debug("Получение списка меню, пропуск=%s, лимит=%s", skip, limit)
     return db.query(models.Menu).order_by(models.Menu.id).offset(skip).limit(limit).all()
 
 
 def create_menu(db: Session, menu: schemas.MenuCreate):
-    logger.info(f"Создание меню: {menu.name}")
+    logger.debug("Создание меню: %s", menu.name)
     db_menu = models.Menu(**menu.dict())
     db.add(db_menu)
     db.commit()
     db.refresh(db_menu)
-    logger.info(f"Создано меню с ID: {db_menu.id}")
+    current_menu_cache.invalidate()
+    logger.info("Создано меню с ID: %s", db_menu.id)
     return db_menu
 
 
 def update_menu(db: Session, menu_id: int, menu: schemas.MenuCreate):
-    logger.info(f"Обновление меню с ID: {menu_id}")
+    logger.debug("Обновление меню с ID: %s", menu_id)
     db_menu = db.query(models.Menu).filter(models.Menu.id == menu_id).first()
     if db_menu:
         for key, value in menu.dict().items():
             setattr(db_menu, key, value)
         db.commit()
+        entity_cache.invalidate("menu", menu_id)
+        current_menu_cache.invalidate()
         db.refresh(db_menu)
-        logger.info(f"Обновлено меню с ID: {menu_id}")
+        logger.info("Обновлено меню с ID: %s", menu_id)
     else:
-        logger.warning(f"Меню с ID: {menu_id} не найдено")
+        logger.warning("Меню с ID: %s не найдено", menu_id)
+    return db_menu
+
+
+def patch_menu(db: Session, menu_id: int, menu: schemas.MenuUpdate):
+    logger.debug("Частичное обновление меню с ID: %s", menu_id)
+    db_menu = _patch_entity(db, models.Menu, menu_id, menu.dict(exclude_unset=True))
+    entity_cache.invalidate("menu", menu_id)
+    current_menu_cache.invalidate()
+    if db_menu:
+        logger.info("Частично обновлено меню с ID: %s", menu_id)
+    else:
+        logger.warning("Меню с ID: %s не найдено", menu_id)
     return db_menu
 
 
 def delete_menu(db: Session, menu_id: int):
-    logger.info(f"Удаление меню с ID: {menu_id}")
+    logger.debug("Удаление меню с ID: %s", menu_id)
     db_menu = db.query(models.Menu).filter(models.Menu.id == menu_id).first()
     if db_menu:
         db.delete(db_menu)
         db.commit()
-        logger.info(f"Удалено меню с ID: {menu_id}")
+        entity_cache.invalidate("menu", menu_id)
+        current_menu_cache.invalidate()
+        logger.info("Удалено меню с ID: %s", menu_id)
     else:
-        logger.warning(f"Меню с ID: {menu_id} не найдено")
+        logger.warning("Меню с ID: %s не найдено", menu_id)
     return db_menu
 
 
+def get_menu_with_dishes(db: Session, menu_id: int):
+    """Меню с блюдами: 2 запроса (меню + все его блюда через selectinload)"""
+    logger.debug("Получение меню с блюдами по ID: %s", menu_id)
+    return db.query(models.Menu).options(selectinload(models.Menu.dishes)).filter(models.Menu.id == menu_id).first()
+
+
 # Dish CRUD
 def get_dish(db: Session, dish_id: int):
-    logger.info(f"Получение блюда по ID: {dish_id}")
+    logger.debug("Получение блюда по ID: %s", dish_id)
     return db.query(models.Dish).filter(models.Dish.id == dish_id).first()
 
 
 def get_dishes(db: Session, skip: int = 0, limit: int = 100):
-    logger.info(f"Получение списка блюд, пропуск={skip}, лимит={limit}")
+    logger.debug("Получение списка блюд, пропуск=%s, лимит=%s", skip, limit)
     return db.query(models.Dish).order_by(models.Dish.id).offset(skip).limit(limit).all()
 
 
 def create_dish(db: Session, dish: schemas.DishCreate):
-    logger.info(f"Создание блюда: {dish.name}")
+    logger.debug("Создание блюда: %s", dish.name)
     db_dish = models.Dish(**dish.dict())
     db.add(db_dish)
+    db.flush()
+    ingredients.sync_dish(db, db_dish.id, db_dish.ingredients)
     db.commit()
     db.refresh(db_dish)
-    logger.info(f"Создано блюдо с ID: {db_dish.id}")
+    dish_search_index.update(db_dish)
+    current_menu_cache.invalidate()
+    logger.info("Создано блюдо с ID: %s", db_dish.id)
     return db_dish
 
 
 def update_dish(db: Session, dish_id: int, dish: schemas.DishCreate):
-    logger.info(f"Обновление блюда с ID: {dish_id}")
+    logger.debug("Обновление блюда с ID: %s", dish_id)
     db_dish = db.query(models.Dish).filter(models.Dish.id == dish_id).first()
     if db_dish:
         for key, value in dish.dict().items():
             setattr(db_dish, key, value)
+        ingredients.sync_dish(db, dish_id, db_dish.ingredients)
         db.commit()
+        entity_cache.invalidate("dish", dish_id)
+        current_menu_cache.invalidate()
         db.refresh(db_dish)
-        logger.info(f"Обновлено блюдо с ID: {dish_id}")
+        dish_search_index.update(db_dish)
+        logger.info("Обновлено блюдо с ID: %s", dish_id)
     else:
-        logger.warning(f"Блюдо с ID: {dish_id} не найдено")
+        logger.warning("Блюдо с ID: %s не найдено", dish_id)
+    return db_dish
+
+
+def patch_dish(db: Session, dish_id: int, dish: schemas.DishUpdate):
+    logger.debug("Частичное обновление блюда с ID: %s", dish_id)
+    values = dish.dict(exclude_unset=True)
+    before_commit = None
+    if 'ingredients' in values:
+        def before_commit():
+            ingredients.sync_dish(db, dish_id, values['ingredients'])
+
+    db_dish = _patch_entity(db, models.Dish, dish_id, values, before_commit=before_commit)
+    entity_cache.invalidate("dish", dish_id)
+    current_menu_cache.invalidate()
+    if db_dish:
+        dish_search_index.update(db_dish)
+        logger.info("Частично обновлено блюдо с ID: %s", dish_id)
+    else:
+        logger.warning("Блюдо с ID: %s не найдено", dish_id)
+    return db_dish
+
+
+def set_dish_availability(db: Session, dish_id: int, is_available: bool):
+    logger.debug("Изменение доступности блюда с ID: %s на %s", dish_id, is_available)
+    db_dish = _patch_entity(db, models.Dish, dish_id, {"is_available": is_available})
+    entity_cache.invalidate("dish", dish_id)
+    current_menu_cache.invalidate()
     return db_dish
 
 
 def delete_dish(db: Session, dish_id: int):
-    logger.info(f"Удаление блюда с ID: {dish_id}")
+    logger.debug("Удаление блюда с ID: %s", dish_id)
     db_dish = db.query(models.Dish).filter(models.Dish.id == dish_id).first()
     if db_dish:
+        ingredients.remove_dish(db, dish_id)
         db.delete(db_dish)
         db.commit()
-        logger.info(f"Удалено блюдо с ID: {dish_id}")
+        entity_cache.invalidate("dish", dish_id)
+        current_menu_cache.invalidate()
+        dish_search_index.remove(dish_id)
+        logger.info("Удалено блюдо с ID: %s", dish_id)
     else:
-        logger.warning(f"Блюдо с ID: {dish_id} не найдено")
+        logger.warning("Блюдо с ID: %s не найдено", dish_id)
     return db_dish
 
 
+def search_dishes(db: Session, query: str, restaurant_id: int = None, is_available: bool = None,
+                  skip: int = 0, limit: int = 20):
+    """
+    Поиск блюд по индексу в порядке релевантности. Фильтры по ресторану
+    и доступности применяются в БД к найденным id (по первичному ключу),
+    поэтому индексу не нужно следить за меню и доступностью.
+    """
+    logger.debug("Поиск блюд: '%s', ресторан=%s, доступность=%s", query, restaurant_id, is_available)
+    ranked = dish_search_index.search(query)
+    needed = skip + limit
+    found = []
+    for start in range(0, len(ranked), BATCH_CHUNK_SIZE):
+        chunk = ranked[start:start + BATCH_CHUNK_SIZE]
+        dishes_query = db.query(models.Dish).filter(models.Dish.id.in_(chunk))
+        if restaurant_id is not None:
+            dishes_query = dishes_query.join(models.Menu).filter(models.Menu.restaurant_id == restaurant_id)
+        if is_available is not None:
+            dishes_query = dishes_query.filter(models.Dish.is_available == is_available)
+        by_id = {db_dish.id: db_dish for db_dish in dishes_query}
+        found.extend(by_id[dish_id] for dish_id in chunk if dish_id in by_id)
+        if len(found) >= needed:
+            break
+    return found[skip:needed]
+
+
+# Ingredient CRUD
+def get_ingredients(db: Session, name: str = None, allergen: str = None, skip: int = 0, limit: int = 100):
+    logger.debug("Получение списка ингредиентов, название=%s, аллерген=%s", name, allergen)
+    query = db.query(models.Ingredient)
+    if name:
+        query = query.filter(models.Ingredient.name.startswith(ingredients.normalize_name(name)))
+    if allergen:
+        query = query.filter(models.Ingredient.id.in_(
+            select(models.IngredientAllergen.ingredient_id).where(models.IngredientAllergen.allergen == allergen)
+        ))
+    return query.order_by(models.Ingredient.name).offset(skip).limit(limit).all()
+
+
+def _dishes_with_ingredient(condition):
+    # id блюд по условию на ингредиент: поиск по индексу dish_ingredients(ingredient_id, dish_id)
+    return (
+        select(models.DishIngredient.dish_id)
+        .join(models.Ingredient, models.Ingredient.id == models.DishIngredient.ingredient_id)
+        .where(condition)
+    )
+
+
+def _dishes_with_allergen(allergen: str):
+    # id блюд с аллергеном: индексы ingredient_allergens(allergen, ingredient_id) и dish_ingredients
+    return (
+        select(models.DishIngredient.dish_id)
+        .join(models.IngredientAllergen, models.IngredientAllergen.ingredient_id == models.DishIngredient.ingredient_id)
+        .where(models.IngredientAllergen.allergen == allergen)
+    )
+
+
+def _filter_dishes(query, restaurant_id: int = None, is_available: bool = None, skip: int = 0, limit: int = 100):
+    if restaurant_id is not None:
+        query = query.join(models.Menu).filter(models.Menu.restaurant_id == restaurant_id)
+    if is_available is not None:
+        query = query.filter(models.Dish.is_available == is_available)
+    return query.order_by(models.Dish.id).offset(skip).limit(limit).all()
+
+
+def get_dishes_by_ingredients(db: Session, names: list, match_all: bool = False, restaurant_id: int = None,
+                              is_available: bool = None, skip: int = 0, limit: int = 100):
+    """Блюда, в составе которых есть любой (или каждый) из ингредиентов (по началу названия)"""
+    logger.debug("Поиск блюд по ингредиентам: %s, все=%s", names, match_all)
+    names = [name for name in (ingredients.normalize_name(name) for name in names) if name]
+    if not names:
+        return []
+    conditions = [models.Dish.id.in_(_dishes_with_ingredient(models.Ingredient.name.startswith(name)))
+                  for name in names]
+    query = db.query(models.Dish).filter(and_(*conditions) if match_all else or_(*conditions))
+    return _filter_dishes(query, restaurant_id, is_available, skip, limit)
+
+
+def get_dishes_by_allergen(db: Session, allergen: str, exclude: bool = False, restaurant_id: int = None,
+                           is_available: bool = None, skip: int = 0, limit: int = 100):
+    """
+    Блюда с аллергеном или, при exclude=True, без него. Блюда без разобранного
+    состава безопасными не считаются: про них ничего не известно.
+    """
+    logger.debug("Поиск блюд по аллергену: %s, исключить=%s", allergen, exclude)
+    contains = models.Dish.id.in_(_dishes_with_allergen(allergen))
+    if exclude:
+        has_ingredients = models.Dish.id.in_(select(models.DishIngredient.dish_id))
+        query = db.query(models.Dish).filter(has_ingredients, ~contains)
+    else:
+        query = db.query(models.Dish).filter(contains)
+    return _filter_dishes(query, restaurant_id, is_available, skip, limit)
+
+
 # Supplier CRUD
 def get_supplier(db: Session, supplier_id: int):
-    logger.info(f"Получение поставщика по ID: {supplier_id}")
+    logger.debug("Получение поставщика по ID: %s", supplier_id)
     return db.query(models.Supplier).filter(models.Supplier.id == supplier_id).first()
 
 
 def get_suppliers(db: Session, skip: int = 0, limit: int = 100):
-    logger.info(f"Получение списка поставщиков, пропуск={skip}, лимит={limit}")
+    logger.debug("Получение списка поставщиков, пропуск=%s, лимит=%s", skip, limit)
     return db.query(models.Supplier).order_by(models.Supplier.id).offset(skip).limit(limit).all()
 
 
 def create_supplier(db: Session, supplier: schemas.SupplierCreate):
-    logger.info(f"Создание поставщика: {supplier.company_name}")
+    logger.debug("Создание поставщика: %s", supplier.company_name)
     db_supplier = models.Supplier(**supplier.dict())
     db.add(db_supplier)
     db.commit()
     db.refresh(db_supplier)
-    logger.info(f"Создан поставщик с ID: {db_supplier.id}")
+    logger.info("Создан поставщик с ID: %s", db_supplier.id)
     return db_supplier
 
 
 def update_supplier(db: Session, supplier_id: int, supplier: schemas.SupplierCreate):
-    logger.info(f"Обновление поставщика с ID: {supplier_id}")
+    logger.debug("Обновление поставщика с ID: %s", supplier_id)
     db_supplier = db.query(models.Supplier).filter(models.Supplier.id == supplier_id).first()
     if db_supplier:
         for key, value in supplier.dict().items():
             setattr(db_supplier, key, value)
         db.commit()
         db.refresh(db_supplier)
-        logger.info(f"Обновлен поставщик с ID: {supplier_id}")
+        logger.info("Обновлен поставщик с ID: %s", supplier_id)
     else:
-        logger.warning(f"Поставщик с ID: {supplier_id} не найден")
+        logger.warning("Поставщик с ID: %s не найден", supplier_id)
+    return db_supplier
+
+
+def patch_supplier(db: Session, supplier_id: int, supplier: schemas.SupplierUpdate):
+    logger.debug("Частичное обновление поставщика с ID: %s", supplier_id)
+    db_supplier = _patch_entity(db, models.Supplier, supplier_id, supplier.dict(exclude_unset=True))
+    if db_supplier:
+        logger.info("Частично обновлен поставщик с ID: %s", supplier_id)
+    else:
+        logger.warning("Поставщик с ID: %s не найден", supplier_id)
     return db_supplier
 
 
 def delete_supplier(db: Session, supplier_id: int):
-    logger.info(f"Удаление поставщика с ID: {supplier_id}")
+    logger.debug("Удаление поставщика с ID: %s", supplier_id)
     db_supplier = db.query(models.Supplier).filter(models.Supplier.id == supplier_id).first()
     if db_supplier:
         db.delete(db_supplier)
         db.commit()
-        logger.info(f"Удален поставщик с ID: {supplier_id}")
+        logger.info("Удален поставщик с ID: %s", supplier_id)
     else:
-        logger.warning(f"Поставщик с ID: {supplier_id} не найден")
+        logger.warning("Поставщик с ID: %s не найден", supplier_id)
     return db_supplier
 
 
 # Ingredient Supply CRUD
 def get_ingredient_supply(db: Session, supply_id: int):
-    logger.info(f"Получение поставки по ID: {supply_id}")
+    logger.debug("Получение поставки по ID: %s", supply_id)
     return db.query(models.IngredientSupply).filter(models.IngredientSupply.id == supply_id).first()
 
 
 def get_ingredient_supplies(db: Session, skip: int = 0, limit: int = 100):
-    logger.info(f"Получение списка поставок, пропуск={skip}, лимит={limit}")
+    logger.debug("Получение списка поставок, пропуск=%s, лимит=%s", skip, limit)
     return db.query(models.IngredientSupply).order_by(models.IngredientSupply.id).offset(skip).limit(limit).all()
 
 
 def create_ingredient_supply(db: Session, ingredient_supply: schemas.IngredientSupplyCreate):
-    logger.info(f"Создание поставки с накладной: {ingredient_supply.invoice_number}")
+    logger.debug("Создание поставки с накладной: %s", ingredient_supply.invoice_number)
     db_ingredient_supply = models.IngredientSupply(**ingredient_supply.dict())
     db.add(db_ingredient_supply)
     db.commit()
     db.refresh(db_ingredient_supply)
-    logger.info(f"Создана поставка с ID: {db_ingredient_supply.id}")
+    payables_cache.invalidate()
+    logger.info("Создана поставка с ID: %s", db_ingredient_supply.id)
     return db_ingredient_supply
 
 
 def update_ingredient_supply(db: Session, supply_id: int, ingredient_supply: schemas.IngredientSupplyCreate):
-    logger.info(f"Обновление поставки с ID: {supply_id}")
+    logger.debug("Обновление поставки с ID: %s", supply_id)
     db_ingredient_supply = db.query(models.IngredientSupply).filter(models.IngredientSupply.id == supply_id).first()
     if db_ingredient_supply:
         for key, value in ingredient_supply.dict().items():
             setattr(db_ingredient_supply, key, value)
         db.commit()
         db.refresh(db_ingredient_supply)
-        logger.info(f"Обновлена поставка с ID: {supply_id}")
+        payables_cache.invalidate()
+        logger.info("Обновлена поставка с ID: %s", supply_id)
+    else:
+        logger.warning("Поставка с ID: %s не найдена", supply_id)
+    return db_ingredient_supply
+
+
+def patch_ingredient_supply(db: Session, supply_id: int, ingredient_supply: schemas.IngredientSupplyUpdate):
+    logger.debug("Частичное обновление поставки с ID: %s", supply_id)
+    db_ingredient_supply = _patch_entity(db, models.IngredientSupply, supply_id, ingredient_supply.dict(exclude_unset=True))
+    if db_ingredient_supply:
+        payables_cache.invalidate()
+        logger.info("Частично обновлена поставка с ID: %s", supply_id)
     else:
-        logger.warning(f"Поставка с ID: {supply_id} не найдена")
+        logger.warning("Поставка с ID: %s не найдена", supply_id)
+    return db_ingredient_supply
+
+
+def set_supply_delivery_status(db: Session, supply_id: int, delivery_status: str):
+    logger.debug("Изменение статуса доставки поставки с ID: %s на '%s'", supply_id, delivery_status)
+    db_ingredient_supply = _patch_entity(db, models.IngredientSupply, supply_id, {"delivery_status": delivery_status})
+    payables_cache.invalidate()
+    return db_ingredient_supply
+
+
+def set_supply_payment_status(db: Session, supply_id: int, payment_status: str):
+    logger.debug("Изменение статуса оплаты поставки с ID: %s на '%s'", supply_id, payment_status)
+    db_ingredient_supply = _patch_entity(db, models.IngredientSupply, supply_id, {"payment_status": payment_status})
+    payables_cache.invalidate()
     return db_ingredient_supply
 
 
 def delete_ingredient_supply(db: Session, supply_id: int):
-    logger.info(f"Удаление поставки с ID: {supply_id}")
+    logger.debug("Удаление поставки с ID: %s", supply_id)
     db_ingredient_supply = db.query(models.IngredientSupply).filter(models.IngredientSupply.id == supply_id).first()
     if db_ingredient_supply:
         db.delete(db_ingredient_supply)
         db.commit()
-        logger.info(f"Удалена поставка с ID: {supply_id}")
+        payables_cache.invalidate()
+        logger.info("Удалена поставка с ID: %s", supply_id)
     else:
-        logger.warning(f"Поставка с ID: {supply_id} не найдена")
+        logger.warning("Поставка с ID: %s не найдена", supply_id)
     return db_ingredient_supply
 
 
 # Customer Order CRUD
 def get_customer_order(db: Session, order_id: int):
-    logger.info(f"Получение заказа по ID: {order_id}")
+    logger.debug("Получение заказа по ID: %s", order_id)
     return db.query(models.CustomerOrder).filter(models.CustomerOrder.id == order_id).first()
 
 
+def customer_order_for_update(order_id: int):
+    """
+    Заказ с блокировкой строки до конца транзакции (FOR UPDATE, в SQL Server - UPDLOCK):
+    параллельные изменения того же заказа ждут, и снимок "до" для агрегатов не устаревает
+    """
+    order = models.CustomerOrder
+    return select(order).where(order.id == order_id).with_for_update().with_hint(
+        order, "WITH (UPDLOCK, ROWLOCK)", "mssql"
+    ).execution_options(populate_existing=True)
+
+
+def _lock_customer_order(db: Session, order_id: int):
+    return db.execute(customer_order_for_update(order_id)).scalars().first()
+
+
 def get_customer_orders(db: Session, skip: int = 0, limit: int = 100):
-    logger.info(f"Получение списка заказов, пропуск={skip}, лимит={limit}")
+    logger.debug("Получение списка заказов, пропуск=%s, лимит=%s", skip, limit)
     return db.query(models.CustomerOrder).order_by(models.CustomerOrder.id).offset(skip).limit(limit).all()
 
 
 def create_customer_order(db: Session, customer_order: schemas.CustomerOrderCreate):
-    logger.info(f"Создание заказа на столик: {customer_order.table_number}")
+    logger.debug("Создание заказа на столик: %s", customer_order.table_number)
     db_customer_order = models.CustomerOrder(**customer_order.dict())
     db.add(db_customer_order)
+    db.flush()
+    rollups.record_order_change(db, None, rollups.order_snapshot(db_customer_order))
     db.commit()
     db.refresh(db_customer_order)
-    logger.info(f"Создан заказ с ID: {db_customer_order.id}")
+    order_events.publish("created", db_customer_order)
+    logger.info("Создан заказ с ID: %s", db_customer_order.id)
     return db_customer_order
 
 
+def create_customer_orders_batch(db: Session, customer_orders: list):
+    """Пакетная вставка заказов одним flush и одним commit (групповая фиксация)"""
+    logger.debug("Пакетное создание заказов: %s", len(customer_orders))
+    db_orders = [models.CustomerOrder(**customer_order.dict()) for customer_order in customer_orders]
+    db.add_all(db_orders)
+    db.flush()
+    rollups.record_orders(db, db_orders)
+    created = [schemas.CustomerOrder.model_validate(db_order) for db_order in db_orders]
+    db.commit()
+    for order in created:
+        order_events.publish("created", order)
+    return created
+
+
+def create_order_ticket(db: Session, ticket: schemas.OrderTicketCreate):
+    """
+    Все позиции чека в одной транзакции: цены блюд одним запросом,
+    вставка строк пакетом (один flush), один commit
+    """
+    logger.debug("Создание чека на столик: %s, позиций: %s", ticket.table_number, len(ticket.lines))
+    dish_ids = {line.dish_id for line in ticket.lines}
+    dishes = {
+        dish_id: (price, is_available)
+        for dish_id, price, is_available in db.query(models.Dish.id, models.Dish.price, models.Dish.is_available)
+        .filter(models.Dish.id.in_(dish_ids)).all()
+    }
+    missing = sorted(dish_ids - dishes.keys())
+    if missing:
+        raise ValueError(f"Блюда не найдены: {missing}")
+    unavailable = sorted(dish_id for dish_id, (_, is_available) in dishes.items() if is_available is False)
+    if unavailable:
+        raise ValueError(f"Блюда недоступны: {unavailable}")
+
+    order_values = ticket.dict(exclude={"lines"})
+    db_orders = [
+        models.CustomerOrder(
+            **order_values,
+            dish_id=line.dish_id,
+            quantity=line.quantity,
+            total_amount=dishes[line.dish_id][0] * line.quantity,
+        )
+        for line in ticket.lines
+    ]
+    db.add_all(db_orders)
+    db.flush()
+    rollups.record_orders(db, db_orders)
+    # Ответ формируется до commit, чтобы не перечитывать каждую строку после истечения объектов
+    created = [schemas.CustomerOrder.model_validate(db_order) for db_order in db_orders]
+    db.commit()
+    for order in created:
+        order_events.publish("created", order)
+    logger.info("Создан чек: заказы с ID %s", [order.id for order in created])
+    return created
+
+
 def update_customer_order(db: Session, order_id: int, customer_order: schemas.CustomerOrderCreate):
-    logger.info(f"Обновление заказа с ID: {order_id}")
-    db_customer_order = db.query(models.CustomerOrder).filter(models.CustomerOrder.id == order_id).first()
+    logger.debug("Обновление заказа с ID: %s", order_id)
+    db_customer_order = _lock_customer_order(db, order_id)
     if db_customer_order:
+        before = rollups.order_snapshot(db_customer_order)
         for key, value in customer_order.dict().items():
             setattr(db_customer_order, key, value)
+        rollups.record_order_change(db, before, rollups.order_snapshot(db_customer_order))
         db.commit()
         db.refresh(db_customer_order)
-        logger.info(f"Обновлен заказ с ID: {order_id}")
+        order_events.publish("updated", db_customer_order)
+        logger.info("Обновлен заказ с ID: %s", order_id)
+    else:
+        logger.warning("Заказ с ID: %s не найден", order_id)
+    return db_customer_order
+
+
+def _patch_customer_order(db: Session, order_id: int, values: dict, event_type: str):
+    before_commit = None
+    db_customer_order = _lock_customer_order(db, order_id) if rollups.ROLLUP_COLUMNS & values.keys() else None
+    if rollups.affects_rollups(db_customer_order, values):
+        # Агрегаты зависят от измененных столбцов: пересчитываем разницу до commit
+        before = rollups.order_snapshot(db_customer_order)
+
+        def before_commit():
+            after = db.query(models.CustomerOrder).filter(models.CustomerOrder.id == order_id).populate_existing().first()
+            rollups.record_order_change(db, before, rollups.order_snapshot(after))
+
+    db_customer_order = _patch_entity(db, models.CustomerOrder, order_id, values, before_commit=before_commit)
+    if db_customer_order:
+        order_events.publish(event_type, db_customer_order)
+    return db_customer_order
+
+
+def patch_customer_order(db: Session, order_id: int, customer_order: schemas.CustomerOrderUpdate):
+    logger.debug("Частичное обновление заказа с ID: %s", order_id)
+    db_customer_order = _patch_customer_order(db, order_id, customer_order.dict(exclude_unset=True), "updated")
+    if db_customer_order:
+        logger.info("Частично обновлен заказ с ID: %s", order_id)
     else:
-        logger.warning(f"Заказ с ID: {order_id} не найден")
+        logger.warning("Заказ с ID: %s не найден", order_id)
     return db_customer_order
 
 
+def set_customer_order_status(db: Session, order_id: int, order_status: str):
+    logger.debug("Изменение статуса заказа с ID: %s на '%s'", order_id, order_status)
+    # Отмена и возврат из отмены меняют агрегаты продаж
+    return _patch_customer_order(db, order_id, {"order_status": order_status}, "status")
+
+
 def delete_customer_order(db: Session, order_id: int):
-    logger.info(f"Удаление заказа с ID: {order_id}")
-    db_customer_order = db.query(models.CustomerOrder).filter(models.CustomerOrder.id == order_id).first()
+    logger.debug("Удаление заказа с ID: %s", order_id)
+    db_customer_order = _lock_customer_order(db, order_id)
     if db_customer_order:
+        rollups.record_order_change(db, rollups.order_snapshot(db_customer_order), None)
+        deleted = schemas.CustomerOrder.model_validate(db_customer_order)
         db.delete(db_customer_order)
         db.commit()
-        logger.info(f"Удален заказ с ID: {order_id}")
+        order_events.publish("deleted", deleted)
+        logger.info("Удален заказ с ID: %s", order_id)
     else:
-        logger.warning(f"Заказ с ID: {order_id} не найден")
+        logger.warning("Заказ с ID: %s не найден", order_id)
     return db_customer_order
@@ -1,14 +1,107 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 import os
 from dotenv import load_dotenv
 
+from pool_metrics import InstrumentedQueuePool, InstrumentedAsyncAdaptedQueuePool
+from query_profiler import SQL_PROFILING, attach_profiler
+
 load_dotenv()
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 
-engine = create_engine(DATABASE_URL, echo=False)
+# Настройки пула соединений
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', -1))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'false').lower() in ('true', '1', 'yes')
+
+
+def pool_options(url: str, is_async: bool = False) -> dict:
+    """Параметры пула для create_engine (SQLite в памяти работает без QueuePool)"""
+    if url.startswith('sqlite') and (':memory:' in url or url.split('://', 1)[-1] in ('', '/')):
+        return {}
+    return {
+        'poolclass': InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool,
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(DATABASE_URL, echo=False, **pool_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+# Реплика для чтения (необязательно): GET-запросы идут на нее, запись и ETL - на основную БД
+REPLICA_DATABASE_URL = os.getenv('REPLICA_DATABASE_URL')
+
+if REPLICA_DATABASE_URL:
+    replica_engine = create_engine(REPLICA_DATABASE_URL, echo=False, **pool_options(REPLICA_DATABASE_URL))
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+else:
+    replica_engine = None
+    ReplicaSessionLocal = SessionLocal
+
+# Асинхронные драйверы для синхронных URL (SQL Server -> aioodbc, SQLite -> aiosqlite)
+ASYNC_DRIVERS = {
+    'mssql+pyodbc': 'mssql+aioodbc',
+    'mssql': 'mssql+aioodbc',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def to_async_url(url: str):
+    """Подбор асинхронного драйвера для синхронного URL подключения"""
+    scheme, sep, rest = url.partition('://')
+    if scheme in ASYNC_DRIVERS:
+        return ASYNC_DRIVERS[scheme] + sep + rest
+    return None
+
+
+ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL') or to_async_url(DATABASE_URL)
+
+# Асинхронный движок создается рядом с синхронным, если для БД есть async-драйвер
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, echo=False, **pool_options(ASYNC_DATABASE_URL, is_async=True)
+) if ASYNC_DATABASE_URL else None
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+) if async_engine is not None else None
+
+# Асинхронный движок реплики (для async-маршрутов чтения)
+ASYNC_REPLICA_DATABASE_URL = os.getenv('ASYNC_REPLICA_DATABASE_URL') or (
+    to_async_url(REPLICA_DATABASE_URL) if REPLICA_DATABASE_URL else None
+)
+
+if async_engine is not None and ASYNC_REPLICA_DATABASE_URL:
+    async_replica_engine = create_async_engine(
+        ASYNC_REPLICA_DATABASE_URL, echo=False, **pool_options(ASYNC_REPLICA_DATABASE_URL, is_async=True)
+    )
+    AsyncReplicaSessionLocal = async_sessionmaker(bind=async_replica_engine, autoflush=False, expire_on_commit=False)
+else:
+    async_replica_engine = None
+    AsyncReplicaSessionLocal = AsyncSessionLocal
+
+def primary_bind(db):
+    """Движок основной БД для сессии реплики (того же вида, sync или async); None, если db уже на основной"""
+    bind = db.get_bind()
+    if replica_engine is not None and bind is replica_engine:
+        return engine
+    if async_replica_engine is not None and bind is async_replica_engine.sync_engine:
+        return async_engine.sync_engine
+    return None
+
+
+# Профилирование SQL по запросам (число выражений, время БД, медленные запросы, N+1)
+if SQL_PROFILING:
+    for profiled_engine in (engine, replica_engine, async_engine, async_replica_engine):
+        if profiled_engine is not None:
+            attach_profiler(profiled_engine)
+
+Base = declarative_base()
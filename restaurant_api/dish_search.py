@@ -0,0 +1,321 @@
+"""
+Полнотекстовый поиск блюд: инвертированный индекс в памяти процесса.
+
+Индексируются name, category, ingredients и description; слова приводятся
+к основе стеммером для русского языка (алгоритм Snowball). Индекс строится
+при первом поиске и обновляется из crud при изменении блюд;
+другие процессы видят изменения после периодической перестройки
+(DISH_SEARCH_REBUILD_SECONDS).
+"""
+from bisect import bisect_left
+import logging
+import math
+import os
+import re
+import threading
+import time
+
+import models
+from database import SessionLocal
+
+logger = logging.getLogger("restaurant_api")
+
+DISH_SEARCH_REBUILD_SECONDS = float(os.getenv('DISH_SEARCH_REBUILD_SECONDS', 300))
+
+# Вес совпадения в зависимости от поля
+FIELD_WEIGHTS = {'name': 3.0, 'category': 2.0, 'ingredients': 1.5, 'description': 1.0}
+# Совпадение по началу слова весит меньше точного совпадения основы
+PREFIX_WEIGHT = 0.5
+MIN_PREFIX_LENGTH = 2
+
+_TOKEN_RE = re.compile(r'[0-9a-zа-яё]+')
+
+
+# Стеммер Snowball для русского языка
+_VOWELS = frozenset('аеиоуыэюя')
+
+
+def _rule(guarded=(), plain=()):
+    # guarded - окончания, которым должна предшествовать 'а' или 'я'
+    suffixes = [(suffix, True) for suffix in guarded] + [(suffix, False) for suffix in plain]
+    return sorted(suffixes, key=lambda item: len(item[0]), reverse=True)
+
+
+_PERFECTIVE_GERUND = _rule(('в', 'вши', 'вшись'), ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'))
+_REFLEXIVE = _rule(plain=('ся', 'сь'))
+_ADJECTIVE = _rule(plain=('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом',
+                          'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею'))
+_PARTICIPLE = _rule(('ем', 'нн', 'вш', 'ющ', 'щ'), ('ивш', 'ывш', 'ующ'))
+_VERB = _rule(('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет', 'ют', 'ны', 'ть', 'ешь', 'нно'),
+              ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен',
+               'ило', 'ыло', 'ено', 'ят', 'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'))
+_NOUN = _rule(plain=('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и', 'ией', 'ей', 'ой',
+                     'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь',
+                     'ию', 'ью', 'ю', 'ия', 'ья', 'я'))
+_SUPERLATIVE = _rule(plain=('ейш', 'ейше'))
+_DERIVATIONAL = _rule(plain=('ост', 'ость'))
+
+
+def _remove(rv: str, rule):
+    """Удаление самого длинного окончания из rule; None, если окончание не найдено"""
+    for suffix, guarded in rule:
+        if rv.endswith(suffix):
+            stem = rv[:-len(suffix)]
+            if guarded and not stem.endswith(('а', 'я')):
+                return None
+            return stem
+    return None
+
+
+def _region_start(word: str, start: int) -> int:
+    # Начало области после первой согласной, следующей за гласной
+    for position in range(start + 1, len(word)):
+        if word[position] not in _VOWELS and word[position - 1] in _VOWELS:
+            return position + 1
+    return len(word)
+
+
+def stem(word: str) -> str:
+    word = word.replace('ё', 'е')
+    for position, char in enumerate(word):
+        if char in _VOWELS:
+            break
+    else:
+        return word
+    prefix, rv = word[:position + 1], word[position + 1:]
+    r2 = _region_start(word, _region_start(word, 0)) - len(prefix)
+
+    # Шаг 1: деепричастие, иначе возвратность + прилагательное/глагол/существительное
+    result = _remove(rv, _PERFECTIVE_GERUND)
+    if result is None:
+        reflexive = _remove(rv, _REFLEXIVE)
+        if reflexive is not None:
+            rv = reflexive
+        result = _remove(rv, _ADJECTIVE)
+        if result is not None:
+            participle = _remove(result, _PARTICIPLE)
+            result = participle if participle is not None else result
+        else:
+            result = _remove(rv, _VERB)
+            if result is None:
+                result = _remove(rv, _NOUN)
+        if result is None:
+            result = rv
+    rv = result
+
+    # Шаг 2
+    if rv.endswith('и'):
+        rv = rv[:-1]
+
+    # Шаг 3: словообразовательные окончания в R2
+    derivational = _remove(rv, _DERIVATIONAL)
+    if derivational is not None and len(derivational) >= r2:
+        rv = derivational
+
+    # Шаг 4
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    else:
+        superlative = _remove(rv, _SUPERLATIVE)
+        if superlative is not None:
+            rv = superlative[:-1] if superlative.endswith('нн') else superlative
+        elif rv.endswith('ь'):
+            rv = rv[:-1]
+    return prefix + rv
+
+
+def tokenize(text) -> list:
+    if not text:
+        return []
+    return _TOKEN_RE.findall(str(text).lower().replace('ё', 'е'))
+
+
+# Копия индексируемых полей блюда (изменения, пришедшие во время перестройки)
+class _DishFields:
+    __slots__ = ('id', 'name', 'category', 'ingredients', 'description')
+
+    def __init__(self, dish):
+        for field in self.__slots__:
+            setattr(self, field, getattr(dish, field, None))
+
+
+# Постинги и словарь основ; перестройка собирает новый экземпляр и подменяет им текущий
+class _IndexData:
+    def __init__(self):
+        self.postings = {}  # основа -> {dish_id: вес}
+        self.doc_terms = {}  # dish_id -> множество основ
+        self._sorted_terms = []  # для поиска по началу слова
+        self._terms_dirty = False
+
+    def add(self, dish):
+        weights = {}
+        for field, field_weight in FIELD_WEIGHTS.items():
+            for token in tokenize(getattr(dish, field, None)):
+                term = stem(token)
+                weights[term] = weights.get(term, 0.0) + field_weight
+        for term, weight in weights.items():
+            postings = self.postings.setdefault(term, {})
+            if not postings:
+                self._terms_dirty = True
+            postings[dish.id] = weight
+        self.doc_terms[dish.id] = set(weights)
+
+    def remove(self, dish_id: int):
+        for term in self.doc_terms.pop(dish_id, ()):
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(dish_id, None)
+            if not postings:
+                del self.postings[term]
+                self._terms_dirty = True
+
+    def prefix_terms(self, prefix: str):
+        if self._terms_dirty:
+            self._sorted_terms = sorted(self.postings)
+            self._terms_dirty = False
+        position = bisect_left(self._sorted_terms, prefix)
+        while position < len(self._sorted_terms) and self._sorted_terms[position].startswith(prefix):
+            yield self._sorted_terms[position]
+            position += 1
+
+
+class DishSearchIndex:
+    """
+    Индекс читает основную БД через session_factory (реплика может еще не содержать
+    только что проиндексированные блюда). Перестройка идет без блокировки индекса:
+    новые постинги собираются отдельно, изменения блюд за время сборки
+    дописываются в них, затем индекс подменяется. Устаревший индекс обслуживает
+    поиск, пока его перестраивает фоновый поток; одновременно идет одна перестройка.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._data = _IndexData()
+        self._built_at = None
+        # Изменения блюд во время перестройки: dish_id -> поля блюда или None (удалено)
+        self._journal = None
+
+    def rebuild(self):
+        """Полная перестройка по основной БД (вызовы не выполняются параллельно)"""
+        with self._rebuild_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        # Вызывается под _rebuild_lock
+        started = time.monotonic()
+        with self._lock:
+            self._journal = {}
+        try:
+            data = _IndexData()
+            dish = models.Dish
+            db = self.session_factory()
+            try:
+                rows = db.query(dish.id, dish.name, dish.category, dish.ingredients, dish.description)
+                for row in rows.yield_per(1000):
+                    data.add(row)
+            finally:
+                db.close()
+            with self._lock:
+                for dish_id, fields in self._journal.items():
+                    data.remove(dish_id)
+                    if fields is not None:
+                        data.add(fields)
+                self._data = data
+                self._built_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._journal = None
+        logger.info("Поисковый индекс блюд построен: блюд %s, основ %s, %.3f с",
+                    len(data.doc_terms), len(data.postings), time.monotonic() - started)
+
+    def _refresh_in_background(self):
+        if self._rebuild_lock.locked():
+            return
+        threading.Thread(target=self._refresh, name="dish-search-rebuild", daemon=True).start()
+
+    def _refresh(self):
+        try:
+            self.rebuild()
+        except Exception as e:
+            logger.error("Ошибка перестройки поискового индекса блюд: %s", e)
+
+    def update(self, dish):
+        """Переиндексация блюда после создания или изменения"""
+        with self._lock:
+            if self._journal is not None:
+                self._journal[dish.id] = _DishFields(dish)
+            if self._built_at is not None:
+                self._data.remove(dish.id)
+                self._data.add(dish)
+
+    def remove(self, dish_id: int):
+        with self._lock:
+            if self._journal is not None:
+                self._journal[dish_id] = None
+            if self._built_at is not None:
+                self._data.remove(dish_id)
+
+    def _ensure_built(self):
+        built_at = self._built_at
+        if built_at is None:
+            # Первый поиск строит индекс под _rebuild_lock; параллельные запросы ждут
+            # эту перестройку и, увидев _built_at, не повторяют ее
+            with self._rebuild_lock:
+                if self._built_at is None:
+                    self._rebuild()
+        elif time.monotonic() - built_at > DISH_SEARCH_REBUILD_SECONDS:
+            self._refresh_in_background()
+
+    def search(self, query: str) -> list:
+        """
+        id блюд по убыванию релевантности. Блюдо должно содержать каждое слово
+        запроса (точно по основе или по началу слова); вес слова - сумма весов
+        полей с поправкой на редкость основы (idf).
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        self._ensure_built()
+
+        with self._lock:
+            data = self._data
+            total = len(data.doc_terms) or 1
+            scores = None
+            for token in tokens:
+                token_scores = {}
+                matches = [(stem(token), 1.0)]
+                if len(token) >= MIN_PREFIX_LENGTH:
+                    matches.extend((term, PREFIX_WEIGHT) for term in data.prefix_terms(token))
+                for term, match_weight in matches:
+                    postings = data.postings.get(term)
+                    if not postings:
+                        continue
+                    idf = math.log(1 + total / len(postings))
+                    for dish_id, weight in postings.items():
+                        score = weight * idf * match_weight
+                        if score > token_scores.get(dish_id, 0.0):
+                            token_scores[dish_id] = score
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {dish_id: score + token_scores[dish_id]
+                              for dish_id, score in scores.items() if dish_id in token_scores}
+                if not scores:
+                    return []
+
+        return sorted(scores, key=lambda dish_id: (-scores[dish_id], dish_id))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'dishes': len(self._data.doc_terms),
+                'terms': len(self._data.postings),
+                'built': self._built_at is not None,
+                'rebuilding': self._rebuild_lock.locked(),
+            }
+
+
+dish_search_index = DishSearchIndex()
@@ -0,0 +1,157 @@
+"""
+Нормализованный состав блюд: Dish.ingredients (свободный текст) разбирается
+в справочник ingredients и связи dish_ingredients; аллергены ингредиентов
+хранятся в ingredient_allergens (у ингредиента их может быть несколько).
+
+Связи обновляются в той же транзакции, что и изменение блюда (crud.*_dish).
+Полная перестройка (например, после массовой загрузки блюд):
+    python ingredients.py rebuild
+"""
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Optional
+import argparse
+import logging
+import re
+
+import models
+
+logger = logging.getLogger("restaurant_api")
+
+# Аллерген -> начала слов, по которым он определяется в названии ингредиента.
+# Для слова выбирается самое длинное совпавшее начало: "сельдерея" - сельдерей, а не "сельд" (рыба)
+ALLERGENS = {
+    'орехи': ('орех', 'миндал', 'фундук', 'кешью', 'фисташ', 'пекан', 'кедров'),
+    'арахис': ('арахис',),
+    'морепродукты': ('кревет', 'кальмар', 'миди', 'устриц', 'краб', 'осьминог', 'гребеш', 'омар', 'лобстер'),
+    'рыба': ('рыб', 'лосос', 'семг', 'форел', 'тунец', 'тунц', 'треск', 'анчоус', 'сельд', 'скумбри', 'икр'),
+    'молоко': ('молок', 'молоч', 'сливк', 'сливоч', 'сыр', 'творог', 'сметан', 'йогурт', 'кефир',
+               'моцарелл', 'пармезан'),
+    'яйца': ('яйц', 'яичн', 'майонез'),
+    'глютен': ('мук', 'пшени', 'хлеб', 'булк', 'лаваш', 'тесто', 'макарон', 'лапш', 'панировк', 'сухар',
+               'ячмен', 'рожь', 'ржан'),
+    'соя': ('соя', 'соев'),
+    'кунжут': ('кунжут',),
+    'горчица': ('горчиц',),
+    'сельдерей': ('сельдере',),
+}
+
+# Начала слов от длинных к коротким: первое совпадение - самое длинное
+_ALLERGEN_PREFIXES = sorted(
+    ((prefix, allergen) for allergen, prefixes in ALLERGENS.items() for prefix in prefixes),
+    key=lambda item: len(item[0]), reverse=True
+)
+
+_SEPARATORS_RE = re.compile(r'[,;\n]+')
+# Количества и пометки в скобках: "сливки 33% (200 мл)" -> "сливки"
+_NOISE_RE = re.compile(r'\([^)]*\)|\d+([.,]\d+)?\s*(%|кг|г|гр|мл|л|шт)?\.?(?![а-я])')
+_WORD_RE = re.compile(r'[a-zа-я]+(?:-[a-zа-я]+)*')
+MAX_NAME_LENGTH = 200
+
+
+def normalize_name(name: str) -> str:
+    name = _NOISE_RE.sub(' ', name.lower().replace('ё', 'е'))
+    return ' '.join(_WORD_RE.findall(name))[:MAX_NAME_LENGTH]
+
+
+def parse_ingredients(text: Optional[str]) -> list:
+    """Список нормализованных названий ингредиентов без повторов"""
+    if not text:
+        return []
+    names = (normalize_name(part) for part in _SEPARATORS_RE.split(text))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def detect_allergens(name: str) -> set:
+    """Все аллергены ингредиента: по одному на каждое слово (и часть слова через дефис)"""
+    allergens = set()
+    for word in re.split(r'[\s-]+', name):
+        for prefix, allergen in _ALLERGEN_PREFIXES:
+            if word.startswith(prefix):
+                allergens.add(allergen)
+                break
+    return allergens
+
+
+def _allergen_rows(ingredient_id: int, name: str) -> list:
+    return [{'ingredient_id': ingredient_id, 'allergen': allergen} for allergen in sorted(detect_allergens(name))]
+
+
+def _ingredient_ids(db: Session, names: list) -> dict:
+    """id ингредиентов по названиям; отсутствующие добавляются в справочник"""
+    ingredient = models.Ingredient
+    ids = dict(db.execute(select(ingredient.name, ingredient.id).where(ingredient.name.in_(names))).all())
+    for name in names:
+        if name in ids:
+            continue
+        try:
+            # Точка сохранения: при гонке со вставкой из другого запроса перечитываем id
+            with db.begin_nested():
+                db_ingredient = ingredient(name=name)
+                db.add(db_ingredient)
+                db.flush()
+                allergen_rows = _allergen_rows(db_ingredient.id, name)
+                if allergen_rows:
+                    db.execute(insert(models.IngredientAllergen), allergen_rows)
+            ids[name] = db_ingredient.id
+        except IntegrityError:
+            ids[name] = db.execute(select(ingredient.id).where(ingredient.name == name)).scalar_one()
+    return ids
+
+
+def sync_dish(db: Session, dish_id: int, text: Optional[str]):
+    """Пересборка связей блюда с ингредиентами (без commit - в транзакции вызывающего)"""
+    remove_dish(db, dish_id)
+    names = parse_ingredients(text)
+    if not names:
+        return
+    ids = _ingredient_ids(db, names)
+    db.execute(insert(models.DishIngredient),
+               [{'dish_id': dish_id, 'ingredient_id': ids[name]} for name in names])
+
+
+def remove_dish(db: Session, dish_id: int):
+    db.execute(delete(models.DishIngredient).where(models.DishIngredient.dish_id == dish_id))
+
+
+def rebuild(db: Session, chunk_size: int = 1000) -> int:
+    """Полная перестройка состава всех блюд и аллергенов всех ингредиентов (после правки ALLERGENS)"""
+    logger.info("Перестройка состава блюд")
+    db.execute(delete(models.DishIngredient))
+    ids, links, processed = {}, [], 0
+    for dish_id, text in db.query(models.Dish.id, models.Dish.ingredients).all():
+        names = parse_ingredients(text)
+        missing = [name for name in names if name not in ids]
+        if missing:
+            ids.update(_ingredient_ids(db, missing))
+        links.extend({'dish_id': dish_id, 'ingredient_id': ids[name]} for name in names)
+        processed += 1
+    for start_index in range(0, len(links), chunk_size):
+        db.execute(insert(models.DishIngredient), links[start_index:start_index + chunk_size])
+
+    db.execute(delete(models.IngredientAllergen))
+    allergen_rows = [
+        row for ingredient_id, name in db.query(models.Ingredient.id, models.Ingredient.name).all()
+        for row in _allergen_rows(ingredient_id, name)
+    ]
+    for start_index in range(0, len(allergen_rows), chunk_size):
+        db.execute(insert(models.IngredientAllergen), allergen_rows[start_index:start_index + chunk_size])
+    db.commit()
+    logger.info("Состав блюд перестроен: блюд %s, ингредиентов %s, связей %s", processed, len(ids), len(links))
+    return processed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Состав блюд")
+    parser.add_argument("command", choices=["rebuild"])
+    args = parser.parse_args()
+
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        count = rebuild(session)
+        print(f"Обработано блюд: {count}")
+    finally:
+        session.close()
@@ -1,20 +1,31 @@
 from fastapi import FastAPI
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from api.v1.api import api_router
+import order_writer
+from log_formatting import JsonFormatter
+from query_profiler import SQL_PROFILING, SqlProfilingMiddleware
+from request_metrics import REQUEST_METRICS, PROMETHEUS_CONTENT_TYPE, RequestMetricsMiddleware, request_metrics
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
+import queue
 
 # Создаем директорию для логов если её нет
 if not os.path.exists("logs"):
     os.makedirs("logs")
 
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+# json - одна запись в строке JSON, text - прежний текстовый формат
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+
 
 # Настройка логгирования
 def setup_logging():
     # Создаем логгер
     logger = logging.getLogger("restaurant_api")
-    logger.setLevel(logging.INFO)
+    logger.setLevel(LOG_LEVEL)
 
     # Создаем файловый обработчик с ротацией
     file_handler = RotatingFileHandler(
@@ -24,13 +35,23 @@ def setup_logging():
     )
 
     # Формат логов
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    if LOG_FORMAT == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
     file_handler.setFormatter(formatter)
 
+    # Запись в файл и ротация выполняются в фоновом потоке,
+    # обработчик запроса только кладет запись в очередь
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
     # Добавляем обработчик к логгеру
-    logger.addHandler(file_handler)
+    logger.addHandler(QueueHandler(log_queue))
 
     logger.propagate = False
 
@@ -55,6 +76,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Профиль SQL на каждый запрос (SQL_PROFILING=true)
+if SQL_PROFILING:
+    app.add_middleware(SqlProfilingMiddleware)
+
+# Метрики запросов по маршрутам (время ответа, коды, выполняющиеся запросы)
+if REQUEST_METRICS:
+    app.add_middleware(RequestMetricsMiddleware)
+
+# Дописываем очередь групповой фиксации заказов при остановке
+app.add_event_handler("shutdown", order_writer.shutdown)
+
 # Подключение маршрутов
 app.include_router(api_router, prefix="/api/v1")
 
@@ -62,6 +94,10 @@ app.include_router(api_router, prefix="/api/v1")
 async def home_page():
     return {"Текст": "Добро пожаловать в Restaurants API", "Управление": "http://127.0.0.1:8000/docs"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=request_metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -0,0 +1,83 @@
+"""
+Приведение схемы БД к models.py: создание таблиц и индексов, добавленных
+после исходной схемы. Каждый шаг MIGRATIONS описывает одно изменение схемы;
+создаются только отсутствующие объекты, поэтому повторный запуск ничего не делает.
+Существующие таблицы и столбцы не изменяются.
+    python migrate.py          # применить к DATABASE_URL
+    python migrate.py --sql    # только вывести DDL
+После создания таблиц заполните их по существующим данным:
+    python rollups.py rebuild
+    python ingredients.py rebuild
+"""
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateIndex, CreateTable
+import argparse
+import logging
+
+import models  # noqa: F401 - регистрирует таблицы в Base.metadata
+from database import Base
+
+logger = logging.getLogger("restaurant_api")
+
+# Шаг: (название, новые таблицы вместе с их индексами, новые индексы существующих таблиц)
+MIGRATIONS = [
+    ("sales_analytics_indexes", (), ("ix_customer_orders_order_time", "ix_customer_orders_restaurant_time")),
+    ("sales_rollups", ("sales_rollup_hourly", "sales_rollup_daily"), ()),
+    ("ingredients", ("ingredients", "dish_ingredients", "ingredient_allergens"), ()),
+    ("current_menu_indexes", (), ("ix_menus_restaurant_period", "ix_dishes_menu_available")),
+    ("supplier_payables_indexes", (), ("ix_ingredient_supplies_supplier_payment_date",)),
+]
+
+
+def _index(name: str):
+    for table in Base.metadata.tables.values():
+        for index in table.indexes:
+            if index.name == name:
+                return index
+    raise KeyError(f"Индекс {name} не объявлен в models.py")
+
+
+def pending_ddl(connection) -> list:
+    """DDL шагов MIGRATIONS для таблиц и индексов, которых нет в БД"""
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    statements = []
+    for name, table_names, index_names in MIGRATIONS:
+        indexes = [_index(index_name) for index_name in index_names]
+        for table_name in table_names:
+            table = Base.metadata.tables[table_name]
+            if table.name not in existing_tables:
+                statements.append(CreateTable(table))
+                existing_tables.add(table.name)
+                statements.extend(CreateIndex(index) for index in sorted(table.indexes, key=lambda index: index.name))
+            else:
+                indexes.extend(table.indexes)
+        for index in indexes:
+            existing_indexes = {existing['name'] for existing in inspector.get_indexes(index.table.name)}
+            if index.name not in existing_indexes:
+                statements.append(CreateIndex(index))
+    return statements
+
+
+def migrate(engine, dry_run: bool = False) -> list:
+    """Создание недостающих объектов в одной транзакции; возвращает выполненный DDL"""
+    with engine.begin() as connection:
+        statements = [str(statement.compile(dialect=engine.dialect)).strip() for statement in pending_ddl(connection)]
+        if not dry_run:
+            for statement in statements:
+                logger.info("Миграция: %s", statement.splitlines()[0])
+                connection.exec_driver_sql(statement)
+    return statements
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Создание недостающих таблиц и индексов")
+    parser.add_argument("--sql", action="store_true", help="только вывести DDL, не выполняя")
+    args = parser.parse_args()
+
+    from database import engine
+
+    ddl = migrate(engine, dry_run=args.sql)
+    for statement in ddl:
+        print(statement + ";\n")
+    print(f"Объектов к созданию: {len(ddl)}" if args.sql else f"Создано объектов: {len(ddl)}")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, DECIMAL, Boolean, Text, Date
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, DECIMAL, Boolean, Text, Date, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -80,6 +80,10 @@ class Employee(Base):
 # Меню
 class Menu(Base):
     __tablename__ = 'menus'
+    __table_args__ = (
+        # Поиск действующих меню ресторана на дату
+        Index('ix_menus_restaurant_period', 'restaurant_id', 'is_active', 'start_date', 'end_date'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     restaurant_id = Column(Integer, ForeignKey('restaurants.id'), nullable=False)
@@ -98,6 +102,9 @@ class Menu(Base):
 # Блюда
 class Dish(Base):
     __tablename__ = 'dishes'
+    __table_args__ = (
+        Index('ix_dishes_menu_available', 'menu_id', 'is_available'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     menu_id = Column(Integer, ForeignKey('menus.id'), nullable=False)
@@ -117,6 +124,45 @@ class Dish(Base):
     customer_orders = relationship("CustomerOrder", back_populates="dish")
 
 
+# Ингредиенты (нормализованные из Dish.ingredients)
+class Ingredient(Base):
+    __tablename__ = 'ingredients'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(200), unique=True, nullable=False)
+
+    # Связи (аллергены загружаются вместе с ингредиентами одним дополнительным запросом)
+    allergen_links = relationship("IngredientAllergen", lazy="selectin", order_by="IngredientAllergen.allergen")
+
+    @property
+    def allergens(self) -> list:
+        return [link.allergen for link in self.allergen_links]
+
+
+# Аллергены ингредиента (у ингредиента их может быть несколько: "хлеб с кунжутом")
+class IngredientAllergen(Base):
+    __tablename__ = 'ingredient_allergens'
+    __table_args__ = (
+        # Обратный поиск: ингредиенты по аллергену
+        Index('ix_ingredient_allergens_allergen', 'allergen', 'ingredient_id'),
+    )
+
+    ingredient_id = Column(Integer, ForeignKey('ingredients.id'), primary_key=True)
+    allergen = Column(String(50), primary_key=True)
+
+
+# Состав блюд (блюдо × ингредиент)
+class DishIngredient(Base):
+    __tablename__ = 'dish_ingredients'
+    __table_args__ = (
+        # Обратный поиск: блюда по ингредиенту
+        Index('ix_dish_ingredients_ingredient', 'ingredient_id', 'dish_id'),
+    )
+
+    dish_id = Column(Integer, ForeignKey('dishes.id'), primary_key=True)
+    ingredient_id = Column(Integer, ForeignKey('ingredients.id'), primary_key=True)
+
+
 # Поставщики
 class Supplier(Base):
     __tablename__ = 'suppliers'
@@ -140,6 +186,10 @@ class Supplier(Base):
 # Поставки ингредиентов
 class IngredientSupply(Base):
     __tablename__ = 'ingredient_supplies'
+    __table_args__ = (
+        # Сводки по расчетам с поставщиками за период
+        Index('ix_ingredient_supplies_supplier_payment_date', 'supplier_id', 'payment_status', 'supply_date'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     supplier_id = Column(Integer, ForeignKey('suppliers.id'), nullable=False)
@@ -159,6 +209,11 @@ class IngredientSupply(Base):
 # Заказы клиентов
 class CustomerOrder(Base):
     __tablename__ = 'customer_orders'
+    __table_args__ = (
+        # Индексы для аналитики по периодам
+        Index('ix_customer_orders_order_time', 'order_time'),
+        Index('ix_customer_orders_restaurant_time', 'restaurant_id', 'order_time'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     restaurant_id = Column(Integer, ForeignKey('restaurants.id'), nullable=False)
@@ -176,4 +231,36 @@ class CustomerOrder(Base):
     # Связи
     restaurant = relationship("Restaurant", back_populates="customer_orders")
     dish = relationship("Dish", back_populates="customer_orders")
-    employee = relationship("Employee", back_populates="customer_orders")
\ No newline at end of file
+    employee = relationship("Employee", back_populates="customer_orders")
+
+
+# Агрегаты продаж по часам (ресторан × блюдо × час), поддерживаются инкрементально
+class SalesRollupHourly(Base):
+    __tablename__ = 'sales_rollup_hourly'
+
+    restaurant_id = Column(Integer, ForeignKey('restaurants.id'), primary_key=True)
+    dish_id = Column(Integer, ForeignKey('dishes.id'), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    orders_count = Column(Integer, nullable=False, default=0)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(DECIMAL(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        Index('ix_sales_rollup_hourly_bucket', 'bucket_start'),
+    )
+
+
+# Агрегаты продаж по дням (ресторан × блюдо × день)
+class SalesRollupDaily(Base):
+    __tablename__ = 'sales_rollup_daily'
+
+    restaurant_id = Column(Integer, ForeignKey('restaurants.id'), primary_key=True)
+    dish_id = Column(Integer, ForeignKey('dishes.id'), primary_key=True)
+    bucket_date = Column(Date, primary_key=True)
+    orders_count = Column(Integer, nullable=False, default=0)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(DECIMAL(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        Index('ix_sales_rollup_daily_bucket', 'bucket_date'),
+    )
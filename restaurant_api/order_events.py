@@ -0,0 +1,126 @@
+"""
+Шина событий по заказам (публикация/подписка в памяти процесса).
+
+crud публикует событие после фиксации изменения заказа,
+кухонные экраны получают их через GET /customer_order/stream (Server-Sent Events).
+Последние ORDER_EVENTS_HISTORY событий хранятся для повторной отдачи
+при переподключении с Last-Event-ID. Шина своя у каждого процесса.
+"""
+from collections import deque
+import asyncio
+import logging
+import os
+import threading
+import time
+
+import schemas
+
+logger = logging.getLogger("restaurant_api")
+
+ORDER_EVENTS_HISTORY = int(os.getenv('ORDER_EVENTS_HISTORY', 1000))
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv('ORDER_EVENTS_QUEUE_SIZE', 1000))
+
+
+class OrderEvent:
+    __slots__ = ('id', 'type', 'restaurant_id', 'data')
+
+    def __init__(self, event_id: int, event_type: str, restaurant_id, data: dict):
+        self.id = event_id
+        self.type = event_type
+        self.restaurant_id = restaurant_id
+        self.data = data
+
+
+# Подписка одного клиента: события передаются в его цикл asyncio
+class Subscription:
+    def __init__(self, restaurant_id=None):
+        self.restaurant_id = restaurant_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        # Клиент не успевает читать: поток закрывается, клиент переподключается с Last-Event-ID
+        self.overflowed = False
+
+    def matches(self, event: OrderEvent) -> bool:
+        return self.restaurant_id is None or event.restaurant_id == self.restaurant_id
+
+    def _put(self, event: OrderEvent):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def push(self, event: OrderEvent):
+        if not self.matches(event):
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:  # цикл клиента уже закрыт
+            pass
+
+
+class OrderEventBus:
+    def __init__(self, history_size: int = ORDER_EVENTS_HISTORY):
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+        # Номера продолжаются от времени запуска: id, выданные до перезапуска процесса,
+        # всегда меньше новых, и клиент с таким Last-Event-ID получает 'reset'
+        self._last_id = time.time_ns() // 1000
+
+    def publish(self, event_type: str, order):
+        """Публикация события; order - ORM-объект или схема CustomerOrder"""
+        data = schemas.CustomerOrder.model_validate(order).model_dump(mode='json')
+        with self._lock:
+            self._last_id += 1
+            event = OrderEvent(self._last_id, event_type, data.get('restaurant_id'), data)
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.push(event)
+
+    def subscribe(self, restaurant_id=None, last_event_id=None):
+        """
+        Регистрация подписчика. Возвращает подписку и пропущенные события
+        (после last_event_id); если часть из них уже вытеснена из истории
+        или last_event_id выдан другим процессом, первым идет событие 'reset' -
+        клиенту нужно перечитать заказы целиком.
+        """
+        subscription = Subscription(restaurant_id)
+        with self._lock:
+            backlog = []
+            if last_event_id is not None and last_event_id > self._last_id:
+                # Номер из будущего: его выдал другой процесс, история этого процесса не поможет
+                backlog.append(OrderEvent(self._last_id, 'reset', restaurant_id, {}))
+            elif last_event_id is not None and last_event_id < self._last_id:
+                oldest_id = self._history[0].id if self._history else self._last_id + 1
+                if last_event_id < oldest_id - 1:
+                    backlog.append(OrderEvent(oldest_id - 1, 'reset', restaurant_id, {}))
+                backlog.extend(
+                    event for event in self._history
+                    if event.id > last_event_id and subscription.matches(event)
+                )
+            self._subscribers.add(subscription)
+        return subscription, backlog
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'last_event_id': self._last_id,
+                'history': len(self._history),
+                'subscribers': len(self._subscribers),
+            }
+
+
+order_event_bus = OrderEventBus()
+
+
+def publish(event_type: str, order):
+    # Ошибка публикации не должна ломать уже зафиксированную запись
+    try:
+        order_event_bus.publish(event_type, order)
+    except Exception as e:
+        logger.error("Ошибка публикации события заказа: %s", e)
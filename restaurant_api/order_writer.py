@@ -0,0 +1,214 @@
+"""
+Групповая фиксация заказов (write-behind).
+
+Запросы на создание заказа ставятся в очередь, фоновый поток забирает их
+пачками (до ORDER_BATCH_SIZE штук или по истечении ORDER_BATCH_DELAY_MS)
+и фиксирует одной транзакцией. Вызывающий получает ответ, когда его пачка
+зафиксирована в БД; ожидание не занимает поток (маршрут асинхронный).
+
+Если пачка не зафиксирована за ORDER_ACK_TIMEOUT, заказ не отменяется - он
+остается в очереди и может быть записан позже. Поэтому клиент получает не ошибку,
+а 202 с номером, по которому проверяет итог: GET /customer_order/write-behind/{номер}.
+"""
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError
+from typing import Optional
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+import crud
+import schemas
+from database import SessionLocal
+
+logger = logging.getLogger("restaurant_api")
+
+ENABLED = os.getenv('ORDER_WRITE_BEHIND', 'false').lower() in ('true', '1', 'yes')
+BATCH_SIZE = int(os.getenv('ORDER_BATCH_SIZE', 200))
+BATCH_DELAY = float(os.getenv('ORDER_BATCH_DELAY_MS', 5)) / 1000
+ACK_TIMEOUT = float(os.getenv('ORDER_ACK_TIMEOUT', 30))
+
+# Сколько последних заказов, не дождавшихся фиксации, можно проверить по номеру
+PENDING_TICKETS = int(os.getenv('ORDER_PENDING_TICKETS', 10000))
+
+
+class WriterStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.batches = 0
+        self.orders = 0
+        self.failed = 0
+        self.max_batch = 0
+        self.commit_seconds_total = 0.0
+        self.commit_seconds_max = 0.0
+        self.latency_seconds_total = 0.0
+        self.latency_seconds_max = 0.0
+
+    def record_batch(self, size: int, commit_seconds: float, latencies: list):
+        with self._lock:
+            self.batches += 1
+            self.orders += size
+            self.max_batch = max(self.max_batch, size)
+            self.commit_seconds_total += commit_seconds
+            self.commit_seconds_max = max(self.commit_seconds_max, commit_seconds)
+            self.latency_seconds_total += sum(latencies)
+            self.latency_seconds_max = max([self.latency_seconds_max, *latencies])
+
+    def record_failure(self):
+        with self._lock:
+            self.failed += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            uptime = time.monotonic() - self.started_at
+            return {
+                'batches_total': self.batches,
+                'orders_total': self.orders,
+                'orders_failed_total': self.failed,
+                'batch_size_avg': round(self.orders / self.batches, 2) if self.batches else 0,
+                'batch_size_max': self.max_batch,
+                'commit_seconds_avg': round(self.commit_seconds_total / self.batches, 6) if self.batches else 0,
+                'commit_seconds_max': round(self.commit_seconds_max, 6),
+                'ack_latency_seconds_avg': round(self.latency_seconds_total / self.orders, 6) if self.orders else 0,
+                'ack_latency_seconds_max': round(self.latency_seconds_max, 6),
+                'orders_per_second': round(self.orders / uptime, 2) if uptime else 0,
+            }
+
+
+class GroupCommitWriter:
+    def __init__(self, session_factory=SessionLocal, batch_size: int = BATCH_SIZE, batch_delay: float = BATCH_DELAY):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.stats = WriterStats()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._pending = OrderedDict()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="order-group-commit", daemon=True)
+                self._thread.start()
+                logger.info("Запущена групповая фиксация заказов: пачка до %s, ожидание %s мс",
+                            self.batch_size, self.batch_delay * 1000)
+
+    def stop(self, timeout: float = 5):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, customer_order: schemas.CustomerOrderCreate) -> Future:
+        """Постановка заказа в очередь; Future завершается после фиксации его пачки"""
+        self.start()
+        future = Future()
+        self._queue.put((customer_order, future, time.monotonic()))
+        return future
+
+    def park(self, future: Future) -> str:
+        """Номер для проверки заказа, ответ по которому не дождался фиксации"""
+        ticket = uuid.uuid4().hex
+        with self._lock:
+            self._pending[ticket] = future
+            while len(self._pending) > PENDING_TICKETS:
+                self._pending.popitem(last=False)
+        return ticket
+
+    def pending(self, ticket: str) -> Optional[Future]:
+        with self._lock:
+            return self._pending.get(ticket)
+
+    def _collect(self) -> list:
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.batch_delay
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                self._flush(batch)
+            except Exception as e:
+                # Например, БД недоступна и не удалось даже открыть сессию или откатить транзакцию:
+                # заказы пачки завершаются ошибкой, поток продолжает обрабатывать очередь
+                logger.error("Ошибка обработки пачки заказов (%s шт.): %s", len(batch), e)
+                for _, future, _ in batch:
+                    if not future.done():
+                        self.stats.record_failure()
+                        _set_exception(future, e)
+
+    def _flush(self, batch: list):
+        db = self.session_factory()
+        started = time.monotonic()
+        try:
+            created = crud.create_customer_orders_batch(db, [item[0] for item in batch])
+        except Exception as e:
+            db.rollback()
+            logger.warning("Ошибка групповой фиксации (%s заказов), повтор по одному: %s", len(batch), e)
+            self._flush_one_by_one(db, batch)
+            return
+        finally:
+            db.close()
+
+        finished = time.monotonic()
+        self.stats.record_batch(len(batch), finished - started, [finished - item[2] for item in batch])
+        for (_, future, _), order in zip(batch, created):
+            _set_result(future, order)
+
+    def _flush_one_by_one(self, db, batch: list):
+        # Ошибочный заказ (например, нарушение внешнего ключа) не должен ронять остальные
+        for customer_order, future, queued_at in batch:
+            started = time.monotonic()
+            try:
+                created = crud.create_customer_orders_batch(db, [customer_order])[0]
+            except Exception as e:
+                db.rollback()
+                self.stats.record_failure()
+                _set_exception(future, e)
+                continue
+            finished = time.monotonic()
+            self.stats.record_batch(1, finished - started, [finished - queued_at])
+            _set_result(future, created)
+
+
+# Future мог быть отменен ожидающей стороной: это не должно останавливать поток записи
+def _set_result(future: Future, result):
+    try:
+        future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+def _set_exception(future: Future, exception: Exception):
+    try:
+        future.set_exception(exception)
+    except InvalidStateError:
+        pass
+
+
+writer = GroupCommitWriter()
+
+
+def shutdown():
+    if ENABLED:
+        writer.stop()
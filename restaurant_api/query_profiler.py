@@ -0,0 +1,113 @@
+"""
+Профилирование SQL по запросам (включается SQL_PROFILING=true).
+
+События before/after_cursor_execute движка считают число выражений и время БД
+для текущего HTTP-запроса (contextvars переходят и в пул потоков синхронных
+обработчиков). Медленные выражения пишутся в лог с параметрами, повторы одного
+и того же выражения в запросе (N+1) - предупреждением. При SQL_PROFILING_HEADERS=true
+итоги отдаются в заголовках X-DB-Query-Count и X-DB-Time-Ms.
+"""
+from collections import Counter
+from contextvars import ContextVar
+import logging
+import os
+import re
+import time
+
+from sqlalchemy import event
+
+logger = logging.getLogger("restaurant_api")
+
+SQL_PROFILING = os.getenv('SQL_PROFILING', 'false').lower() in ('true', '1', 'yes')
+SQL_PROFILING_HEADERS = os.getenv('SQL_PROFILING_HEADERS', 'false').lower() in ('true', '1', 'yes')
+SQL_SLOW_QUERY_MS = float(os.getenv('SQL_SLOW_QUERY_MS', 200))
+# Сколько раз одно выражение может выполниться за запрос до предупреждения о N+1
+SQL_REPEAT_THRESHOLD = int(os.getenv('SQL_REPEAT_THRESHOLD', 10))
+
+# Списки параметров IN (?, ?, ?) разной длины считаются одним выражением
+_IN_LIST_RE = re.compile(r'\(\s*(\?|:\w+|%\(\w+\)s|__\[POSTCOMPILE_\w+\])(\s*,\s*(\?|:\w+|%\(\w+\)s))*\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def statement_shape(statement: str) -> str:
+    return _IN_LIST_RE.sub('(?)', _WHITESPACE_RE.sub(' ', statement).strip())
+
+
+class RequestProfile:
+    __slots__ = ('queries', 'db_time', 'shapes')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.queries += 1
+        self.db_time += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int = SQL_REPEAT_THRESHOLD) -> list:
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+_current_profile: ContextVar = ContextVar('sql_profile', default=None)
+
+
+def current_profile():
+    return _current_profile.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info['query_start_time'].pop()
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(statement, duration)
+    if duration * 1000 >= SQL_SLOW_QUERY_MS:
+        logger.warning("Медленный SQL-запрос (%.1f мс): %s; параметры: %r", duration * 1000, statement, parameters)
+
+
+def attach_profiler(engine):
+    """Подключение профилирования к движку (для AsyncEngine - к его sync_engine)"""
+    target = getattr(engine, 'sync_engine', engine)
+    event.listen(target, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(target, 'after_cursor_execute', _after_cursor_execute)
+
+
+class SqlProfilingMiddleware:
+    """Профиль SQL на каждый HTTP-запрос: заголовки и предупреждения о повторяющихся выражениях"""
+
+    def __init__(self, app, headers: bool = SQL_PROFILING_HEADERS):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+
+        async def send_with_headers(message):
+            # Для обычных ответов обработчик уже выполнен; для потоковых - учтены запросы до начала ответа
+            if self.headers and message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-query-count", str(profile.queries).encode()),
+                    (b"x-db-time-ms", f"{profile.db_time * 1000:.2f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_profile.reset(token)
+            route = getattr(scope.get("route"), "path", scope.get("path"))
+            for shape, count in profile.repeated():
+                logger.warning("Возможен N+1: %s %s выполнил %s раз выражение: %s",
+                               scope["method"], route, count, shape)
+            logger.debug("SQL-профиль %s %s: запросов %s, время БД %.2f мс",
+                         scope["method"], route, profile.queries, profile.db_time * 1000)
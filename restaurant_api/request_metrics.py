@@ -0,0 +1,122 @@
+"""
+Метрики HTTP-запросов по маршрутам: число запросов по кодам ответа,
+гистограммы времени ответа и число выполняющихся запросов.
+Отдаются на /metrics в текстовом формате Prometheus.
+
+Middleware и /metrics выполняются в потоке цикла событий,
+поэтому счетчики обновляются без блокировок.
+"""
+from bisect import bisect_left
+import os
+import time
+
+REQUEST_METRICS = os.getenv('REQUEST_METRICS', 'true').lower() in ('true', '1', 'yes')
+
+# Границы корзин гистограммы, секунд
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Запросы, не попавшие ни в один маршрут, считаются вместе (иначе число меток не ограничено)
+UNMATCHED_ROUTE = "unmatched"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'sum', 'count')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.buckets[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started_at = time.time()
+        self.in_flight = 0
+        self.requests = {}  # (метод, маршрут, код) -> число запросов
+        self.latency = {}  # (метод, маршрут) -> гистограмма
+
+    def record(self, method: str, route: str, status_code: int, duration: float):
+        key = (method, route, status_code)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        histogram = self.latency.get((method, route))
+        if histogram is None:
+            histogram = self.latency[(method, route)] = _Histogram()
+        histogram.observe(duration)
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_total Число HTTP-запросов по маршрутам и кодам ответа",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status_code), count in sorted(self.requests.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status_code}"}} {count}')
+
+        lines += [
+            "# HELP http_request_duration_seconds Время ответа по маршрутам",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self.latency.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram.buckets):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {histogram.sum:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {histogram.count}')
+
+        lines += [
+            "# HELP http_requests_in_flight Число выполняющихся запросов",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP process_start_time_seconds Время запуска процесса (unix time)",
+            "# TYPE process_start_time_seconds gauge",
+            f"process_start_time_seconds {self.started_at:.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_metrics = RequestMetrics()
+
+
+class RequestMetricsMiddleware:
+    """ASGI-middleware: маршрут берется из шаблона пути (/dishes/{dish_id}), а не из URL"""
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.in_flight -= 1
+            route = scope.get("route")
+            metrics.record(scope["method"], getattr(route, "path", UNMATCHED_ROUTE), status_code, duration)
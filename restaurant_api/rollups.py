@@ -0,0 +1,188 @@
+"""
+Инкрементальные агрегаты продаж (ресторан × блюдо × час/день).
+
+Поддерживаются в той же транзакции, что и изменение заказа (crud.*_customer_order),
+и пакетно при массовой загрузке. Отмененные заказы (ROLLUP_EXCLUDED_STATUSES)
+в агрегаты не входят: смена статуса на отмену вычитает заказ, возврат - добавляет.
+Корзины, в которых не осталось заказов, удаляются. Полный пересчет:
+    python rollups.py rebuild [--date-from YYYY-MM-DD]
+"""
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Optional
+import argparse
+import logging
+import os
+
+import models
+
+logger = logging.getLogger("restaurant_api")
+
+# Статусы заказов, которые не учитываются в продажах
+ROLLUP_EXCLUDED_STATUSES = frozenset(
+    status.strip() for status in os.getenv('ROLLUP_EXCLUDED_STATUSES', 'отменен').split(',') if status.strip()
+)
+
+# Столбцы заказа, от которых зависят агрегаты
+ROLLUP_COLUMNS = {'restaurant_id', 'dish_id', 'order_time', 'quantity', 'total_amount', 'order_status'}
+
+
+def order_snapshot(order) -> Optional[tuple]:
+    """
+    Значения заказа, влияющие на агрегаты (до изменения или после); None - заказ не учитывается:
+    отмененные заказы и заказы без order_time (так же их пропускает rebuild)
+    """
+    if order is None or order.order_time is None or order.order_status in ROLLUP_EXCLUDED_STATUSES:
+        return None
+    return (
+        order.restaurant_id,
+        order.dish_id,
+        order.order_time,
+        order.quantity or 0,
+        Decimal(order.total_amount or 0),
+    )
+
+
+def affects_rollups(order, values: dict) -> bool:
+    """Меняет ли обновление столбцов values вклад заказа в агрегаты"""
+    if order is None or not ROLLUP_COLUMNS & values.keys():
+        return False
+    if values.keys() & ROLLUP_COLUMNS != {'order_status'}:
+        return True
+    # Смена статуса важна, только если заказ входит в отмену или выходит из нее
+    return (order.order_status in ROLLUP_EXCLUDED_STATUSES) != (values['order_status'] in ROLLUP_EXCLUDED_STATUSES)
+
+
+def _add_delta(deltas: dict, snapshot: Optional[tuple], sign: int):
+    if snapshot is None:
+        return
+    restaurant_id, dish_id, order_time, quantity, total_amount = snapshot
+    key = (restaurant_id, dish_id, order_time.replace(minute=0, second=0, microsecond=0))
+    delta = deltas.setdefault(key, [0, 0, Decimal(0)])
+    delta[0] += sign
+    delta[1] += sign * quantity
+    delta[2] += sign * total_amount
+
+
+def _upsert(db: Session, model, key: dict, orders: int, quantity: int, revenue: Decimal):
+    values = {
+        model.orders_count: model.orders_count + orders,
+        model.quantity: model.quantity + quantity,
+        model.revenue: model.revenue + revenue,
+    }
+    if db.query(model).filter_by(**key).update(values, synchronize_session=False):
+        if orders < 0:
+            # Пустая корзина удаляется, чтобы не держать FK на блюдо и ресторан
+            db.query(model).filter_by(**key).filter(model.orders_count <= 0).delete(synchronize_session=False)
+        return
+    if orders <= 0:
+        return
+    try:
+        # Точка сохранения: при гонке со вставкой из другого запроса повторяем UPDATE
+        with db.begin_nested():
+            db.add(model(**key, orders_count=orders, quantity=quantity, revenue=revenue))
+    except IntegrityError:
+        db.query(model).filter_by(**key).update(values, synchronize_session=False)
+
+
+def apply_deltas(db: Session, deltas: dict):
+    """Применение приращений по часам и дням (без commit - в транзакции вызывающего)"""
+    daily = {}
+    for (restaurant_id, dish_id, bucket_start), (orders, quantity, revenue) in deltas.items():
+        if not orders and not quantity and not revenue:
+            continue
+        _upsert(db, models.SalesRollupHourly,
+                {'restaurant_id': restaurant_id, 'dish_id': dish_id, 'bucket_start': bucket_start},
+                orders, quantity, revenue)
+        day_delta = daily.setdefault((restaurant_id, dish_id, bucket_start.date()), [0, 0, Decimal(0)])
+        day_delta[0] += orders
+        day_delta[1] += quantity
+        day_delta[2] += revenue
+
+    for (restaurant_id, dish_id, bucket_date), (orders, quantity, revenue) in daily.items():
+        if not orders and not quantity and not revenue:
+            continue
+        _upsert(db, models.SalesRollupDaily,
+                {'restaurant_id': restaurant_id, 'dish_id': dish_id, 'bucket_date': bucket_date},
+                orders, quantity, revenue)
+
+
+def record_order_change(db: Session, before: Optional[tuple], after: Optional[tuple]):
+    """Учет создания (before=None), изменения или удаления (after=None) заказа"""
+    deltas = {}
+    _add_delta(deltas, before, -1)
+    _add_delta(deltas, after, 1)
+    apply_deltas(db, deltas)
+
+
+def record_orders(db: Session, orders):
+    """Пакетный учет новых заказов (массовая загрузка): один UPSERT на корзину"""
+    deltas = {}
+    for order in orders:
+        _add_delta(deltas, order_snapshot(order), 1)
+    apply_deltas(db, deltas)
+
+
+def rebuild(db: Session, date_from: Optional[date] = None, chunk_size: int = 5000) -> int:
+    """Полный пересчет агрегатов (с даты date_from или целиком)"""
+    logger.info("Пересчет агрегатов продаж с %s", date_from or 'начала')
+    order = models.CustomerOrder
+
+    hourly_delete = db.query(models.SalesRollupHourly)
+    daily_delete = db.query(models.SalesRollupDaily)
+    orders_query = db.query(order.restaurant_id, order.dish_id, order.order_time, order.quantity,
+                            order.total_amount).filter(order.order_time.isnot(None))
+    if ROLLUP_EXCLUDED_STATUSES:
+        orders_query = orders_query.filter(or_(order.order_status.is_(None),
+                                               order.order_status.notin_(ROLLUP_EXCLUDED_STATUSES)))
+    if date_from is not None:
+        start = datetime.combine(date_from, time.min)
+        hourly_delete = hourly_delete.filter(models.SalesRollupHourly.bucket_start >= start)
+        daily_delete = daily_delete.filter(models.SalesRollupDaily.bucket_date >= date_from)
+        orders_query = orders_query.filter(order.order_time >= start)
+    hourly_delete.delete(synchronize_session=False)
+    daily_delete.delete(synchronize_session=False)
+
+    hourly, daily, processed = {}, {}, 0
+    for restaurant_id, dish_id, order_time, quantity, total_amount in orders_query.yield_per(chunk_size):
+        bucket_start = order_time.replace(minute=0, second=0, microsecond=0)
+        for buckets, key in ((hourly, (restaurant_id, dish_id, bucket_start)),
+                             (daily, (restaurant_id, dish_id, bucket_start.date()))):
+            totals = buckets.setdefault(key, [0, 0, Decimal(0)])
+            totals[0] += 1
+            totals[1] += quantity or 0
+            totals[2] += Decimal(total_amount or 0)
+        processed += 1
+
+    for model, bucket_column, buckets in ((models.SalesRollupHourly, 'bucket_start', hourly),
+                                          (models.SalesRollupDaily, 'bucket_date', daily)):
+        rows = [
+            {'restaurant_id': restaurant_id, 'dish_id': dish_id, bucket_column: bucket,
+             'orders_count': orders, 'quantity': quantity, 'revenue': revenue}
+            for (restaurant_id, dish_id, bucket), (orders, quantity, revenue) in buckets.items()
+        ]
+        for start_index in range(0, len(rows), chunk_size):
+            db.execute(insert(model), rows[start_index:start_index + chunk_size])
+
+    db.commit()
+    logger.info("Агрегаты пересчитаны: заказов %s, часовых корзин %s, дневных %s", processed, len(hourly), len(daily))
+    return processed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Агрегаты продаж")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--date-from", type=date.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        count = rebuild(session, date_from=args.date_from)
+        print(f"Пересчитано заказов: {count}")
+    finally:
+        session.close()
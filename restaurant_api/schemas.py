@@ -1,9 +1,32 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
 from datetime import datetime, date
-from typing import Optional
+from functools import lru_cache
+from typing import ClassVar, Generic, List, Optional, TypeVar, Union, get_args
 from decimal import Decimal
 
 
+@lru_cache(maxsize=None)
+def _not_nullable(schema) -> frozenset:
+    """Поля схемы создания, которые не принимают None"""
+    return frozenset(
+        name for name, field in schema.model_fields.items()
+        if field.annotation is not type(None) and type(None) not in get_args(field.annotation)
+    )
+
+
+# Базовая схема PATCH: непереданные поля не изменяются,
+# явный null допустим только для необязательных полей схемы создания
+class PartialUpdate(BaseModel):
+    create_schema: ClassVar[type] = None
+
+    @field_validator('*')
+    @classmethod
+    def reject_null(cls, value, info: ValidationInfo):
+        if value is None and info.field_name in _not_nullable(cls.create_schema):
+            raise ValueError("Поле не может быть null")
+        return value
+
+
 # Restaurant Type schemas
 class RestaurantTypeBase(BaseModel):
     code: str
@@ -57,6 +80,19 @@ class RestaurantCreate(RestaurantBase):
     pass
 
 
+class RestaurantUpdate(PartialUpdate):
+    create_schema: ClassVar[type] = RestaurantCreate
+
+    name: Optional[str] = None
+    address: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    opening_date: Optional[date] = None
+    seats_count: Optional[int] = None
+    restaurant_type_id: Optional[int] = None
+    is_active: Optional[bool] = None
+
+
 class Restaurant(RestaurantBase):
     id: int
     created_at: datetime
@@ -83,6 +119,21 @@ class EmployeeCreate(EmployeeBase):
     pass
 
 
+class EmployeeUpdate(PartialUpdate):
+    create_schema: ClassVar[type] = EmployeeCreate
+
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    birth_date: Optional[date] = None
+    hire_date: Optional[date] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    position_id: Optional[int] = None
+    restaurant_id: Optional[int] = None
+    salary: Optional[Decimal] = None
+    passport_data: Optional[str] = None
+
+
 class Employee(EmployeeBase):
     id: int
     created_at: datetime
@@ -104,6 +155,17 @@ class MenuCreate(MenuBase):
     restaurant_id: int
 
 
+class MenuUpdate(PartialUpdate):
+    create_schema: ClassVar[type] = MenuCreate
+
+    restaurant_id: Optional[int] = None
+    name: Optional[str] = None
+    season: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    is_active: Optional[bool] = None
+
+
 class Menu(MenuBase):
     id: int
     restaurant_id: int
@@ -130,6 +192,25 @@ class DishCreate(DishBase):
     menu_id: int
 
 
+class DishUpdate(PartialUpdate):
+    create_schema: ClassVar[type] = DishCreate
+
+    menu_id: Optional[int] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    price: Optional[Decimal] = None
+    weight_grams: Optional[int] = None
+    cooking_time_minutes: Optional[int] = None
+    calories: Optional[int] = None
+    ingredients: Optional[str] = None
+    is_available: Optional[bool] = None
+
+
+class DishAvailabilityUpdate(BaseModel):
+    is_available: bool
+
+
 class Dish(DishBase):
     id: int
     menu_id: int
@@ -139,6 +220,16 @@ class Dish(DishBase):
         from_attributes = True
 
 
+# Ingredient schemas
+class Ingredient(BaseModel):
+    id: int
+    name: str
+    allergens: List[str] = []
+
+    class Config:
+        from_attributes = True
+
+
 # Supplier schemas
 class SupplierBase(BaseModel):
     company_name: str
@@ -156,6 +247,20 @@ class SupplierCreate(SupplierBase):
     pass
 
 
+class SupplierUpdate(PartialUpdate):
+    create_schema: ClassVar[type] = SupplierCreate
+
+    company_name: Optional[str] = None
+    contact_person: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    address: Optional[str] = None
+    inn: Optional[str] = None
+    contract_number: Optional[str] = None
+    contract_date: Optional[date] = None
+    is_active: Optional[bool] = None
+
+
 class Supplier(SupplierBase):
     id: int
     created_at: datetime
@@ -178,6 +283,26 @@ class IngredientSupplyCreate(IngredientSupplyBase):
     restaurant_id: int
 
 
+class IngredientSupplyUpdate(PartialUpdate):
+    create_schema: ClassVar[type] = IngredientSupplyCreate
+
+    supplier_id: Optional[int] = None
+    restaurant_id: Optional[int] = None
+    supply_date: Optional[date] = None
+    invoice_number: Optional[str] = None
+    total_amount: Optional[Decimal] = None
+    delivery_status: Optional[str] = None
+    payment_status: Optional[str] = None
+
+
+class IngredientSupplyDeliveryStatusUpdate(BaseModel):
+    delivery_status: str
+
+
+class IngredientSupplyPaymentStatusUpdate(BaseModel):
+    payment_status: str
+
+
 class IngredientSupply(IngredientSupplyBase):
     id: int
     supplier_id: int
@@ -205,6 +330,42 @@ class CustomerOrderCreate(CustomerOrderBase):
     employee_id: Optional[int] = None
 
 
+class CustomerOrderUpdate(PartialUpdate):
+    create_schema: ClassVar[type] = CustomerOrderCreate
+
+    restaurant_id: Optional[int] = None
+    table_number: Optional[str] = None
+    customer_name: Optional[str] = None
+    customer_phone: Optional[str] = None
+    dish_id: Optional[int] = None
+    quantity: Optional[int] = None
+    total_amount: Optional[Decimal] = None
+    order_status: Optional[str] = None
+    payment_method: Optional[str] = None
+    employee_id: Optional[int] = None
+
+
+class CustomerOrderStatusUpdate(BaseModel):
+    order_status: str
+
+
+# Чек столика: несколько позиций одним запросом
+class OrderTicketLine(BaseModel):
+    dish_id: int
+    quantity: int = Field(1, gt=0)
+
+
+class OrderTicketCreate(BaseModel):
+    restaurant_id: int
+    table_number: str
+    customer_name: Optional[str] = None
+    customer_phone: Optional[str] = None
+    employee_id: Optional[int] = None
+    order_status: str = "принят"
+    payment_method: str = "наличные"
+    lines: List[OrderTicketLine] = Field(min_length=1)
+
+
 class CustomerOrder(CustomerOrderBase):
     id: int
     restaurant_id: int
@@ -212,4 +373,63 @@ class CustomerOrder(CustomerOrderBase):
     order_time: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+# Вложенные представления (загружаются жадно, без N+1 запросов)
+class MenuWithDishes(Menu):
+    dishes: List[Dish] = []
+
+
+class RestaurantMenuTree(Restaurant):
+    menus: List[MenuWithDishes] = []
+
+
+class CurrentMenu(BaseModel):
+    restaurant_id: int
+    at: date
+    menus: List[MenuWithDishes] = []
+
+
+# Пакетное получение по списку id
+T = TypeVar("T")
+
+# Максимальное число id в одном пакетном запросе
+MAX_BATCH_IDS = 5000
+
+
+class BatchIds(BaseModel):
+    ids: List[int] = Field(max_length=MAX_BATCH_IDS)
+
+
+class BatchResult(BaseModel, Generic[T]):
+    items: List[T]
+    missing: List[int] = []
+
+
+# Аналитика продаж
+class SalesAggregate(BaseModel):
+    key: Optional[Union[int, datetime, date, str]] = None
+    name: Optional[str] = None
+    orders: int
+    quantity: int
+    revenue: Decimal
+
+
+class SalesSummary(BaseModel):
+    orders: int
+    quantity: int
+    revenue: Decimal
+    average_check: Decimal
+
+
+# Расчеты с поставщиками
+class SupplierPayables(BaseModel):
+    key: Optional[Union[int, date, str]] = None
+    name: Optional[str] = None
+    supplies: int
+    total_amount: Decimal
+    paid_amount: Decimal
+    outstanding_amount: Decimal
+    unpaid_supplies: int
+    pending_deliveries: int
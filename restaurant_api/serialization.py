@@ -0,0 +1,41 @@
+from fastapi import Response
+from decimal import Decimal
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # без orjson используется стандартный json
+    orjson = None
+
+# Быстрая сериализация списков: строки БД -> JSON без ORM-объектов и Pydantic-валидации
+FAST_SERIALIZATION = os.getenv('FAST_SERIALIZATION', 'true').lower() in ('true', '1', 'yes')
+
+
+def _default(value):
+    # Decimal отдаем строкой, как это делает Pydantic
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+
+def dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def schema_fields(schema) -> list:
+    """Имена полей схемы ответа в порядке объявления"""
+    return list(schema.model_fields)
+
+
+def rows_json_response(fields: list, rows) -> Response:
+    """JSON-ответ напрямую из кортежей строк (порядок значений совпадает с fields)"""
+    return Response(content=dumps([dict(zip(fields, row)) for row in rows]), media_type='application/json')
+
+
+def row_json_response(fields: list, row) -> Response:
+    return Response(content=dumps(dict(zip(fields, row))), media_type='application/json')
@@ -0,0 +1,158 @@
+"""
+Общие фикстуры тестов: временная БД SQLite (внешние ключи включены),
+клиент API и счетчик SQL-запросов.
+
+Запуск из каталога restaurant_api:
+    python -m pytest tests
+"""
+from contextlib import contextmanager
+import os
+import sys
+import tempfile
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+# Переменные окружения читаются при импорте database и main, поэтому задаются до них
+TEST_DIR = tempfile.mkdtemp(prefix="restaurant_api_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}"
+os.environ.pop("REPLICA_DATABASE_URL", None)
+os.environ.setdefault("LOG_FORMAT", "text")
+os.environ["ORDER_WRITE_BEHIND"] = "false"
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["ENTITY_CACHE_BACKEND"] = "memory"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+import cache  # noqa: E402
+import database  # noqa: E402
+import models  # noqa: E402
+from database import Base, SessionLocal, engine  # noqa: E402
+from api.v1.dependencies import get_read_db  # noqa: E402
+
+
+@event.listens_for(engine, "connect")
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    # В SQLite внешние ключи по умолчанию не проверяются, в SQL Server - всегда
+    dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+
+@pytest.fixture(scope="session")
+def app():
+    # main создает каталог logs в текущем каталоге
+    cwd = os.getcwd()
+    os.chdir(TEST_DIR)
+    try:
+        import main
+    finally:
+        os.chdir(cwd)
+    return main.app
+
+
+@pytest.fixture
+def db_schema():
+    """Пустая схема БД и пустые кэши для каждого теста"""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    for name in list(cache._caches):
+        cache.invalidate(name)
+    cache.entity_cache.invalidate("*")
+    yield
+
+
+@pytest.fixture
+def client(app, db_schema):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(db_schema):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def replica(app, db_schema, monkeypatch):
+    """
+    Отстающая реплика: отдельная пустая БД, из которой читают безопасные запросы
+    (get_read_db); возвращает ее движок
+    """
+    replica_engine = create_engine(f"sqlite:///{os.path.join(TEST_DIR, 'replica.db')}")
+    Base.metadata.drop_all(replica_engine)
+    Base.metadata.create_all(replica_engine)
+    monkeypatch.setattr(database, "replica_engine", replica_engine)
+
+    def get_replica_db():
+        with Session(bind=replica_engine) as db:
+            yield db
+
+    app.dependency_overrides[get_read_db] = get_replica_db
+    yield replica_engine
+    app.dependency_overrides.pop(get_read_db, None)
+    replica_engine.dispose()
+
+
+@pytest.fixture
+def count_queries():
+    """Контекстный менеджер: список SQL-запросов, выполненных внутри блока with"""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return counter
+
+
+@pytest.fixture
+def restaurant(client, db):
+    """Ресторан с одним меню и одним блюдом; возвращает их id"""
+    db.add(models.DictionaryRestaurantType(code="cafe", name="Кафе"))
+    db.commit()
+    restaurant = client.post("/api/v1/restaurants/", json={
+        "name": "Ресторан", "address": "Адрес", "opening_date": "2024-01-01",
+        "seats_count": 10, "restaurant_type_id": 1,
+    }).json()
+    menu = create_menu(client, restaurant["id"])
+    dish = create_dish(client, menu["id"], name="Суп", ingredients="картофель, сельдерей")
+    return {"restaurant_id": restaurant["id"], "menu_id": menu["id"], "dish_id": dish["id"]}
+
+
+def create_menu(client, restaurant_id: int, name: str = "Основное") -> dict:
+    response = client.post("/api/v1/menu/", json={
+        "restaurant_id": restaurant_id, "name": name, "start_date": "2024-01-01",
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def create_dish(client, menu_id: int, name: str = "Блюдо", price: str = "100", ingredients: str = None) -> dict:
+    response = client.post("/api/v1/dishes/", json={
+        "menu_id": menu_id, "name": name, "category": "Основные", "price": price, "ingredients": ingredients,
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def create_order(client, restaurant_id: int, dish_id: int, quantity: int = 1, total_amount: str = "100") -> dict:
+    response = client.post("/api/v1/customer_order/", json={
+        "restaurant_id": restaurant_id, "dish_id": dish_id, "table_number": "1",
+        "quantity": quantity, "total_amount": total_amount,
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
@@ -0,0 +1,68 @@
+"""Асинхронные маршруты /api/v1/async: те же ответы и побочные эффекты, что у синхронных"""
+import inspect
+
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from api.v1.endpoints import async_routes
+from order_events import order_event_bus
+from conftest import create_dish, create_order
+
+API = "/api/v1"
+
+
+def test_async_routes_are_coroutines_on_async_session():
+    routes = [route for route in async_routes.router.routes if isinstance(route, APIRoute)]
+
+    assert routes
+    for route in routes:
+        assert inspect.iscoroutinefunction(route.endpoint), route.path
+        annotations = [parameter.annotation for parameter in inspect.signature(route.endpoint).parameters.values()]
+        assert AsyncSession in annotations, route.path
+
+
+def test_async_reads_match_sync_reads(client, restaurant):
+    create_dish(client, restaurant["menu_id"], name="Салат")
+    paths = [
+        f"/dishes/{restaurant['dish_id']}",
+        "/dishes/?skip=0&limit=10",
+        f"/menu/{restaurant['menu_id']}/dishes",
+        f"/restaurants/{restaurant['restaurant_id']}/menu-tree",
+        f"/restaurants/{restaurant['restaurant_id']}/current-menu",
+    ]
+
+    for path in paths:
+        sync_response = client.get(API + path)
+        async_response = client.get(f"{API}/async{path}")
+        assert async_response.status_code == 200, path
+        assert async_response.json() == sync_response.json(), path
+
+
+def test_async_missing_entities_return_404(client, restaurant):
+    assert client.get(f"{API}/async/dishes/999").status_code == 404
+    assert client.get(f"{API}/async/menu/999/dishes").status_code == 404
+    assert client.get(f"{API}/async/restaurants/999/current-menu").status_code == 404
+    assert client.patch(f"{API}/async/customer_order/999/status", json={"order_status": "готов"}).status_code == 404
+
+
+def test_async_order_create_and_status_update_keep_rollups_and_events(client, db, restaurant):
+    last_event_id = order_event_bus.stats()["last_event_id"]
+
+    response = client.post(f"{API}/async/customer_order/", json={
+        "restaurant_id": restaurant["restaurant_id"], "dish_id": restaurant["dish_id"], "table_number": "5",
+        "quantity": 2, "total_amount": "200",
+    })
+    assert response.status_code == 201
+    order_id = response.json()["id"]
+    assert db.query(models.SalesRollupDaily.orders_count).scalar() == 1
+    assert order_event_bus.stats()["last_event_id"] == last_event_id + 1
+
+    response = client.patch(f"{API}/async/customer_order/{order_id}/status", json={"order_status": "отменен"})
+    assert response.status_code == 200
+    assert response.json()["order_status"] == "отменен"
+    assert db.query(models.SalesRollupDaily).count() == 0
+
+    create_order(client, restaurant["restaurant_id"], restaurant["dish_id"])
+    orders = client.get(f"{API}/async/customer_order/").json()
+    assert [order["id"] for order in orders] == [order_id, order_id + 1]
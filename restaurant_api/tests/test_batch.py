@@ -0,0 +1,36 @@
+"""Пакетное получение по списку id"""
+import crud
+from conftest import create_dish
+
+URL = "/api/v1/dishes/batch"
+
+
+def test_batch_keeps_requested_order_and_reports_missing(client, restaurant):
+    second = create_dish(client, restaurant["menu_id"], name="Салат")
+
+    response = client.get(URL, params={"ids": f"{second['id']},999,{restaurant['dish_id']},{second['id']}"})
+
+    assert response.status_code == 200
+    assert [dish["id"] for dish in response.json()["items"]] == [second["id"], restaurant["dish_id"]]
+    assert response.json()["missing"] == [999]
+
+
+def test_batch_body_matches_query_string(client, restaurant):
+    response = client.post(URL, json={"ids": [restaurant["dish_id"], 999]})
+
+    assert response.json() == client.get(URL, params={"ids": f"{restaurant['dish_id']},999"}).json()
+
+
+def test_batch_uses_one_query_per_chunk(client, restaurant, count_queries, monkeypatch):
+    monkeypatch.setattr(crud, "BATCH_CHUNK_SIZE", 2)
+
+    with count_queries() as statements:
+        client.get(URL, params={"ids": "1,2,3,4,5"})
+
+    assert len([statement for statement in statements if statement.startswith("SELECT")]) == 3
+
+
+def test_batch_rejects_bad_and_oversized_id_lists(client):
+    assert client.get(URL, params={"ids": "1,abc"}).status_code == 400
+    assert client.get(URL, params={"ids": ",".join(map(str, range(5001)))}).status_code == 400
+    assert client.post(URL, json={"ids": list(range(5001))}).status_code == 422
@@ -0,0 +1,81 @@
+"""Текущее меню ресторана: период и активность меню, доступность блюд, кэш с ETag, SQL для SQL Server"""
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.dialects import mssql
+
+from conftest import create_dish
+
+import crud
+
+
+def current_menu(client, restaurant_id: int, **params) -> dict:
+    response = client.get(f"/api/v1/restaurants/{restaurant_id}/current-menu", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_menus_filtered_by_period_and_activity(client, restaurant):
+    restaurant_id = restaurant["restaurant_id"]
+    for name, start_date, end_date, is_active in (
+        ("Летнее", "2024-06-01", "2024-08-31", True),
+        ("Архив", "2024-01-01", None, False),
+    ):
+        response = client.post("/api/v1/menu/", json={
+            "restaurant_id": restaurant_id, "name": name, "start_date": start_date,
+            "end_date": end_date, "is_active": is_active,
+        })
+        assert response.status_code == 201, response.text
+
+    names = lambda body: [menu["name"] for menu in body["menus"]]
+    assert names(current_menu(client, restaurant_id, at="2024-07-01")) == ["Основное", "Летнее"]
+    assert names(current_menu(client, restaurant_id, at="2024-09-01")) == ["Основное"]
+    assert names(current_menu(client, restaurant_id, at="2023-12-31")) == []
+
+
+def test_unavailable_dishes_excluded(client, restaurant):
+    dish = create_dish(client, restaurant["menu_id"], name="Салат")
+    assert client.patch(f"/api/v1/dishes/{dish['id']}", json={"is_available": False}).status_code == 200
+
+    body = current_menu(client, restaurant["restaurant_id"])
+    assert [dish["name"] for dish in body["menus"][0]["dishes"]] == ["Суп"]
+
+
+def test_etag_changes_after_dish_update(client, restaurant):
+    url = f"/api/v1/restaurants/{restaurant['restaurant_id']}/current-menu"
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    create_dish(client, restaurant["menu_id"], name="Салат")
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [dish["name"] for dish in response.json()["menus"][0]["dishes"]] == ["Суп", "Салат"]
+
+
+def test_cache_miss_reads_primary_not_replica(client, restaurant, replica):
+    # Реплика пуста: заполнение кэша с нее вернуло бы 404 или пустое меню
+    body = current_menu(client, restaurant["restaurant_id"])
+    assert [dish["name"] for dish in body["menus"][0]["dishes"]] == ["Суп"]
+
+
+def test_boolean_filters_compile_for_sql_server(db, restaurant):
+    statements = []
+
+    def collect(orm_execute_state):
+        statements.append(str(orm_execute_state.statement.compile(dialect=mssql.dialect())))
+
+    event.listen(db, "do_orm_execute", collect)
+    try:
+        menus = crud.get_current_menus(db, restaurant_id=restaurant["restaurant_id"], at=date.today())
+    finally:
+        event.remove(db, "do_orm_execute", collect)
+
+    assert [dish.name for dish in menus[0].dishes] == ["Суп"]
+    # Меню и блюда (selectinload); в SQL Server IS допустимо только с NULL
+    assert len(statements) == 2
+    for statement in statements:
+        assert " IS 1" not in statement and " IS true" not in statement
+    assert "menus.is_active = 1" in statements[0]
+    assert "dishes.is_available = 1" in statements[1]
@@ -0,0 +1,64 @@
+"""Поиск блюд: словоформы, начало слова, обновление индекса и одна перестройка при первом поиске"""
+import threading
+import time
+
+import pytest
+
+from conftest import create_dish
+
+import crud
+from database import SessionLocal
+from dish_search import DishSearchIndex
+
+
+@pytest.fixture
+def index(monkeypatch):
+    # Глобальный индекс мог быть построен по БД другого теста
+    index = DishSearchIndex()
+    monkeypatch.setattr(crud, "dish_search_index", index)
+    return index
+
+
+def search(client, q: str, **params) -> list:
+    response = client.get("/api/v1/dishes/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return [dish["name"] for dish in response.json()]
+
+
+def test_search_matches_word_forms_and_prefixes(restaurant, client, index):
+    create_dish(client, restaurant["menu_id"], name="Салат с курицей", ingredients="курица, салат")
+
+    assert search(client, "супы") == ["Суп"]
+    assert search(client, "картофелем") == ["Суп"]
+    assert search(client, "кур") == ["Салат с курицей"]
+    assert search(client, "суп курица") == []
+
+
+def test_search_sees_changes_after_build(restaurant, client, index):
+    assert search(client, "борщ") == []
+
+    dish = create_dish(client, restaurant["menu_id"], name="Борщ")
+    assert search(client, "борщ") == ["Борщ"]
+
+    assert client.delete(f"/api/v1/dishes/{dish['id']}").status_code in (200, 204)
+    assert search(client, "борщ") == []
+
+
+def test_concurrent_first_searches_build_once(restaurant):
+    builds = []
+
+    def session_factory():
+        builds.append(1)
+        time.sleep(0.2)
+        return SessionLocal()
+
+    index = DishSearchIndex(session_factory=session_factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(index.search("суп"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert results == [[restaurant["dish_id"]]] * 5
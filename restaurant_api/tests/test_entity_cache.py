@@ -0,0 +1,73 @@
+"""Read-through кэш отдельных сущностей и его сброс"""
+import pytest
+
+import cache
+from cache import EntityCache, LRUCacheBackend, RedisCacheBackend, entity_cache
+
+
+def test_entity_read_is_cached_until_write(client, restaurant, count_queries):
+    url = f"/api/v1/dishes/{restaurant['dish_id']}"
+    client.get(url)
+
+    with count_queries() as statements:
+        assert client.get(url).json()["name"] == "Суп"
+    assert statements == []
+
+    client.patch(url, json={"name": "Борщ"})
+    assert client.get(url).json()["name"] == "Борщ"
+
+
+def test_invalidate_entity_keeps_other_entities():
+    entities = EntityCache(LRUCacheBackend(maxsize=10, ttl=60))
+    for key in ("dish:1", "dish:2", "menu:1"):
+        entities.backend.set(key, b"{}")
+
+    entities.invalidate("dish")
+    assert [entities.backend.get(key) for key in ("dish:1", "dish:2", "menu:1")] == [None, None, b"{}"]
+
+    entities.invalidate()
+    assert entities.backend.size() == 0
+
+
+def test_admin_invalidation_clears_entity_cache(client, restaurant):
+    client.get(f"/api/v1/dishes/{restaurant['dish_id']}")
+    assert entity_cache.stats()["entries"] == 1
+
+    assert client.delete("/api/v1/cache/entities").status_code == 204
+    assert entity_cache.stats()["entries"] == 0
+
+
+@pytest.fixture
+def redis_backend(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    import redis
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, "from_url", classmethod(lambda cls, url: fakeredis.FakeRedis(server=server)))
+    return RedisCacheBackend("redis://test", ttl=60)
+
+
+def test_redis_clear_unlinks_keys_in_batches(redis_backend, monkeypatch):
+    monkeypatch.setattr(cache, "REDIS_CLEAR_BATCH", 100)
+    for entity_id in range(250):
+        redis_backend.set(f"dish:{entity_id}", b"{}")
+    redis_backend.set("menu:1", b"{}")
+    commands = []
+    monkeypatch.setattr(redis_backend._client, "unlink", lambda *keys: commands.append(len(keys)))
+    monkeypatch.setattr(redis_backend._client, "delete", lambda *keys: pytest.fail("DELETE по одному ключу"))
+
+    redis_backend.clear("dish:")
+
+    assert sum(commands) == 250
+    assert max(commands) <= 100 and len(commands) <= 4
+
+
+def test_redis_clear_removes_only_matching_prefix(redis_backend):
+    for key in ("dish:1", "dish:2", "menu:1"):
+        redis_backend.set(key, b"{}")
+
+    redis_backend.clear("dish:")
+    assert [redis_backend.get(key) for key in ("dish:1", "dish:2", "menu:1")] == [None, None, b"{}"]
+
+    redis_backend.clear()
+    assert redis_backend.size() == 0
@@ -0,0 +1,79 @@
+"""Потоковая выгрузка таблиц: NDJSON, CSV, XLSX, фильтры и gzip"""
+import csv
+import io
+import json
+
+import pytest
+
+import schemas
+from api.v1.endpoints import export
+from serialization import schema_fields
+from conftest import create_dish, create_order
+
+URL = "/api/v1/export"
+
+
+@pytest.fixture
+def dishes(client, restaurant, monkeypatch):
+    # Маленькие порции: выгрузка проходит через несколько запросов keyset-пагинации
+    monkeypatch.setattr(export, "CHUNK_SIZE", 2)
+    for number in range(4):
+        create_dish(client, restaurant["menu_id"], name=f"Блюдо {number}")
+    return restaurant
+
+
+def test_ndjson_streams_all_rows_in_id_order(client, dishes):
+    response = client.get(f"{URL}/dishes")
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["name"] for row in rows] == ["Суп", "Блюдо 0", "Блюдо 1", "Блюдо 2", "Блюдо 3"]
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+
+
+def test_csv_has_bom_header_and_rows(client, dishes):
+    response = client.get(f"{URL}/dishes", params={"format": "csv"})
+
+    assert response.content.startswith("\ufeff".encode("utf-8"))
+    rows = list(csv.reader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert rows[0] == schema_fields(schemas.Dish)
+    assert len(rows) == 6
+
+
+def test_xlsx_export_opens(client, dishes):
+    openpyxl = pytest.importorskip("openpyxl")
+
+    response = client.get(f"{URL}/dishes", params={"format": "xlsx"})
+
+    sheet = openpyxl.load_workbook(io.BytesIO(response.content)).active
+    assert sheet.max_row == 6
+
+
+def test_gzip_export_decodes_to_same_rows(client, dishes):
+    plain = client.get(f"{URL}/dishes").text
+
+    response = client.get(f"{URL}/dishes", params={"gzip": True})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == plain
+
+
+def test_restaurant_filter(client, restaurant):
+    create_order(client, restaurant["restaurant_id"], restaurant["dish_id"])
+
+    assert len(client.get(f"{URL}/customer_orders", params={"restaurant_id": 1}).text.splitlines()) == 1
+    assert client.get(f"{URL}/customer_orders", params={"restaurant_id": 2}).text == ""
+    assert client.get(f"{URL}/dishes", params={"restaurant_id": 1}).status_code == 400
+
+
+def test_date_to_includes_whole_day_for_datetime_columns(client, restaurant):
+    order = create_order(client, restaurant["restaurant_id"], restaurant["dish_id"])
+    day = order["order_time"][:10]
+
+    response = client.get(f"{URL}/customer_orders", params={"date_from": day, "date_to": day})
+
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [order["id"]]
+
+
+def test_unknown_entity_is_404(client):
+    assert client.get(f"{URL}/passwords").status_code == 404
@@ -0,0 +1,35 @@
+"""Разбор состава блюд и определение аллергенов ингредиентов"""
+import pytest
+
+from ingredients import detect_allergens, parse_ingredients
+
+
+@pytest.mark.parametrize("name, allergens", [
+    ("картофель", set()),
+    ("сельдь", {"рыба"}),
+    # Самое длинное начало слова: "сельдере" длиннее "сельд"
+    ("корень сельдерея", {"сельдерей"}),
+    ("соевый соус", {"соя"}),
+    # Несколько аллергенов в одном ингредиенте
+    ("яичная лапша", {"яйца", "глютен"}),
+    ("ореховое молоко", {"орехи", "молоко"}),
+    ("орехово-кунжутная паста", {"орехи", "кунжут"}),
+])
+def test_detect_allergens(name, allergens):
+    assert detect_allergens(name) == allergens
+
+
+def test_parse_ingredients_drops_quantities_and_duplicates():
+    assert parse_ingredients("Сливки 33% (200 мл), картофель 300 г; сливки") == ["сливки", "картофель"]
+    assert parse_ingredients(None) == []
+
+
+def test_dish_ingredients_are_linked_with_all_allergens(client, restaurant):
+    response = client.get("/api/v1/ingredients/", params={"name": "сельдерей"})
+    assert [(ingredient["name"], ingredient["allergens"]) for ingredient in response.json()] == [
+        ("сельдерей", ["сельдерей"]),
+    ]
+
+    dishes = client.get("/api/v1/ingredients/allergens/сельдерей/dishes").json()
+    assert [dish["id"] for dish in dishes] == [restaurant["dish_id"]]
+    assert client.get("/api/v1/ingredients/allergens/рыба/dishes").json() == []
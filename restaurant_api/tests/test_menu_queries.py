@@ -0,0 +1,43 @@
+"""Вложенные ответы меню загружаются фиксированным числом запросов (без N+1)"""
+from conftest import create_dish, create_menu
+
+
+def test_menu_tree_query_count_does_not_grow_with_menus(client, restaurant, count_queries):
+    restaurant_id = restaurant["restaurant_id"]
+    url = f"/api/v1/restaurants/{restaurant_id}/menu-tree"
+
+    with count_queries() as small:
+        response = client.get(url)
+    assert response.status_code == 200
+
+    for menu_number in range(3):
+        menu = create_menu(client, restaurant_id, name=f"Меню {menu_number}")
+        for dish_number in range(4):
+            create_dish(client, menu["id"], name=f"Блюдо {menu_number}.{dish_number}")
+
+    with count_queries() as large:
+        response = client.get(url)
+    assert response.status_code == 200
+    assert len(response.json()["menus"]) == 4
+    assert sum(len(menu["dishes"]) for menu in response.json()["menus"]) == 13
+
+    # Ресторан, его меню, блюда всех меню
+    assert len(small) == len(large) == 3
+
+
+def test_menu_dishes_query_count_does_not_grow_with_dishes(client, restaurant, count_queries):
+    menu_id = restaurant["menu_id"]
+    url = f"/api/v1/menu/{menu_id}/dishes"
+
+    with count_queries() as small:
+        client.get(url)
+
+    for number in range(10):
+        create_dish(client, menu_id, name=f"Блюдо {number}")
+
+    with count_queries() as large:
+        response = client.get(url)
+    assert len(response.json()["dishes"]) == 11
+
+    # Меню и блюда меню
+    assert len(small) == len(large) == 2
@@ -0,0 +1,42 @@
+"""Миграция схемы: шаги MIGRATIONS создают недостающие таблицы и индексы один раз"""
+from sqlalchemy import inspect
+
+import migrate
+from database import Base, engine
+
+
+def drop_migrated_objects():
+    for name, table_names, index_names in reversed(migrate.MIGRATIONS):
+        for index_name in index_names:
+            migrate._index(index_name).drop(engine)
+        for table_name in reversed(table_names):
+            Base.metadata.tables[table_name].drop(engine)
+
+
+def test_migrate_creates_missing_objects_once(db_schema):
+    drop_migrated_objects()
+
+    assert migrate.migrate(engine, dry_run=True)
+    assert migrate.migrate(engine)
+
+    # Соединения пула SQLite, открытые до DDL, могут отдавать прежний список индексов
+    engine.dispose()
+    inspector = inspect(engine)
+    for name, table_names, index_names in migrate.MIGRATIONS:
+        for table_name in table_names:
+            table = Base.metadata.tables[table_name]
+            assert table_name in inspector.get_table_names()
+            index_names = tuple(index_names) + tuple(index.name for index in table.indexes)
+        for index_name in index_names:
+            table_name = migrate._index(index_name).table.name
+            assert index_name in {index["name"] for index in inspector.get_indexes(table_name)}
+
+    assert migrate.migrate(engine) == []
+
+
+def test_dry_run_does_not_change_schema(db_schema):
+    drop_migrated_objects()
+
+    ddl = migrate.migrate(engine, dry_run=True)
+
+    assert ddl and migrate.migrate(engine, dry_run=True) == ddl
@@ -0,0 +1,70 @@
+"""Повторная отдача событий по Last-Event-ID и событие 'reset'"""
+import asyncio
+from datetime import datetime
+
+import schemas
+from order_events import OrderEventBus
+
+
+def order(order_id: int, restaurant_id: int = 1) -> schemas.CustomerOrder:
+    return schemas.CustomerOrder(
+        id=order_id, restaurant_id=restaurant_id, dish_id=1, table_number="1", quantity=1, total_amount="100",
+        order_time=datetime(2024, 1, 1, 12, 0),
+    )
+
+
+def subscribe(bus: OrderEventBus, **kwargs) -> list:
+    async def backlog():
+        subscription, events = bus.subscribe(**kwargs)
+        bus.unsubscribe(subscription)
+        return [(event.type, event.data.get("id")) for event in events]
+
+    return asyncio.run(backlog())
+
+
+def test_resume_returns_missed_events():
+    bus = OrderEventBus()
+    bus.publish("created", order(1))
+    last_event_id = bus.stats()["last_event_id"]
+    bus.publish("created", order(2))
+    bus.publish("updated", order(1))
+
+    assert subscribe(bus, last_event_id=last_event_id) == [("created", 2), ("updated", 1)]
+
+
+def test_resume_filters_by_restaurant():
+    bus = OrderEventBus()
+    start = bus.stats()["last_event_id"]
+    bus.publish("created", order(1, restaurant_id=1))
+    bus.publish("created", order(2, restaurant_id=2))
+
+    assert subscribe(bus, restaurant_id=2, last_event_id=start) == [("created", 2)]
+
+
+def test_up_to_date_client_gets_nothing():
+    bus = OrderEventBus()
+    bus.publish("created", order(1))
+
+    assert subscribe(bus, last_event_id=bus.stats()["last_event_id"]) == []
+    assert subscribe(bus) == []
+
+
+def test_events_evicted_from_history_cause_reset():
+    bus = OrderEventBus(history_size=2)
+    start = bus.stats()["last_event_id"]
+    for order_id in range(1, 5):
+        bus.publish("created", order(order_id))
+
+    assert subscribe(bus, last_event_id=start) == [("reset", None), ("created", 3), ("created", 4)]
+
+
+def test_id_from_another_process_causes_reset():
+    previous = OrderEventBus()
+    previous.publish("created", order(1))
+    stale_id = previous.stats()["last_event_id"]
+
+    # Номера нового процесса начинаются позже: id прежнего процесса меньше, истории нет
+    bus = OrderEventBus()
+    assert subscribe(bus, last_event_id=stale_id) == [("reset", None)]
+    # Номер больше текущего выдан другим процессом
+    assert subscribe(bus, last_event_id=bus.stats()["last_event_id"] + 1000) == [("reset", None)]
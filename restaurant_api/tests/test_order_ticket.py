@@ -0,0 +1,44 @@
+"""Чек из нескольких позиций: одна транзакция, проверка позиций схемой и по БД"""
+import models
+from conftest import create_dish
+
+URL = "/api/v1/customer_order/ticket"
+
+
+def ticket(restaurant, lines) -> dict:
+    return {"restaurant_id": restaurant["restaurant_id"], "table_number": "7", "lines": lines}
+
+
+def test_ticket_creates_all_lines_with_prices_from_menu(client, db, restaurant):
+    salad = create_dish(client, restaurant["menu_id"], name="Салат", price="250")
+
+    response = client.post(URL, json=ticket(restaurant, [
+        {"dish_id": restaurant["dish_id"], "quantity": 2},
+        {"dish_id": salad["id"]},
+    ]))
+
+    assert response.status_code == 201
+    assert [(order["dish_id"], order["quantity"], float(order["total_amount"])) for order in response.json()] == [
+        (restaurant["dish_id"], 2, 200.0), (salad["id"], 1, 250.0),
+    ]
+    assert {order["table_number"] for order in response.json()} == {"7"}
+    assert sum(orders for (orders,) in db.query(models.SalesRollupDaily.orders_count)) == 2
+
+
+def test_empty_ticket_and_bad_quantity_are_422(client, restaurant):
+    assert client.post(URL, json=ticket(restaurant, [])).status_code == 422
+
+    response = client.post(URL, json=ticket(restaurant, [{"dish_id": restaurant["dish_id"], "quantity": 0}]))
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "lines", 0, "quantity"]
+
+
+def test_missing_or_unavailable_dish_rejects_whole_ticket(client, db, restaurant):
+    response = client.post(URL, json=ticket(restaurant, [{"dish_id": restaurant["dish_id"]}, {"dish_id": 999}]))
+    assert response.status_code == 400
+    assert "999" in response.json()["detail"]
+
+    client.patch(f"/api/v1/dishes/{restaurant['dish_id']}/availability", json={"is_available": False})
+    assert client.post(URL, json=ticket(restaurant, [{"dish_id": restaurant["dish_id"]}])).status_code == 400
+
+    assert db.query(models.CustomerOrder).count() == 0
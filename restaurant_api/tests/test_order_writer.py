@@ -0,0 +1,102 @@
+"""Групповая фиксация заказов: пачки, ошибочные заказы, сбои БД, ответ 202 по таймауту"""
+import threading
+import time
+
+from conftest import create_order
+
+import models
+import order_writer
+import schemas
+from database import SessionLocal
+
+
+def order(restaurant: dict, dish_id: int = None) -> schemas.CustomerOrderCreate:
+    return schemas.CustomerOrderCreate(
+        restaurant_id=restaurant["restaurant_id"], dish_id=dish_id or restaurant["dish_id"],
+        table_number="1", quantity=1, total_amount="100",
+    )
+
+
+def test_batch_resolves_every_future(restaurant, db):
+    writer = order_writer.GroupCommitWriter(batch_size=10, batch_delay=0.2)
+    try:
+        futures = [writer.submit(order(restaurant)) for _ in range(5)]
+        orders = [future.result(timeout=5) for future in futures]
+    finally:
+        writer.stop()
+
+    assert len({created.id for created in orders}) == 5
+    assert db.query(models.CustomerOrder).count() == 5
+    assert writer.stats.snapshot()["batches_total"] < 5
+
+
+def test_bad_order_fails_only_its_future(restaurant, db):
+    writer = order_writer.GroupCommitWriter(batch_size=10, batch_delay=0.2)
+    try:
+        good = writer.submit(order(restaurant))
+        bad = writer.submit(order(restaurant, dish_id=999))
+        assert good.result(timeout=5).id is not None
+        assert bad.exception(timeout=5) is not None
+    finally:
+        writer.stop()
+
+    assert db.query(models.CustomerOrder).count() == 1
+    assert writer.stats.snapshot()["orders_failed_total"] == 1
+
+
+def test_session_error_fails_batch_and_writer_keeps_running(restaurant, db):
+    calls = []
+
+    def session_factory():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("БД недоступна")
+        return SessionLocal()
+
+    writer = order_writer.GroupCommitWriter(session_factory=session_factory, batch_size=10, batch_delay=0.2)
+    try:
+        failed = [writer.submit(order(restaurant)) for _ in range(2)]
+        for future in failed:
+            assert isinstance(future.exception(timeout=5), ConnectionError)
+
+        assert writer.submit(order(restaurant)).result(timeout=5).id is not None
+        assert writer._thread.is_alive()
+    finally:
+        writer.stop()
+
+    assert writer.stats.snapshot()["orders_failed_total"] == 2
+
+
+def test_write_behind_route_returns_ticket_on_timeout(restaurant, client, monkeypatch):
+    release = threading.Event()
+
+    def slow_session():
+        release.wait(5)
+        return SessionLocal()
+
+    writer = order_writer.GroupCommitWriter(session_factory=slow_session, batch_delay=0)
+    monkeypatch.setattr(order_writer, "ENABLED", True)
+    monkeypatch.setattr(order_writer, "ACK_TIMEOUT", 0.05)
+    monkeypatch.setattr(order_writer, "writer", writer)
+    try:
+        response = client.post("/api/v1/customer_order/", json={
+            "restaurant_id": restaurant["restaurant_id"], "dish_id": restaurant["dish_id"],
+            "table_number": "1", "quantity": 1, "total_amount": "100",
+        })
+        assert response.status_code == 202
+        location = response.headers["Location"]
+        assert client.get(location).status_code == 202
+
+        release.set()
+        for _ in range(50):
+            response = client.get(location)
+            if response.status_code != 202:
+                break
+            time.sleep(0.1)
+        assert response.status_code == 200
+        assert response.json()["dish_id"] == restaurant["dish_id"]
+
+        # Без задержки ответ приходит сразу после фиксации пачки
+        assert create_order(client, restaurant["restaurant_id"], restaurant["dish_id"])["id"]
+    finally:
+        writer.stop()
@@ -0,0 +1,41 @@
+"""PATCH: явный null в обязательном поле отклоняется, пропущенные поля не меняются"""
+
+
+def test_patch_null_for_required_field_is_rejected(client, restaurant):
+    dish_id = restaurant["dish_id"]
+
+    response = client.patch(f"/api/v1/dishes/{dish_id}", json={"name": None})
+
+    assert response.status_code == 422
+    assert client.get(f"/api/v1/dishes/{dish_id}").json()["name"] == "Суп"
+
+
+def test_patch_null_for_optional_field_clears_it(client, restaurant):
+    dish_id = restaurant["dish_id"]
+    client.patch(f"/api/v1/dishes/{dish_id}", json={"description": "Описание"})
+
+    response = client.patch(f"/api/v1/dishes/{dish_id}", json={"description": None})
+
+    assert response.status_code == 200
+    assert response.json()["description"] is None
+
+
+def test_patch_updates_only_passed_fields(client, restaurant):
+    dish_id = restaurant["dish_id"]
+
+    response = client.patch(f"/api/v1/dishes/{dish_id}", json={"price": "150.00"})
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "Суп"
+    assert float(response.json()["price"]) == 150
+
+
+def test_patch_writes_only_passed_columns(client, restaurant, count_queries):
+    dish_id = restaurant["dish_id"]
+
+    with count_queries() as statements:
+        client.patch(f"/api/v1/dishes/{dish_id}", json={"price": "120.00"})
+
+    # Без предварительного SELECT и без остальных столбцов в SET
+    assert [statement for statement in statements if statement.startswith(("SELECT dishes", "UPDATE"))][0] == \
+        "UPDATE dishes SET price=? WHERE dishes.id = ?"
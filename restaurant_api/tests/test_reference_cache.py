@@ -0,0 +1,39 @@
+"""Кэш справочников: ETag, 304 Not Modified, попадание без запросов к БД и сброс"""
+import models
+
+URL = "/api/v1/restaurant_type/"
+
+
+def test_reference_returns_304_for_matching_etag(client, restaurant):
+    response = client.get(URL)
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+
+    response = client.get(URL, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get(URL, headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+def test_cache_hit_does_not_query_database(client, restaurant, count_queries):
+    client.get(URL)
+
+    with count_queries() as statements:
+        assert client.get(URL).status_code == 200
+
+    assert statements == []
+
+
+def test_invalidation_reloads_reference(client, db, restaurant):
+    etag = client.get(URL).headers["ETag"]
+    db.add(models.DictionaryRestaurantType(code="bar", name="Бар"))
+    db.commit()
+    assert client.get(URL).headers["ETag"] == etag
+
+    assert client.delete("/api/v1/cache/restaurant_type").status_code == 204
+
+    response = client.get(URL)
+    assert response.headers["ETag"] != etag
+    assert [item["code"] for item in response.json()] == ["cafe", "bar"]
@@ -0,0 +1,62 @@
+"""Аналитика продаж: группировка и итоги считаются одним запросом на стороне БД"""
+import pytest
+
+from conftest import create_dish
+
+URL = "/api/v1/analytics/sales"
+
+
+@pytest.fixture
+def orders(client, restaurant):
+    salad = create_dish(client, restaurant["menu_id"], name="Салат")
+    for dish_id, quantity, amount, payment_method, status in (
+            (restaurant["dish_id"], 2, "200", "наличные", "принят"),
+            (restaurant["dish_id"], 1, "100", "карта", "подан"),
+            (salad["id"], 3, "450", "карта", "подан"),
+    ):
+        response = client.post("/api/v1/customer_order/", json={
+            "restaurant_id": restaurant["restaurant_id"], "dish_id": dish_id, "table_number": "1",
+            "quantity": quantity, "total_amount": amount, "payment_method": payment_method, "order_status": status,
+        })
+        assert response.status_code == 201
+    return {**restaurant, "salad_id": salad["id"]}
+
+
+def totals(rows) -> dict:
+    return {row["key"]: (row["orders"], row["quantity"], float(row["revenue"])) for row in rows}
+
+
+def test_sales_by_dish_in_one_grouped_query(client, orders, count_queries):
+    with count_queries() as statements:
+        response = client.get(URL, params={"group_by": "dish"})
+
+    assert totals(response.json()) == {orders["dish_id"]: (2, 3, 300.0), orders["salad_id"]: (1, 3, 450.0)}
+    assert {row["name"] for row in response.json()} == {"Суп", "Салат"}
+    assert len(statements) == 1 and "GROUP BY" in statements[0]
+
+
+def test_sales_by_payment_method_and_status_filter(client, orders):
+    response = client.get(URL, params={"group_by": "payment_method"})
+    assert totals(response.json()) == {"карта": (2, 4, 550.0), "наличные": (1, 2, 200.0)}
+
+    response = client.get(URL, params={"group_by": "payment_method", "order_status": "подан"})
+    assert totals(response.json()) == {"карта": (2, 4, 550.0)}
+
+
+def test_sales_by_day_and_period_filter(client, orders):
+    today = client.get("/api/v1/customer_order/").json()[0]["order_time"][:10]
+
+    assert totals(client.get(URL, params={"group_by": "day"}).json()) == {today: (3, 6, 750.0)}
+    assert client.get(URL, params={"group_by": "day", "date_to": "2000-01-01"}).json() == []
+
+
+def test_sales_summary(client, orders):
+    response = client.get(f"{URL}/summary", params={"restaurant_id": orders["restaurant_id"]})
+
+    assert response.json()["orders"] == 3
+    assert float(response.json()["revenue"]) == 750
+    assert float(response.json()["average_check"]) == 250
+
+
+def test_unknown_grouping_is_rejected(client):
+    assert client.get(URL, params={"group_by": "password"}).status_code == 422
@@ -0,0 +1,27 @@
+"""Выборочные поля fields=: в ответе и в SELECT только запрошенные столбцы (и всегда id)"""
+
+
+def test_list_returns_only_requested_fields(client, restaurant, count_queries):
+    with count_queries() as statements:
+        response = client.get("/api/v1/dishes/", params={"fields": "name"})
+
+    assert response.json() == [{"id": restaurant["dish_id"], "name": "Суп"}]
+    assert statements[0].startswith("SELECT dishes.name, dishes.id \nFROM dishes")
+
+
+def test_detail_returns_only_requested_fields(client, restaurant):
+    response = client.get(f"/api/v1/dishes/{restaurant['dish_id']}", params={"fields": "name,price"})
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"id", "name", "price"}
+
+
+def test_detail_with_fields_for_missing_entity_is_404(client, restaurant):
+    assert client.get("/api/v1/dishes/999", params={"fields": "name"}).status_code == 404
+
+
+def test_unknown_field_is_rejected(client, restaurant):
+    response = client.get("/api/v1/dishes/", params={"fields": "id,password"})
+
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
@@ -0,0 +1,93 @@
+"""Расчеты с поставщиками: группировки, сброс кэша при изменении поставок, SQL для SQL Server"""
+from sqlalchemy.dialects import mssql
+from sqlalchemy.orm import Query
+
+import analytics
+import models
+
+PAYABLES_URL = "/api/v1/analytics/payables"
+
+
+def create_supplier(client, company_name: str = "Поставщик") -> dict:
+    response = client.post("/api/v1/supplier/", json={
+        "company_name": company_name, "phone": "1", "inn": "1", "contract_number": "1",
+        "contract_date": "2024-01-01",
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def create_supply(client, supplier_id: int, restaurant_id: int, supply_date: str, total_amount: str,
+                  payment_status: str = "не оплачено", delivery_status: str = "ожидает") -> dict:
+    response = client.post("/api/v1/ingredient_supply/", json={
+        "supplier_id": supplier_id, "restaurant_id": restaurant_id, "supply_date": supply_date,
+        "invoice_number": supply_date, "total_amount": total_amount,
+        "payment_status": payment_status, "delivery_status": delivery_status,
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def payables(client, **params) -> list:
+    response = client.get(PAYABLES_URL, params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_groupings(client, restaurant):
+    restaurant_id = restaurant["restaurant_id"]
+    first, second = create_supplier(client, "Молоко"), create_supplier(client, "Овощи")
+    create_supply(client, first["id"], restaurant_id, "2024-01-10", "100", payment_status="оплачено",
+                  delivery_status="доставлено")
+    create_supply(client, first["id"], restaurant_id, "2024-01-20", "50")
+    create_supply(client, second["id"], restaurant_id, "2024-02-05", "30")
+
+    by_supplier = payables(client)
+    assert [(row["name"], row["supplies"]) for row in by_supplier] == [("Молоко", 2), ("Овощи", 1)]
+    assert float(by_supplier[0]["paid_amount"]) == 100
+    assert float(by_supplier[0]["outstanding_amount"]) == 50
+    assert by_supplier[0]["unpaid_supplies"] == 1
+    assert by_supplier[0]["pending_deliveries"] == 1
+
+    by_month = payables(client, group_by="month")
+    assert [(row["key"], row["supplies"], float(row["total_amount"])) for row in by_month] == [
+        ("2024-01-01", 2, 150), ("2024-02-01", 1, 30),
+    ]
+
+    by_day = payables(client, group_by="day", date_from="2024-01-15")
+    assert [row["key"] for row in by_day] == ["2024-01-20", "2024-02-05"]
+
+    assert [row["name"] for row in payables(client, group_by="restaurant")] == ["Ресторан"]
+
+
+def test_supply_write_invalidates_cache(client, restaurant):
+    supplier = create_supplier(client)
+    supply = create_supply(client, supplier["id"], restaurant["restaurant_id"], "2024-01-10", "100")
+    assert payables(client)[0]["unpaid_supplies"] == 1
+
+    response = client.patch(f"/api/v1/ingredient_supply/{supply['id']}/payment-status",
+                            json={"payment_status": "оплачено"})
+    assert response.status_code == 200, response.text
+
+    assert payables(client)[0]["unpaid_supplies"] == 0
+
+
+def test_cache_miss_reads_primary_not_replica(client, restaurant, replica):
+    supplier = create_supplier(client)
+    create_supply(client, supplier["id"], restaurant["restaurant_id"], "2024-01-10", "100")
+
+    # Реплика пуста: заполнение кэша с нее вернуло бы пустую сводку
+    assert [row["supplies"] for row in payables(client)] == [1]
+
+
+def test_month_key_is_datefromparts_literal_on_sql_server():
+    class MssqlSession:
+        def get_bind(self):
+            return type("Bind", (), {"dialect": mssql.dialect()})()
+
+    key = analytics._month(MssqlSession(), models.IngredientSupply.supply_date)
+    sql = str(Query([key]).statement.compile(dialect=mssql.dialect()))
+
+    # День - литерал, а не параметр: иначе SELECT и GROUP BY не совпадут (ошибка 8120)
+    assert "datefromparts(DATEPART(year, ingredient_supplies.supply_date), " \
+           "DATEPART(month, ingredient_supplies.supply_date), 1)" in sql